@@ -4,7 +4,15 @@ from NuRadioReco.utilities import units
 import os
 import six
 import json
+import copy
+import hashlib
 import logging
+import argparse
+import multiprocessing
+try:
+    import fcntl
+except ImportError:  # not available on Windows, the shared table cache is used without file locks
+    fcntl = None
 
 """
 This module takes care of the PROPOSAL implementation. Some important things
@@ -51,6 +59,12 @@ class Singleton(type):
             Singleton._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
         return Singleton._instances[cls]
 
+    def reset_instance(cls):
+        """
+        Deletes the instance of the class, so that the next call creates a new instance (e.g. with another configuration)
+        """
+        Singleton._instances.pop(cls, None)
+
 
 class SecondaryProperties:
     """
@@ -255,6 +269,113 @@ def check_path_to_tables(config_file_path):
         raise ValueError(error_msg)
 
 
+def get_config_file_path(config_file, allow_sample=False):
+    """
+    Returns the full path of a PROPOSAL config file
+
+    Parameters
+    ----------
+    config_file: string or path
+        One of the available options ('SouthPole', 'MooresBay', 'InfIce', 'Greenland')
+        or the path to a config file
+    allow_sample: bool
+        If True, the .sample file of the available options is returned if the
+        config file has not been created by the user. This is only useful if
+        the table paths of the config file are replaced, see `get_table_cache_config`.
+
+    Returns
+    -------
+    config_file_full_path: string
+        path to the config file
+    """
+    if (config_file == 'SouthPole'):
+        config_file_full_path = os.path.join(os.path.dirname(__file__), 'config_PROPOSAL.json')
+    elif (config_file == 'MooresBay'):
+        config_file_full_path = os.path.join(os.path.dirname(__file__), 'config_PROPOSAL_mooresbay.json')
+    elif (config_file == 'InfIce'):
+        config_file_full_path = os.path.join(os.path.dirname(__file__), 'config_PROPOSAL_infice.json')
+    elif (config_file == 'Greenland'):
+        config_file_full_path = os.path.join(os.path.dirname(__file__), 'config_PROPOSAL_greenland.json')
+    elif (os.path.exists(config_file)):
+        return config_file
+    else:
+        raise ValueError("Proposal config file is not valid. Please provide a valid option.")
+
+    if allow_sample and not os.path.exists(config_file_full_path):
+        return config_file_full_path + '.sample'
+
+    if not os.path.exists(config_file_full_path):
+        error_message = "Proposal config file does not exist.\n"
+        error_message += "Please provide valid paths for the interpolation tables "
+        error_message += "in file {}.sample ".format(config_file_full_path)
+        error_message += "and copy the file to {}.".format(os.path.basename(config_file_full_path))
+        raise ValueError(error_message)
+
+    return config_file_full_path
+
+
+def get_config_hash(config):
+    """
+    Returns a hash of a PROPOSAL configuration that identifies its interpolation
+    tables. The table paths are not part of the hash, but the PROPOSAL version is.
+
+    Parameters
+    ----------
+    config: dict
+        content of a PROPOSAL config file
+
+    Returns
+    -------
+    config_hash: string
+    """
+    config = copy.deepcopy(config)
+    interpolation = config.get('global', {}).get('interpolation', {})
+    interpolation.pop('path_to_tables', None)
+    interpolation.pop('path_to_tables_readonly', None)
+    content = json.dumps(config, sort_keys=True) + getattr(pp, '__version__', '')
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+
+def get_table_cache_config(config_file_full_path, tables_path):
+    """
+    Returns the config file of the shared table cache for a PROPOSAL config file.
+
+    Every configuration gets its own subdirectory of `tables_path`, named after
+    the configuration hash (see `get_config_hash`). It contains a copy of the
+    config file whose table paths point to this subdirectory, so that the
+    interpolation tables are generated only once for all jobs using the same
+    configuration.
+
+    Parameters
+    ----------
+    config_file_full_path: string
+        path to the PROPOSAL config file
+    tables_path: string
+        directory of the shared table cache
+
+    Returns
+    -------
+    cache_config_file: string
+        path to the config file inside the table cache
+    """
+    with open(config_file_full_path, 'r') as f:
+        config = json.load(f)
+
+    cache_dir = os.path.join(os.path.abspath(tables_path), get_config_hash(config))
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_config_file = os.path.join(cache_dir, 'config_PROPOSAL.json')
+    if not os.path.exists(cache_config_file):
+        config['global']['interpolation']['path_to_tables'] = cache_dir
+        config['global']['interpolation']['path_to_tables_readonly'] = cache_dir
+        # write to a temporary file first, so that other jobs never read an incomplete config file
+        tmp_file = f"{cache_config_file}.{os.getpid()}"
+        with open(tmp_file, 'w') as f:
+            json.dump(config, f, indent=2)
+        os.replace(tmp_file, cache_config_file)
+
+    return cache_config_file
+
+
 @six.add_metaclass(Singleton)
 class ProposalFunctions(object):
     """
@@ -263,7 +384,7 @@ class ProposalFunctions(object):
     not be used from the outside to avoid mismatching units.
     """
 
-    def __init__(self, config_file='SouthPole', log_level=logging.INFO):
+    def __init__(self, config_file='SouthPole', log_level=logging.INFO, tables_path=None):
         """
         Parameters
         ----------
@@ -277,6 +398,16 @@ class ProposalFunctions(object):
             IMPORTANT: If these options are used, the code is more efficient if the
             user requests their own "path_to_tables" and "path_to_tables_readonly",
             pointing them to a writable directory
+        tables_path: string, path or None
+            Directory of a shared cache for the interpolation tables. If given, the
+            table paths of the config file are replaced by a subdirectory per
+            configuration and the tables are generated only once (protected by a
+            file lock, so that several jobs can use the same cache at the same time.
+            File locks are not available on Windows, where the tables of a configuration
+            must be generated by a single job first).
+            The .sample config files can then be used directly. If None, the
+            environment variable NURADIOMC_PROPOSAL_TABLES is used if it is set,
+            otherwise the table paths of the config file are used.
         """
         self.__logger = logging.getLogger("proposal")
         self.__logger.setLevel(log_level)
@@ -284,6 +415,9 @@ class ProposalFunctions(object):
 
         self.__propagators = {}
         self.__config_file = config_file
+        if tables_path is None:
+            tables_path = os.environ.get('NURADIOMC_PROPOSAL_TABLES', None)
+        self.__tables_path = tables_path
 
     def __get_propagator(self,
                             particle_code=13):
@@ -332,31 +466,70 @@ class ProposalFunctions(object):
 
             mu_def = mu_def_builder.build()
 
-            if (self.__config_file == 'SouthPole'):
-                config_file_full_path = os.path.join(os.path.dirname(__file__), 'config_PROPOSAL.json')
-            elif (self.__config_file == 'MooresBay'):
-                config_file_full_path = os.path.join(os.path.dirname(__file__), 'config_PROPOSAL_mooresbay.json')
-            elif (self.__config_file == 'InfIce'):
-                config_file_full_path = os.path.join(os.path.dirname(__file__), 'config_PROPOSAL_infice.json')
-            elif (self.__config_file == 'Greenland'):
-                config_file_full_path = os.path.join(os.path.dirname(__file__), 'config_PROPOSAL_greenland.json')
-            elif (os.path.exists(self.__config_file)):
-                config_file_full_path = self.__config_file
+            if self.__tables_path is None:
+                config_file_full_path = get_config_file_path(self.__config_file)
+                check_path_to_tables(config_file_full_path)
+                self.__propagators[particle_code] = pp.Propagator(particle_def=mu_def, config_file=config_file_full_path)
             else:
-                raise ValueError("Proposal config file is not valid. Please provide a valid option.")
+                self.__propagators[particle_code] = self.__get_cached_propagator(mu_def, particle_code)
 
-            if not os.path.exists(config_file_full_path):
-                error_message = "Proposal config file does not exist.\n"
-                error_message += "Please provide valid paths for the interpolation tables "
-                error_message += "in file {}.sample ".format(config_file_full_path)
-                error_message += "and copy the file to {}.".format(os.path.basename(config_file_full_path))
-                raise ValueError(error_message)
+        return self.__propagators[particle_code]
 
-            check_path_to_tables(config_file_full_path)
+    def __get_cached_propagator(self, particle_def, particle_code):
+        """
+        Creates a PROPOSAL propagator whose interpolation tables are stored in the shared table cache.
 
-            self.__propagators[particle_code] = pp.Propagator(particle_def=mu_def, config_file=config_file_full_path)
+        The tables of a configuration are only generated by one process at a time. A file
+        in the cache directory records for which particles the tables are complete.
+        Afterwards, many processes can read them at the same time.
 
-        return self.__propagators[particle_code]
+        Parameters
+        ----------
+        particle_def: PROPOSAL particle definition
+        particle_code: integer
+            Particle code for the muon- (13), muon+ (-13), tau- (15), or tau+ (-15)
+
+        Returns
+        -------
+        propagator: PROPOSAL propagator
+        """
+        config_file_full_path = get_config_file_path(self.__config_file, allow_sample=True)
+        cache_config_file = get_table_cache_config(config_file_full_path, self.__tables_path)
+        cache_dir = os.path.dirname(cache_config_file)
+        tables_complete_file = os.path.join(cache_dir, f"tables_complete_{particle_code}")
+
+        with open(os.path.join(cache_dir, 'tables.lock'), 'a') as lock_file:
+            if fcntl is None:
+                if not os.path.exists(tables_complete_file):
+                    self.__logger.warning(f"file locks are not supported on this platform, the PROPOSAL tables in {cache_dir} "
+                                          "must not be generated by several jobs at the same time")
+            elif os.path.exists(tables_complete_file):
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+            else:
+                self.__logger.info(f"acquiring lock to generate the PROPOSAL tables in {cache_dir}")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                propagator = pp.Propagator(particle_def=particle_def, config_file=cache_config_file)
+                if not os.path.exists(tables_complete_file):
+                    open(tables_complete_file, 'w').close()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return propagator
+
+    def initialize_propagators(self, particle_codes):
+        """
+        Initializes the propagators for the given particle codes, so that the
+        (expensive) initialization is done before the first particle is propagated
+
+        Parameters
+        ----------
+        particle_codes: list of integers
+            Particle codes for the muon- (13), muon+ (-13), tau- (15), or tau+ (-15)
+        """
+        for particle_code in particle_codes:
+            self.__get_propagator(int(particle_code))
 
     def __produces_shower(self,
                           particle,
@@ -550,7 +723,8 @@ class ProposalFunctions(object):
                               low_nu=0.5 * units.PeV,
                               propagation_length_nu=1000 * units.km,
                               min_energy_loss_nu=0.5 * units.PeV,
-                              propagate_decay_muons=True):
+                              propagate_decay_muons=True,
+                              seeds=None):
         """
         Propagates a set of leptons and returns a list with the properties for
         all the properties of the shower-inducing secondary particles
@@ -576,6 +750,11 @@ class ProposalFunctions(object):
         propagate_decay_muons: bool
             If True, muons created by tau decay are propagated and their induced
             showers are stored
+        seeds: array of integers or None (default)
+            If given, the random generator of PROPOSAL is seeded with the
+            corresponding seed before each lepton is propagated. The secondaries
+            of a lepton then only depend on its own seed and not on the other
+            leptons that are propagated in the same call or process.
 
         Returns
         -------
@@ -601,14 +780,20 @@ class ProposalFunctions(object):
         if lepton_directions is None:
             lepton_directions = [(0, 0, -1)] * len(energy_leptons)
 
+        if seeds is None:
+            seeds = [None] * len(energy_leptons)
+
         if propagate_decay_muons:
 
             decay_muons_array = []
 
         secondaries_array = []
 
-        for energy_lepton, lepton_code, lepton_position, lepton_direction in zip(energy_leptons,
-            lepton_codes, lepton_positions, lepton_directions):
+        for energy_lepton, lepton_code, lepton_position, lepton_direction, seed in zip(energy_leptons,
+            lepton_codes, lepton_positions, lepton_directions, seeds):
+
+            if seed is not None:
+                pp.RandomGenerator.get().set_seed(int(seed))
 
             secondaries = self.__propagate_particle(energy_lepton, lepton_code,
                                                     lepton_position, lepton_direction,
@@ -660,11 +845,14 @@ class ProposalFunctions(object):
         # Propagating the decay muons
         if propagate_decay_muons:
 
-            for shower_inducing_prods, decay_muon, lepton_position in zip(secondaries_array,
-                decay_muons_array, lepton_positions):
+            for shower_inducing_prods, decay_muon, lepton_position, seed in zip(secondaries_array,
+                decay_muons_array, lepton_positions, seeds):
 
                 if decay_muon[0] is None:
                     continue
+                if seed is not None:
+                    # the decay muon gets its own random sequence, derived from the seed of the parent lepton
+                    pp.RandomGenerator.get().set_seed(int(np.random.SeedSequence(int(seed)).generate_state(1)[0] >> 1))
                 mu_energy, mu_code, mu_position, mu_direction = decay_muon
                 mu_secondaries = self.__propagate_particle(mu_energy, mu_code, mu_position, mu_direction,
                                                            propagation_length, low=low)
@@ -751,3 +939,116 @@ class ProposalFunctions(object):
                     decay_prop = (None, None)
 
         return np.array(decays_array)
+
+
+def _initialize_worker(config_file, particle_codes, log_level, tables_path):
+    """
+    Creates the ProposalFunctions instance of a worker process and initializes its propagators
+    """
+    ProposalFunctions(config_file=config_file, log_level=log_level,
+                      tables_path=tables_path).initialize_propagators(particle_codes)
+
+
+def _get_secondaries_batch(batch):
+    """
+    Propagates a batch of leptons with the ProposalFunctions instance of the current process
+    """
+    energy_leptons_nu, lepton_codes, lepton_positions_nu, lepton_directions, seeds, kwargs = batch
+    return ProposalFunctions().get_secondaries_array(energy_leptons_nu, lepton_codes, lepton_positions_nu,
+                                                     lepton_directions, seeds=seeds, **kwargs)
+
+
+def get_secondaries_array_parallel(energy_leptons_nu,
+                                   lepton_codes,
+                                   lepton_positions_nu,
+                                   lepton_directions,
+                                   seeds,
+                                   config_file='SouthPole',
+                                   n_cores=None,
+                                   batch_size=20,
+                                   log_level=logging.INFO,
+                                   tables_path=None,
+                                   **kwargs):
+    """
+    Propagates a set of leptons with a pool of processes and returns a list with
+    the properties of the shower-inducing secondary particles (see
+    `ProposalFunctions.get_secondaries_array`).
+
+    The leptons are distributed in batches to the worker processes, each of them
+    holds its own ProposalFunctions instance whose propagators are initialized
+    when the process starts. Because every lepton is propagated with its own seed,
+    the result does not depend on the number of processes or the batch size.
+
+    Parameters
+    ----------
+    energy_leptons_nu: array of floats
+        Array with the energies of the input leptons, in NuRadioMC units (eV)
+    lepton_codes: array of integers
+        Array with the PDG lepton codes
+    lepton_positions_nu: array of (float, float, float) tuples
+        Array containing the lepton positions in NuRadioMC units (m)
+    lepton_directions: array of (float, float, float) tuples
+        Array containing the lepton directions, normalised to 1
+    seeds: array of integers
+        Seed of the PROPOSAL random generator for every lepton
+    config_file: string or path
+        The PROPOSAL config file, see `ProposalFunctions`
+    n_cores: int or None
+        Number of worker processes. None uses all available cores, 1 propagates
+        all leptons in the current process.
+    batch_size: int
+        Number of leptons that are sent to a worker process at once
+    log_level: logging log level
+        log level of the ProposalFunctions instances
+    tables_path: string, path or None
+        directory of the shared table cache, see `ProposalFunctions`
+    kwargs: dict
+        additional arguments passed to `ProposalFunctions.get_secondaries_array`
+
+    Returns
+    -------
+    secondaries_array: 2D-list containing SecondaryProperties objects
+        List containing the information on the shower-inducing secondaries, see
+        `ProposalFunctions.get_secondaries_array`
+    """
+    n_leptons = len(energy_leptons_nu)
+    if n_leptons == 0:
+        return []
+    particle_codes = set(np.unique(lepton_codes).tolist())
+    if kwargs.get('propagate_decay_muons', True) and (particle_codes & {15, -15}):
+        particle_codes |= {13, -13}  # muons from tau decays are propagated as well
+    particle_codes = sorted(particle_codes)
+
+    batches = [(energy_leptons_nu[i:i + batch_size], lepton_codes[i:i + batch_size],
+                lepton_positions_nu[i:i + batch_size], lepton_directions[i:i + batch_size],
+                seeds[i:i + batch_size], kwargs) for i in range(0, n_leptons, batch_size)]
+
+    if n_cores == 1:
+        _initialize_worker(config_file, particle_codes, log_level, tables_path)
+        results = [_get_secondaries_batch(batch) for batch in batches]
+    else:
+        with multiprocessing.Pool(n_cores, initializer=_initialize_worker,
+                                  initargs=(config_file, particle_codes, log_level, tables_path)) as pool:
+            results = pool.map(_get_secondaries_batch, batches)
+
+    return [secondaries for batch_result in results for secondaries in batch_result]
+
+
+if __name__ == "__main__":
+    """
+    Generates the PROPOSAL interpolation tables of a configuration in the shared table cache,
+    so that the jobs of a simulation don't need to generate them at startup.
+    """
+    parser = argparse.ArgumentParser(description='Prebuild the PROPOSAL interpolation tables')
+    parser.add_argument('tables_path', type=str, help='directory of the shared table cache')
+    parser.add_argument('--config', type=str, nargs='+', default=['SouthPole'],
+                        help="PROPOSAL config files or available options ('SouthPole', 'MooresBay', 'InfIce', 'Greenland')")
+    parser.add_argument('--particle_codes', type=int, nargs='+', default=[13, -13, 15, -15],
+                        help='particle codes of the leptons for which the tables are generated')
+    args = parser.parse_args()
+
+    for config_file in args.config:
+        proposal_functions = ProposalFunctions(config_file=config_file, tables_path=args.tables_path)
+        proposal_functions.initialize_propagators(args.particle_codes)
+        # ProposalFunctions is a singleton, a new instance is needed for every config file
+        ProposalFunctions.reset_instance()
@@ -82,20 +82,27 @@ if __name__ == "__main__":
         If one of these three options is chosen, the user is supposed to edit
         the corresponding config_PROPOSAL_xxx.json.sample file to include valid
         table paths and then copy this file to config_PROPOSAL_xxx.json.""")
+    parser.add_argument('--tabulated_tau_decays', default=False, action='store_true',
+                        help='if set, the tau decays are sampled from the tabulated decay library instead of using PROPOSAL (only the decay shower is simulated)')
     parser.add_argument('--start_file_id', type=int, default=0,
                         help="in case the data set is distributed over several files, this number specifies the id of the first file (useful if an existing data set is extended)")
     args = parser.parse_args()
 
-    generate_eventlist_cylinder(args.filename, args.n_events, args.Emin, args.Emax,
-                                args.fiducial_rmin, args.fiducial_rmax, args.fiducial_zmin, args.fiducial_zmax,
-                                args.full_rmin, args.full_rmax, args.full_zmin, args.full_zmax,
-                                args.thetamin, args.thetamax,
-                                args.phimin, args.phimax,
-                                args.start_event_id,
-                                args.flavor,
-                                args.n_events_per_file,
-                                args.spectrum,
-                                args.deposited,
-                                args.proposal,
-                                args.proposal_config,
-                                args.start_file_id)
+    volume = {'fiducial_rmin': args.fiducial_rmin, 'fiducial_rmax': args.fiducial_rmax,
+              'fiducial_zmin': args.fiducial_zmin, 'fiducial_zmax': args.fiducial_zmax}
+    for key in ['full_rmin', 'full_rmax', 'full_zmin', 'full_zmax']:
+        if(getattr(args, key) is not None):
+            volume[key] = getattr(args, key)
+
+    generate_eventlist_cylinder(args.filename, args.n_events, args.Emin, args.Emax, volume,
+                                thetamin=args.thetamin, thetamax=args.thetamax,
+                                phimin=args.phimin, phimax=args.phimax,
+                                start_event_id=args.start_event_id,
+                                flavor=args.flavor,
+                                n_events_per_file=args.n_events_per_file,
+                                spectrum=args.spectrum,
+                                deposited=args.deposited,
+                                proposal=args.proposal,
+                                proposal_config=args.proposal_config,
+                                start_file_id=args.start_file_id,
+                                tabulated_tau_decays=args.tabulated_tau_decays)
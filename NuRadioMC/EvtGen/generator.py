@@ -22,6 +22,7 @@ import numpy as np
 import NuRadioMC
 from NuRadioReco.utilities import units
 from NuRadioMC.utilities import inelasticities
+from NuRadioMC.utilities import hdf5_schema
 from NuRadioReco.utilities import version
 from six import iterkeys, iteritems
 from scipy import constants
@@ -110,8 +111,177 @@ def get_tau_95_length(energies):
     return 10 ** log_length * units.m
 
 
+# interpolation tables of the tau decay library, loaded when they are used for the first time
+_tau_decay_tables = {}
+
+
+def get_tau_decay_tables(filename=None):
+    """
+    Returns the interpolation tables of the tau decay library (created with create_tau_tab.py).
+
+    The library contains the time (in the lab frame) and the energy of a tau at the moment of its
+    decay, including continuous energy losses, as a function of the decay time in the rest frame
+    and the initial energy of the tau. The tables are interpolated linearly in the logarithms
+    of all quantities.
+
+    Parameters
+    ----------
+    filename: string or None
+        path to the decay library. If None, the decay_library.hdf5 of this folder is used.
+
+    Returns
+    -------
+    tables: dictionary
+        'decay_times' and 'decay_energies' interpolators (functions of log10 rest time and
+        log10 energy) and the limits of the tabulated rest times and energies
+    """
+    if(filename is None):
+        filename = os.path.join(os.path.dirname(__file__), 'decay_library.hdf5')
+    if(filename not in _tau_decay_tables):
+        with h5py.File(filename, 'r') as fin:
+            log_rest_times = np.log10(fin['rest_times'][...])
+            log_energies = np.log10(fin['initial_energies'][...])
+            _tau_decay_tables[filename] = {
+                'decay_times': RectBivariateSpline(log_rest_times, log_energies, np.log10(fin['decay_times'][...]), kx=1, ky=1),
+                'decay_energies': RectBivariateSpline(log_rest_times, log_energies, np.log10(fin['decay_energies'][...]), kx=1, ky=1),
+                'rest_time_range': 10 ** log_rest_times[[0, -1]],
+                'energy_range': 10 ** log_energies[[0, -1]]}
+    return _tau_decay_tables[filename]
+
+
+def get_tau_decays(tau_energies, rnd=None, filename=None):
+    """
+    Samples the decay of taus from the tabulated decay library.
+
+    The decay time in the rest frame follows an exponential distribution and is sampled with its
+    inverse cumulative distribution function. The decay time and energy in the lab frame are then
+    interpolated from the decay library. Below the smallest tabulated energy, energy losses are
+    negligible and the tau travels with constant energy.
+
+    Parameters
+    ----------
+    tau_energies: array of floats
+        initial energies of the taus
+    rnd: random generator object
+        if None is provided, a new default random generator object is initialized
+    filename: string or None
+        path to the decay library, see `get_tau_decay_tables`
+
+    Returns
+    -------
+    decay_lengths: array of floats
+        distance between the creation and the decay of the taus
+    decay_times: array of floats
+        time between the creation and the decay of the taus
+    decay_energies: array of floats
+        energies of the taus at the decay
+    """
+    if(rnd is None):
+        rnd = np.random.default_rng()
+    tables = get_tau_decay_tables(filename)
+    tau_energies = np.asarray(tau_energies, dtype=float)
+    rest_times = -tau_rest_lifetime * np.log(1 - rnd.uniform(0, 1, len(tau_energies)))
+
+    Emin, Emax = tables['energy_range']
+    if(np.any(tau_energies > Emax)):
+        logger.warning(f"{np.sum(tau_energies > Emax)} taus have energies above the decay library ({Emax / units.eV:.1g}eV), "
+                       "their decays are calculated for the largest tabulated energy")
+    # very early decays are scaled from the smallest tabulated rest time, the energy losses are negligible there
+    tmin, tmax = tables['rest_time_range']
+    log_rest_times = np.log10(np.clip(rest_times, tmin, tmax))
+    log_energies = np.log10(np.clip(tau_energies, Emin, Emax))
+    decay_times = 10 ** tables['decay_times'].ev(log_rest_times, log_energies) * np.minimum(rest_times / tmin, 1)
+    decay_energies = 10 ** tables['decay_energies'].ev(log_rest_times, log_energies)
+
+    low_energy = tau_energies < Emin
+    decay_times[low_energy] = rest_times[low_energy] * tau_energies[low_energy] / tau_mass
+    decay_energies[low_energy] = tau_energies[low_energy]
+
+    return decay_times * cspeed, decay_times, decay_energies
+
+
+# Decay channels of the tau: e nu nu, mu nu nu, pi nu, pi pi0 nu (rho), 3 pi nu (a1) and the remaining hadronic
+# channels, with their branching ratios (PDG), the shower type and particle code (for a tau-) of the shower-inducing
+# decay products and the invariant mass of the hadrons. Several hadrons create a single shower ('decay_bundle',
+# see NuRadioProposal.py), the muon of the muonic channel doesn't create a shower.
+tau_decay_channels = {'branching_ratios': np.array([0.1782, 0.1739, 0.1151, 0.2549, 0.1857, 0.0922]),
+                      'shower_types': np.array(['em', '', 'had', 'had', 'had', 'had']),
+                      'codes': np.array([11, 13, -211, 86, 86, 86]),
+                      'hadron_masses': np.array([0, 0, 139.57, 775.26, 1230., 1400.]) * units.MeV}
+
+
+def get_tau_decay_products(tau_codes, rnd=None):
+    """
+    Samples the decay channels of taus and the fraction of the tau energy that goes into the decay shower.
+
+    The decay channel is sampled according to its branching ratio (see `tau_decay_channels`). As in the
+    decays of PROPOSAL, the polarization of the tau is neglected. The energy fraction y of the electron of
+    tau -> e nu nu then follows the spectrum dN/dy = (5 - 9 y^2 + 4 y^3) / 3 of the leptonic decay, and the
+    energy fraction of the hadrons is uniformly distributed between m_had^2 / m_tau^2 and 1 (the neutrino
+    is emitted isotropically in the rest frame).
+
+    Parameters
+    ----------
+    tau_codes: array of ints
+        particle codes of the taus (15 or -15)
+    rnd: random generator object
+        if None is provided, a new default random generator object is initialized
+
+    Returns
+    -------
+    energy_fractions: array of floats
+        fractions of the tau energy at the decay that go into the decay shower
+    shower_types: array of strings
+        shower types ('em' or 'had') of the decay showers, an empty string for the muonic decays without shower
+    codes: array of ints
+        particle codes of the shower-inducing decay products (see NuRadioProposal.py), +-13 for the muonic decays
+    """
+    if(rnd is None):
+        rnd = np.random.default_rng()
+    tau_codes = np.asarray(tau_codes)
+    branching_ratios = tau_decay_channels['branching_ratios']
+    channels = rnd.choice(len(branching_ratios), size=len(tau_codes), p=branching_ratios / np.sum(branching_ratios))
+    uniform = rnd.uniform(0, 1, len(tau_codes))
+
+    # hadronic channels
+    y_min = (tau_decay_channels['hadron_masses'][channels] / tau_mass) ** 2
+    energy_fractions = y_min + (1 - y_min) * uniform
+    # electronic channel, the inverse of the cumulative distribution function is interpolated
+    y = np.linspace(0, 1, 1001)
+    mask_em = tau_decay_channels['shower_types'][channels] == 'em'
+    energy_fractions[mask_em] = np.interp(uniform[mask_em], (5 * y - 3 * y ** 3 + y ** 4) / 3, y)
+
+    # the decay products of tau+ are the antiparticles, the decay bundle has no charge
+    codes = tau_decay_channels['codes'][channels]
+    codes = np.where(codes == 86, codes, codes * np.sign(tau_codes))
+    return energy_fractions, tau_decay_channels['shower_types'][channels], codes
+
+
+def _write_events_file(filename, data_sets, attributes, n_events, dataset_options=None,
+                       schema_version=hdf5_schema.SCHEMA_VERSION_DEFAULT):
+    """
+    writes the (already sliced and encoded) data sets of one file of `write_events_to_hdf5`
+    """
+    with h5py.File(filename, 'w') as fout:
+        fout.attrs['VERSION_MAJOR'] = VERSION_MAJOR
+        fout.attrs['VERSION_MINOR'] = VERSION_MINOR
+        fout.attrs['header'] = HEADER
+        for key, value in attributes.items():
+            fout.attrs[key] = value
+        fout.attrs['total_number_of_events'] = attributes['n_events']
+        fout.attrs['schema_version'] = schema_version
+        for key, value in data_sets.items():
+            hdf5_schema.write_dataset(fout, key, value, dataset_options=dataset_options)
+        fout.attrs['n_events'] = n_events
+
+
+def _write_events_file_star(kwargs):
+    return _write_events_file(**kwargs)
+
+
 def write_events_to_hdf5(filename, data_sets, attributes, n_events_per_file=None,
-                         start_file_id=0):
+                         start_file_id=0, n_cores=1, use_threads=False, dataset_options=None,
+                         schema_version=hdf5_schema.SCHEMA_VERSION_DEFAULT):
     """
     writes NuRadioMC input parameters to hdf5 file
 
@@ -127,8 +297,21 @@ def write_events_to_hdf5(filename, data_sets, attributes, n_events_per_file=None
         a dictionary containing the meta attributes
     n_events_per_file: int (optional, default None)
         the number of events per file
-    additional_interactions: dict or None (default)
-        a dictionary containing potential additional interactions, such as the second tau interaction vertex.
+    start_file_id: int (default 0)
+        the id of the first file (only relevant if the data set is split into several files)
+    n_cores: int (default 1)
+        number of files that are written in parallel
+    use_threads: bool (default False)
+        if True, the files are written in parallel threads, otherwise in parallel processes
+    dataset_options: dict or None (default)
+        keyword arguments passed to `h5py.File.create_dataset` for every data set, e.g. to set the chunking
+        and compression: {'chunks': True, 'compression': 'gzip', 'compression_opts': 4}. Options of single
+        data sets can be given as dictionaries with the name of the data set as key, see
+        `hdf5_schema.get_dataset_options`.
+    schema_version: int (default 1)
+        the on-disk format of the data sets, see `NuRadioMC.utilities.hdf5_schema`. The compact schema
+        (version 2) stores the categorical fields as enums and uses single precision where it is sufficient.
+        If no `dataset_options` are given, its data sets are chunked and compressed.
     """
 
     n_events = attributes['n_events']
@@ -142,65 +325,41 @@ def write_events_to_hdf5(filename, data_sets, attributes, n_events_per_file=None
         n_events_per_file = n_events
     else:
         n_events_per_file = int(n_events_per_file)
-    iFile = -1
-    evt_id_first = data_sets["event_group_ids"][0]
+
+    data_sets = {key: hdf5_schema.encode_dataset(key, value, schema_version) for key, value in data_sets.items()}
+    if(dataset_options is None and schema_version == hdf5_schema.SCHEMA_VERSION_COMPACT):
+        dataset_options = hdf5_schema.compact_dataset_options
+
+    # index of the event groups, calculated only once: the sorted event group ids and the index of the
+    # last entry of every event group (such that the last event is completely in its file)
+    event_group_ids = data_sets["event_group_ids"]
+    evt_ids, last_indices_reversed = np.unique(event_group_ids[::-1], return_index=True)
+    stop_indices = len(event_group_ids) - last_indices_reversed
+    n_files = int(np.ceil(len(evt_ids) / n_events_per_file))
+
+    files = []
     evt_id_last_previous = 0  # save the last event id of the previous file
     start_index = 0
     n_events_total = 0
-    while True:
-        iFile += 1
+    for iFile in range(n_files):
         filename2 = filename
-        evt_ids_this_file = np.unique(data_sets["event_group_ids"])[iFile * n_events_per_file : (iFile + 1) * n_events_per_file]
-        if(len(evt_ids_this_file) == 0):
-            logger.info("no more events to write in file {}".format(iFile))
-            break
-
         if((iFile > 0) or (n_events_per_file < n_events)):
             filename2 = filename + ".part{:04}".format(iFile + start_file_id)
-        fout = h5py.File(filename2, 'w')
-        fout.attrs['VERSION_MAJOR'] = VERSION_MAJOR
-        fout.attrs['VERSION_MINOR'] = VERSION_MINOR
-        fout.attrs['header'] = HEADER
-        for key, value in attributes.items():
-            fout.attrs[key] = value
-        fout.attrs['total_number_of_events'] = total_number_of_events
-
-        evt_id_first = evt_ids_this_file[0]
-        evt_id_last = evt_ids_this_file[-1]
 
-        tmp = np.squeeze(np.argwhere(data_sets["event_group_ids"] == evt_id_last))  # set stop index such that last event is competely in file
-        if(tmp.size == 1):
-            stop_index = tmp + 1
-        else:
-            stop_index = tmp[-1] + 1
-#         if(evt_id_last >= n_events):
-#             evt_id_last = n_events
-#             stop_index = len(data_sets["event_group_ids"])
-#         else:
-#             tmp = np.squeeze(np.argwhere(data_sets["event_group_ids"] > evt_id_last))  # set stop index such that last event is competely in file
-#             if(tmp.size == 1):
-#                 stop_index = tmp
-#             else:
-#                 stop_index = tmp[0]
-
-        for key in data_sets:
-            data_sets[key] = np.array(data_sets[key])
-        for key, value in data_sets.items():
-            if value.dtype.kind == 'U':
-                fout[key] = np.array(value, dtype=h5py.string_dtype(encoding='utf-8'))[start_index:stop_index]
-            else:
-                fout[key] = value[start_index:stop_index]
+        i_last = min((iFile + 1) * n_events_per_file, len(evt_ids)) - 1
+        evt_id_first = evt_ids[iFile * n_events_per_file]
+        evt_id_last = evt_ids[i_last]
+        stop_index = stop_indices[i_last]
 
         # determine the number of events in this file (which is NOT the same as the entries in the file)
         # case 1) this is not the last file -> number of events is difference between last event id of the current and previous file + 1
         # case 2) it is the last file -> total number of simulated events - last event id of previous file
         # case 3) it is the first file -> last event id + 1 - start_event_id
         # case 4) it is the first and last file -> total number of simulated events
-        evt_ids_next_file = np.unique(data_sets["event_group_ids"])[(iFile + 1) * n_events_per_file : (iFile + 2) * n_events_per_file]
         n_events_this_file = None
-        if(iFile == 0 and len(evt_ids_next_file) == 0):  # case 4
+        if(iFile == 0 and n_files == 1):  # case 4
             n_events_this_file = total_number_of_events
-        elif(len(evt_ids_next_file) == 0):  # last file -> case 2
+        elif(iFile == n_files - 1):  # last file -> case 2
             n_events_this_file = total_number_of_events - (evt_id_last_previous + 1) + attributes['start_event_id']
         elif(iFile == 0):  # case 3
             n_events_this_file = evt_id_last - attributes['start_event_id'] + 1
@@ -209,15 +368,27 @@ def write_events_to_hdf5(filename, data_sets, attributes, n_events_per_file=None
 
         logger.status('writing file {} with {} events (id {} - {}) and {} entries'.format(filename2, n_events_this_file, evt_id_first,
                                                                                   evt_id_last, stop_index - start_index))
-        fout.attrs['n_events'] = n_events_this_file
-        fout.close()
+        files.append({'filename': filename2,
+                      'data_sets': {key: value[start_index:stop_index] for key, value in data_sets.items()},
+                      'attributes': attributes,
+                      'n_events': n_events_this_file,
+                      'dataset_options': dataset_options,
+                      'schema_version': schema_version})
         n_events_total += n_events_this_file
 
         start_index = stop_index
-
         evt_id_last_previous = evt_id_last
-        if(evt_id_last == n_events):  # break while loop if all events are saved
-            break
+
+    if(n_cores == 1 or len(files) < 2):
+        for kwargs in files:
+            _write_events_file(**kwargs)
+    else:
+        if(use_threads):
+            from multiprocessing.pool import ThreadPool as Pool
+        else:
+            from multiprocessing import Pool
+        with Pool(n_cores) as pool:
+            pool.map(_write_events_file_star, files)
     logger.info("wrote {} events in total".format(n_events_total))
 
 
@@ -228,25 +399,19 @@ def primary_energy_from_deposited(Edep, ccnc, flavor, inelasticity):
 
     Parameters
     ----------
-    Edep: float
+    Edep: float or array of floats
         deposited energy
-    ccnc: string
+    ccnc: string or array of strings
         indicates 'nc', neutral current; 'cc', charged current
-    flavor: int
+    flavor: int or array of ints
         neutrino flavor
-    inelasticity: float
+    inelasticity: float or array of floats
         inelasticity of the interaction
     """
-
-    if (ccnc == 'nc'):
-        return Edep / inelasticity
-    elif (ccnc == 'cc'):
-        if (np.abs(flavor) == 12):
-            return Edep
-        elif (np.abs(flavor) == 14):
-            return Edep / inelasticity
-        elif (np.abs(flavor) == 16):
-            return Edep / inelasticity  # TODO: change this for taus
+    # only for electron neutrino CC interactions the full energy is deposited,
+    # otherwise only the hadronic shower is visible (TODO: change this for taus)
+    full_deposit = (np.asarray(ccnc) == 'cc') & (np.abs(flavor) == 12)
+    return np.where(full_deposit, Edep, np.asarray(Edep) / inelasticity)[()]
 
 
 def ice_cube_nu_fit(energy, slope=-2.19, offset=1.01):
@@ -565,80 +730,162 @@ def intersection_box_ray(bounds, ray):
     """
     this function calculates the intersection between a ray and an axis-aligned box
     code adapted from https://www.scratchapixel.com/lessons/3d-basic-rendering/minimal-ray-tracer-rendering-simple-shapes/ray-box-intersection
-    
+
     Parameters
     ----------
     box: array with shape (2,3)
         definition of box with two points
-    ray: array with shape (2,3)
-        definiton of ray using origin and direction 3-dim vectors
+    ray: array with shape (2,3) or (2,N,3)
+        definiton of ray using origin and direction 3-dim vectors (or N origins and directions)
+
+    Returns
+    -------
+    intersects: bool or array of bools
+        True if the ray intersects the box in the forward direction
     """
-    orig = np.array(ray[0])
-    direction = np.array(ray[1])
-    invdir = 1 / direction
-    sign = np.zeros(3, dtype=np.int)
-    sign[0] = (invdir[0] < 0)
-    sign[1] = (invdir[1] < 0)
-    sign[2] = (invdir[2] < 0)
-
-    tmin = (bounds[sign[0]][0] - orig[0]) * invdir[0]
-    tmax = (bounds[1 - sign[0]][0] - orig[0]) * invdir[0]
-    tymin = (bounds[sign[1]][1] - orig[1]) * invdir[1]
-    tymax = (bounds[1 - sign[1]][1] - orig[1]) * invdir[1]
-
-    if ((tmin > tymax) or (tymin > tmax)):
-        return False
-    if (tymin > tmin):
-        tmin = tymin
-    if (tymax < tmax):
-        tmax = tymax
-
-    tzmin = (bounds[sign[2]][2] - orig[2]) * invdir[2]
-    tzmax = (bounds[1 - sign[2]][2] - orig[2]) * invdir[2]
-
-    if ((tmin > tzmax) or (tzmin > tmax)):
-        return False
-    if (tzmin > tmin):
-        tmin = tzmin
-    if (tzmax < tmax):
-        tmax = tzmax
-    t = tmin
-    if (t < 0):
-        t = tmax
-        if (t < 0):
-            return False  # I think this removes events where the box is behind the the neutrino interaction which is what we want
-    return True
+    orig = np.asarray(ray[0], dtype=float)
+    direction = np.asarray(ray[1], dtype=float)
+    bounds = np.asarray(bounds, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        invdir = 1 / direction
+        sign = invdir < 0
+        t_low = (np.where(sign, bounds[1], bounds[0]) - orig) * invdir
+        t_high = (np.where(sign, bounds[0], bounds[1]) - orig) * invdir
+    # undefined values (ray parallel to and on a plane of the box) don't constrain the intersection
+    tmin = np.max(np.where(np.isnan(t_low), -np.inf, t_low), axis=-1)
+    tmax = np.min(np.where(np.isnan(t_high), np.inf, t_high), axis=-1)
+    # the second condition removes events where the box is behind the the neutrino interaction which is what we want
+    return ((tmin <= tmax) & (tmax >= 0))[()]
 
 
 def get_intersection_volume_neutrino(attributes, vertex, direction):
+    """
+    checks if the neutrino direction intersects the fiducial volume (only for cube volumes,
+    always True for cylinder volumes)
+
+    Parameters
+    ----------
+    attributes: dictionary
+        Dictionary with the attributes, defining the fiducial volume
+    vertex: array with shape (3,) or (N,3)
+        vertex position(s)
+    direction: array with shape (3,) or (N,3)
+        propagation direction(s)
+
+    Returns
+    -------
+    intersects: bool or array of bools
+    """
     if('xmax' in attributes):  # cube volume
         bounds = np.array([[attributes['fiducial_xmin'], attributes['fiducial_ymin'], attributes['fiducial_zmin']],
                            [attributes['fiducial_xmax'], attributes['fiducial_ymax'], attributes['fiducial_zmax']]])
-        ray = np.array([vertex, direction])
-        cut = intersection_box_ray(bounds, ray)
-#         if(cut == False):
-#             print(f"rejecting event with vertex {vertex[0]:.0f}, {vertex[1]:.0f}, {vertex[2]:.0f} and direction {direction[0]:.1f}, {direction[1]:.1f}, {direction[2]:.1f}")
-        return cut
+        return intersection_box_ray(bounds, [vertex, direction])
 
     else:  # cylinder volume, not yet implemented
-        return True
+        return np.ones(np.shape(vertex)[:-1], dtype=bool)[()]
 
 
 def is_in_fiducial_volume(attributes, X):
-    r = (X[0] ** 2 + X[1] ** 2) ** 0.5
+    """
+    checks if one or several positions are within the fiducial volume
+
+    Parameters
+    ----------
+    attributes: dictionary
+        Dictionary with the attributes, defining the fiducial volume
+    X: array with shape (3,) or (N,3)
+        position(s)
+
+    Returns
+    -------
+    in_fiducial_volume: bool or array of bools
+    """
+    X = np.asarray(X)
     if('fiducial_rmin' in attributes):
-        if(r >= attributes['fiducial_rmin'] and r <= attributes['fiducial_rmax'] and X[2] >= attributes['fiducial_zmin'] and X[2] <= attributes['fiducial_zmax']):
-            return True
-        else:
-            return False
+        r = (X[..., 0] ** 2 + X[..., 1] ** 2) ** 0.5
+        return ((r >= attributes['fiducial_rmin']) & (r <= attributes['fiducial_rmax']) &
+                (X[..., 2] >= attributes['fiducial_zmin']) & (X[..., 2] <= attributes['fiducial_zmax']))[()]
     elif('fiducial_xmax' in attributes):
         low = np.array([attributes['fiducial_xmin'], attributes['fiducial_ymin'], attributes['fiducial_zmin']])
         up = np.array([attributes['fiducial_xmax'], attributes['fiducial_ymax'], attributes['fiducial_zmax']])
-        return np.all(np.logical_and(low <= X, X <= up))
+        return np.all(np.logical_and(low <= X, X <= up), axis=-1)[()]
     else:
         raise AttributeError("neither 'fiducial_rmin' nor 'fiducial_xmax' is in attributes.")
 
 
+def add_secondary_interactions(data_sets, attributes, parent_indices, distances, energies, shower_types, codes):
+    """
+    Adds the secondary interactions of the leptons (e.g. from PROPOSAL or the tabulated tau decays)
+    to the data sets and only keeps the showers in the fiducial volume.
+
+    The secondary interactions of an event are inserted directly after the primary interaction. If the
+    primary interaction is outside of the fiducial volume but one of its secondaries is inside, the
+    primary interaction is kept nevertheless to know the properties of the neutrino.
+
+    Parameters
+    ----------
+    data_sets: dictionary
+        Dictionary with the data sets of the primary interactions
+    attributes: dictionary
+        Dictionary with the attributes, defining the fiducial volume
+    parent_indices: array of ints
+        Index of the primary interaction in data_sets of each secondary interaction (in ascending order)
+    distances: array of floats
+        Distance of the secondary interactions to the primary interaction vertex
+    energies: array of floats
+        Shower energies of the secondary interactions
+    shower_types: array of strings
+        Shower types ('had' or 'em') of the secondary interactions
+    codes: array of ints
+        Particle codes of the secondary interactions (see NuRadioProposal.py)
+
+    Returns
+    -------
+    data_sets_fiducial: dictionary
+        Dictionary with the data sets of all showers in the fiducial volume
+    """
+    n_events = len(data_sets["xx"])
+    xx, yy, zz = data_sets["xx"][parent_indices], data_sets["yy"][parent_indices], data_sets["zz"][parent_indices]
+    zeniths, azimuths = data_sets["zeniths"][parent_indices], data_sets["azimuths"][parent_indices]
+    xx = xx - distances * np.sin(zeniths) * np.cos(azimuths)
+    yy = yy - distances * np.sin(zeniths) * np.sin(azimuths)
+    zz = zz - distances * np.cos(zeniths)
+
+    mask_primaries = np.atleast_1d(is_in_fiducial_volume(attributes, np.array([data_sets["xx"], data_sets["yy"], data_sets["zz"]]).T))
+    mask_secondaries = np.atleast_1d(is_in_fiducial_volume(attributes, np.array([xx, yy, zz]).T))
+    parent_indices = parent_indices[mask_secondaries]
+
+    # the layout of every event is: [primary interaction], secondary interaction 1, secondary interaction 2, ...
+    n_secondaries = np.bincount(parent_indices, minlength=n_events)
+    keep_primaries = mask_primaries | (n_secondaries > 0)
+    n_rows = keep_primaries.astype(int) + n_secondaries
+    first_rows = np.cumsum(n_rows) - n_rows
+    # position of each secondary interaction within the secondaries of its event
+    secondary_ranks = np.arange(len(parent_indices)) - np.searchsorted(parent_indices, parent_indices)
+    secondary_rows = first_rows[parent_indices] + keep_primaries[parent_indices] + secondary_ranks
+
+    data_sets_fiducial = {key: np.asarray(value)[np.repeat(np.arange(n_events), n_rows)] for key, value in iteritems(data_sets)}
+    shower_types = np.asarray(shower_types)[mask_secondaries]
+    for key in ['interaction_type', 'shower_type']:
+        # the strings of the secondaries ('had', 'em') can be longer than the ones of the primaries
+        data_sets_fiducial[key] = data_sets_fiducial[key].astype(np.promote_types(data_sets_fiducial[key].dtype, shower_types.dtype))
+    data_sets_fiducial['n_interaction'][secondary_rows] = 2 + secondary_ranks  # specify that new event is a secondary interaction
+    data_sets_fiducial['shower_energies'][secondary_rows] = energies[mask_secondaries]
+    data_sets_fiducial['inelasticity'][secondary_rows] = np.nan
+    # interaction_type is either 'had' or 'em' for secondary interactions
+    data_sets_fiducial['interaction_type'][secondary_rows] = shower_types
+    data_sets_fiducial['shower_type'][secondary_rows] = shower_types
+    data_sets_fiducial['xx'][secondary_rows] = xx[mask_secondaries]
+    data_sets_fiducial['yy'][secondary_rows] = yy[mask_secondaries]
+    data_sets_fiducial['zz'][secondary_rows] = zz[mask_secondaries]
+    # Calculating vertex interaction time with respect to the primary neutrino
+    data_sets_fiducial['vertex_times'][secondary_rows] = distances[mask_secondaries] / cspeed
+    # Flavors are particle codes taken from NuRadioProposal.py
+    data_sets_fiducial['flavors'][secondary_rows] = codes[mask_secondaries]
+
+    return data_sets_fiducial
+
+
 def mask_arrival_azimuth(data_sets, fiducial_rmax):
 
     # Now we filter the events as a function of their arrival direction to
@@ -662,10 +909,7 @@ def mask_arrival_azimuth(data_sets, fiducial_rmax):
                                            # we take phi = 0 as the vertex position
     phis[phis < 0] += 2 * np.pi
 
-    mask_phi = [ (phi > phi_low and phi < 2 * np.pi) or (phi < phi_high and phi > 0) or rho < fiducial_rmax
-                 for phi, phi_low, phi_high, rho in zip(phis, phis_low, phis_high, rhos) ]
-
-    mask_phi = np.array(mask_phi)
+    mask_phi = ((phis > phis_low) & (phis < 2 * np.pi)) | ((phis < phis_high) & (phis > 0)) | (rhos < fiducial_rmax)
 
     return mask_phi
 
@@ -683,7 +927,9 @@ def generate_surface_muons(filename, n_events, Emin, Emax,
                            proposal_kwargs={},
                            log_level=None,
                            max_n_events_batch=1e5,
-                           seed=None):
+                           seed=None,
+                           proposal_tables_path=None,
+                           schema_version=hdf5_schema.SCHEMA_VERSION_DEFAULT):
     """
     Event generator for surface muons
 
@@ -803,6 +1049,11 @@ def generate_surface_muons(filename, n_events, Emin, Emax,
         the maximum numbe of events that get generated per batch. Relevant if a fiducial volume cut is applied)
     seed: None of int
         seed of the random state
+    proposal_tables_path: string, path or None
+        directory of a shared cache for the PROPOSAL interpolation tables. The tables are generated only once per
+        configuration, even if many jobs run at the same time. See `NuRadioProposal.ProposalFunctions` for details.
+    schema_version: int (default 1)
+        the on-disk format of the output files (see `NuRadioMC.utilities.hdf5_schema`), 2 selects the compact format
     """
     rnd = Generator(Philox(seed))
     if(log_level is not None):
@@ -810,7 +1061,7 @@ def generate_surface_muons(filename, n_events, Emin, Emax,
     t_start = time.time()
     max_n_events_batch = int(max_n_events_batch)
     from NuRadioMC.EvtGen.NuRadioProposal import ProposalFunctions
-    proposal_functions = ProposalFunctions(config_file=config_file)
+    proposal_functions = ProposalFunctions(config_file=config_file, tables_path=proposal_tables_path)
 
     attributes = {}
     n_events = int(n_events)
@@ -864,7 +1115,7 @@ def generate_surface_muons(filename, n_events, Emin, Emax,
 
         # generate neutrino flavors randomly
 
-        data_sets["flavors"] = np.array([flavor[i] for i in rnd.integers(0, high=len(flavor), size=n_events_batch)])
+        data_sets["flavors"] = np.array(flavor)[rnd.integers(0, high=len(flavor), size=n_events_batch)]
 
         data_sets["energies"] = get_energies(n_events_batch, Emin, Emax, spectrum, rnd)
 
@@ -890,64 +1141,56 @@ def generate_surface_muons(filename, n_events, Emin, Emax,
 
         E_all_leptons = data_sets["energies"]
         lepton_codes = data_sets["flavors"]
-        lepton_positions = [ (x, y, z) for x, y, z in zip(data_sets["xx"], data_sets["yy"], data_sets["zz"]) ]
-        lepton_directions = [ (-np.sin(theta) * np.cos(phi), -np.sin(theta) * np.sin(phi), -np.cos(theta))
-                            for theta, phi in zip(data_sets["zeniths"], data_sets["azimuths"])]
+        lepton_positions = np.array([data_sets["xx"], data_sets["yy"], data_sets["zz"]]).T
+        lepton_directions = np.array([-np.sin(data_sets["zeniths"]) * np.cos(data_sets["azimuths"]),
+                                      -np.sin(data_sets["zeniths"]) * np.sin(data_sets["azimuths"]),
+                                      -np.cos(data_sets["zeniths"])]).T
 
         if('fiducial_rmax' in attributes):
             mask_phi = mask_arrival_azimuth(data_sets, attributes['fiducial_rmax'])  # this currently only works for cylindrical volumes
         else:
             mask_phi = np.ones(len(data_sets["event_group_ids"]), dtype=np.bool)
-        # TODO: combine with `get_intersection_volume_neutrino` function
-        for iE, event_id in enumerate(data_sets["event_group_ids"]):
-            if not mask_phi[iE]:
-                continue
-
-            # calculate if the lepton/neutrino direction intersects the fiducial simulation volume
-            geometry_selection = get_intersection_volume_neutrino(attributes,
-                                                                  [data_sets['xx'][iE], data_sets['yy'][iE], data_sets['zz'][iE]],
-                                                                  lepton_directions[iE])
-    #         geometry_selection = True
-            if geometry_selection:
-
-                products_array = proposal_functions.get_secondaries_array(np.array([E_all_leptons[iE]]),
-                                                                           np.array([lepton_codes[iE]]),
-                                                                           np.array([lepton_positions[iE]]),
-                                                                           np.array([lepton_directions[iE]]),
-                                                                           **proposal_kwargs)
-                products = products_array[0]
-
-                n_interaction = 1
-
-                for product in products:
-                    x, y, z, vertex_time = get_product_position_time(data_sets, product, iE)
-                    if(is_in_fiducial_volume(attributes, np.array([x, y, z]))):
-                        # the energy loss or particle is in our fiducial volume
-                        # save parent muon if one of its induced showers interacts in the fiducial volume
-                        if(n_interaction == 1):
-                            for key in iterkeys(data_sets):
-                                data_sets_fiducial[key].append(data_sets[key][iE])
-                            n_interaction = 2
-
+        # calculate if the lepton/neutrino direction intersects the fiducial simulation volume
+        geometry_selection = mask_phi & np.atleast_1d(get_intersection_volume_neutrino(attributes, lepton_positions, lepton_directions))
+        for iE in np.nonzero(geometry_selection)[0]:
+            products_array = proposal_functions.get_secondaries_array(np.array([E_all_leptons[iE]]),
+                                                                       np.array([lepton_codes[iE]]),
+                                                                       np.array([lepton_positions[iE]]),
+                                                                       np.array([lepton_directions[iE]]),
+                                                                       **proposal_kwargs)
+            products = products_array[0]
+
+            n_interaction = 1
+
+            for product in products:
+                x, y, z, vertex_time = get_product_position_time(data_sets, product, iE)
+                if(is_in_fiducial_volume(attributes, np.array([x, y, z]))):
+                    # the energy loss or particle is in our fiducial volume
+                    # save parent muon if one of its induced showers interacts in the fiducial volume
+                    if(n_interaction == 1):
                         for key in iterkeys(data_sets):
                             data_sets_fiducial[key].append(data_sets[key][iE])
+                        n_interaction = 2
+
+                    for key in iterkeys(data_sets):
+                        data_sets_fiducial[key].append(data_sets[key][iE])
 
-                        data_sets_fiducial['n_interaction'][-1] = n_interaction  # specify that new event is a secondary interaction
-                        n_interaction += 1
-                        data_sets_fiducial['shower_energies'][-1] = product.energy
-                        data_sets_fiducial['inelasticity'][-1] = 1
-                        # interaction_type is either 'had' or 'em' for proposal products
-                        data_sets_fiducial['interaction_type'][-1] = product.shower_type
-                        data_sets_fiducial['shower_type'][-1] = product.shower_type
-                        data_sets_fiducial['xx'][-1] = x
-                        data_sets_fiducial['yy'][-1] = y
-                        data_sets_fiducial['zz'][-1] = z
-
-                        # Calculating vertex interaction time with respect to the primary neutrino
-                        data_sets_fiducial['vertex_times'][-1] = vertex_time
-
-                        # Flavors are particle codes taken from NuRadioProposal.py
-                        data_sets_fiducial['flavors'][-1] = product.code
+                    data_sets_fiducial['n_interaction'][-1] = n_interaction  # specify that new event is a secondary interaction
+                    n_interaction += 1
+                    data_sets_fiducial['shower_energies'][-1] = product.energy
+                    data_sets_fiducial['inelasticity'][-1] = 1
+                    # interaction_type is either 'had' or 'em' for proposal products
+                    data_sets_fiducial['interaction_type'][-1] = product.shower_type
+                    data_sets_fiducial['shower_type'][-1] = product.shower_type
+                    data_sets_fiducial['xx'][-1] = x
+                    data_sets_fiducial['yy'][-1] = y
+                    data_sets_fiducial['zz'][-1] = z
+
+                    # Calculating vertex interaction time with respect to the primary neutrino
+                    data_sets_fiducial['vertex_times'][-1] = vertex_time
+
+                    # Flavors are particle codes taken from NuRadioProposal.py
+                    data_sets_fiducial['flavors'][-1] = product.code
         proposal_time += time.time() - init_time
 
     time_per_evt = proposal_time / len(data_sets_fiducial['flavors'])
@@ -971,7 +1214,8 @@ def generate_surface_muons(filename, n_events, Emin, Emax,
         data_sets_fiducial['shower_energies'] = np.array([0])
 
     data_sets_fiducial["shower_ids"] = np.arange(0, len(data_sets_fiducial['shower_energies']), dtype=np.int)
-    write_events_to_hdf5(filename, data_sets_fiducial, attributes, n_events_per_file=n_events_per_file, start_file_id=start_file_id)
+    write_events_to_hdf5(filename, data_sets_fiducial, attributes, n_events_per_file=n_events_per_file, start_file_id=start_file_id,
+                         schema_version=schema_version)
     logger.status(f"finished in {pretty_time_delta(time.time() - t_start)}")
     return None
 
@@ -992,7 +1236,11 @@ def generate_eventlist_cylinder(filename, n_events, Emin, Emax,
                                 proposal_kwargs={},
                                 max_n_events_batch=1e5,
                                 write_events=True,
-                                seed=None):
+                                seed=None,
+                                proposal_n_cores=1,
+                                proposal_tables_path=None,
+                                tabulated_tau_decays=False,
+                                schema_version=hdf5_schema.SCHEMA_VERSION_DEFAULT):
     """
     Event generator
 
@@ -1123,14 +1371,31 @@ def generate_eventlist_cylinder(filename, n_events, Emin, Emax,
         if False the event datasets + atrributes are returned
     seed: None of int
         seed of the random state
+    proposal_n_cores: int or None (default 1)
+        number of processes that propagate the leptons with PROPOSAL in parallel. None means all available cores.
+        The secondaries don't depend on the number of processes because every lepton gets its own seed.
+    proposal_tables_path: string, path or None
+        directory of a shared cache for the PROPOSAL interpolation tables. The tables are generated only once per
+        configuration, even if many jobs run at the same time. See `NuRadioProposal.ProposalFunctions` for details.
+    tabulated_tau_decays: bool
+        if True, the decay of the taus of tau CC interactions is sampled from the tabulated decay library
+        (see `get_tau_decays`) instead of propagating them with PROPOSAL. The decay channel and the energy of
+        the shower-inducing decay products are sampled with `get_tau_decay_products`, the muonic decays don't
+        create a shower. Much faster than PROPOSAL, but only the decay shower is simulated (no energy losses
+        along the track, no secondaries of muons).
+        Can't be used together with `proposal`.
+    schema_version: int (default 1)
+        the on-disk format of the output files (see `NuRadioMC.utilities.hdf5_schema`), 2 selects the compact format
     """
     rnd = Generator(Philox(seed))
     t_start = time.time()
     if(log_level is not None):
         logger.setLevel(log_level)
+    if(proposal and tabulated_tau_decays):
+        logger.error("`proposal` and `tabulated_tau_decays` can't be used at the same time.")
+        raise ValueError("`proposal` and `tabulated_tau_decays` can't be used at the same time.")
     if proposal:
-        from NuRadioMC.EvtGen.NuRadioProposal import ProposalFunctions
-        proposal_functions = ProposalFunctions(config_file=proposal_config)
+        from NuRadioMC.EvtGen.NuRadioProposal import get_secondaries_array_parallel
     max_n_events_batch = int(max_n_events_batch)
     attributes = {}
     n_events = int(n_events)
@@ -1151,11 +1416,12 @@ def generate_eventlist_cylinder(filename, n_events, Emin, Emax,
     attributes['deposited'] = deposited
 
     data_sets = {}
-    data_sets_fiducial = {}
+    data_sets_batches = []
 
     time_proposal = 0
 
-    set_volume_attributes(volume, proposal=proposal, attributes=attributes)
+    # the volume is enlarged in the same way for both ways of simulating the tau decays
+    set_volume_attributes(volume, proposal=proposal or tabulated_tau_decays, attributes=attributes)
     n_events = attributes['n_events']  # important! the number of events might have been increased by the generate vertex function
     n_batches = int(np.ceil(n_events / max_n_events_batch))
     for i_batch in range(n_batches):  # do generation of events in batches
@@ -1178,7 +1444,7 @@ def generate_eventlist_cylinder(filename, n_events, Emin, Emax,
 
         # generate neutrino flavors randomly
         logger.debug("generating flavors")
-        data_sets["flavors"] = np.array([flavor[i] for i in rnd.integers(0, high=len(flavor), size=n_events_batch)])
+        data_sets["flavors"] = np.array(flavor)[rnd.integers(0, high=len(flavor), size=n_events_batch)]
 
         # generate energies randomly
         data_sets["energies"] = get_energies(n_events_batch, Emin, Emax, spectrum, rnd)
@@ -1191,49 +1457,40 @@ def generate_eventlist_cylinder(filename, n_events, Emin, Emax,
         data_sets["inelasticity"] = inelasticities.get_neutrino_inelasticity(n_events_batch, rnd=rnd)
 
         if deposited:
-            data_sets["energies"] = [primary_energy_from_deposited(Edep, ccnc, flavor, inelasticity) \
-                                    for Edep, ccnc, flavor, inelasticity in \
-                                    zip(data_sets["energies"], data_sets["interaction_type"], \
-                                    data_sets["flavors"], data_sets["inelasticity"])]
-            data_sets["energies"] = np.array(data_sets["energies"])
+            data_sets["energies"] = primary_energy_from_deposited(data_sets["energies"], data_sets["interaction_type"],
+                                                                  data_sets["flavors"], data_sets["inelasticity"])
 
         # all interactions will produce a hadronic shower, add this information to the input file
         data_sets['shower_energies'] = data_sets['energies'] * data_sets['inelasticity']
-        data_sets['shower_type'] = ['had'] * n_events_batch
+        data_sets['shower_type'] = np.full(n_events_batch, 'had')
 
         logger.debug("adding EM showers")
         # now add EM showers if appropriate
         em_shower_mask = (data_sets["interaction_type"] == "cc") & (np.abs(data_sets['flavors']) == 12)
 
-        for key in data_sets:  # transform datatype to list so that inserting elements is faster
-            data_sets[key] = list(data_sets[key])
-        n_inserted = 0
-        for i in np.arange(n_events_batch, dtype=np.int)[em_shower_mask]:  # loop over all events where an EM shower needs to be inserted
-            for key in data_sets:
-                data_sets[key].insert(i + 1 + n_inserted, data_sets[key][i + n_inserted])  # copy event
-            data_sets['shower_energies'][i + 1 + n_inserted] = (1 - data_sets['inelasticity'][i + 1 + n_inserted]) * data_sets['energies'][i + 1 + n_inserted]
-            data_sets['shower_type'][i + 1 + n_inserted] = 'em'
-            n_inserted += 1
-
-        logger.debug("converting to numpy arrays")
-        # make all arrays numpy arrays
+        # every event with an EM shower appears twice in a row, the second copy is the EM shower
+        n_showers_per_event = 1 + em_shower_mask.astype(int)
+        shower_indices = np.repeat(np.arange(n_events_batch), n_showers_per_event)
+        em_shower_indices = (np.cumsum(n_showers_per_event) - 1)[em_shower_mask]
         for key in data_sets:
-            data_sets[key] = np.array(data_sets[key])
+            data_sets[key] = np.asarray(data_sets[key])[shower_indices]
+        data_sets['shower_energies'][em_shower_indices] = (1 - data_sets['inelasticity'][em_shower_indices]) * data_sets['energies'][em_shower_indices]
+        data_sets['shower_type'][em_shower_indices] = 'em'
 
-        if proposal:
-            logger.debug("starting proposal simulation")
+        if proposal or tabulated_tau_decays:
+            logger.debug("starting simulation of secondary interactions")
             init_time = time.time()
-            # Initialising data_sets_fiducial with empty values
-            for key, value in iteritems(data_sets):
-                if(key not in data_sets_fiducial):
-                    data_sets_fiducial[key] = []
 
             # we need to be careful to not double cound events. electron CC interactions apear twice in the event list
             # because of the two distinct showers that get created. Because second interactions are only calculated
             # for mu and tau cc interactions, this is not a problem.
             mask_tau_cc = (data_sets["interaction_type"] == 'cc') & (np.abs(data_sets["flavors"]) == 16)
             mask_mu_cc = (data_sets["interaction_type"] == 'cc') & (np.abs(data_sets["flavors"]) == 14)
-            mask_leptons = mask_tau_cc | mask_mu_cc
+            if proposal:
+                mask_leptons = mask_tau_cc | mask_mu_cc
+            else:
+                # the tabulated decays only describe the tau decay, muons don't produce secondary showers
+                mask_leptons = mask_tau_cc
 
             E_all_leptons = (1 - data_sets["inelasticity"]) * data_sets["energies"]
             lepton_codes = copy.copy(data_sets["flavors"])
@@ -1241,92 +1498,66 @@ def generate_eventlist_cylinder(filename, n_events, Emin, Emax,
             lepton_codes[lepton_codes == -14] = -13
             lepton_codes[lepton_codes == 16] = 15
             lepton_codes[lepton_codes == -16] = -15
+            if proposal:
+                # every lepton is propagated with its own seed, so that the secondaries don't depend on the parallelization
+                lepton_seeds = rnd.integers(0, 2 ** 31 - 1, size=len(lepton_codes))
 
             if("fiducial_rmax" in attributes):
                 mask_phi = mask_arrival_azimuth(data_sets, attributes['fiducial_rmax'])
                 mask_leptons = mask_leptons & mask_phi
-                # TODO: combine with `get_intersection_volume_neutrino` function
-
-            lepton_positions = [ (x, y, z) for x, y, z in zip(data_sets["xx"], data_sets["yy"], data_sets["zz"]) ]
-            lepton_positions = np.array(lepton_positions)
-            lepton_directions = [ (-np.sin(theta) * np.cos(phi), -np.sin(theta) * np.sin(phi), -np.cos(theta))
-                                for theta, phi in zip(data_sets["zeniths"], data_sets["azimuths"])]
-            lepton_directions = np.array(lepton_directions)
-
-            for iE, event_id in enumerate(data_sets["event_group_ids"]):
-                first_inserted = False
-
-                x_nu = data_sets['xx'][iE]
-                y_nu = data_sets['yy'][iE]
-                z_nu = data_sets['zz'][iE]
-                # Appending event if it interacts within the fiducial volume
-                if(is_in_fiducial_volume(attributes, np.array([x_nu, y_nu, z_nu]))):
-                    for key in iterkeys(data_sets):
-                        data_sets_fiducial[key].append(data_sets[key][iE])
 
-                    first_inserted = True
-
-                if mask_leptons[iE]:
-                    geometry_selection = get_intersection_volume_neutrino(attributes,
-                                                          [data_sets['xx'][iE], data_sets['yy'][iE], data_sets['zz'][iE]],
-                                                          lepton_directions[iE])
-                    if geometry_selection:
-                        products_array = proposal_functions.get_secondaries_array(np.array([E_all_leptons[iE]]),
-                                                                                   np.array([lepton_codes[iE]]),
-                                                                                   np.array([lepton_positions[iE]]),
-                                                                                   np.array([lepton_directions[iE]]),
-                                                                                   **proposal_kwargs)
-                        products = products_array[0]
-                        n_interaction = 2
-                        for product in products:
-
-                            x, y, z, vertex_time = get_product_position_time(data_sets, product, iE)
-                            if(is_in_fiducial_volume(attributes, np.array([x, y, z]))):
-
-                                # the energy loss or particle is in our fiducial volume
-
-                                # If the energy loss or particle is in the fiducial volume but the parent
-                                # neutrino does not interact there, we add it to know its properties.
-                                if not first_inserted:
-                                    copies = 2
-                                    first_inserted = True
-                                else:
-                                    copies = 1
-
-                                for icopy in range(copies):
-                                    for key in iterkeys(data_sets):
-                                        data_sets_fiducial[key].append(data_sets[key][iE])
-
-                                data_sets_fiducial['n_interaction'][-1] = n_interaction  # specify that new event is a secondary interaction
-                                n_interaction += 1
-                                data_sets_fiducial['shower_energies'][-1] = product.energy
-                                data_sets_fiducial['inelasticity'][-1] = np.nan
-                                # interaction_type is either 'had' or 'em' for proposal products
-                                data_sets_fiducial['interaction_type'][-1] = product.shower_type
-                                data_sets_fiducial['shower_type'][-1] = product.shower_type
-
-                                data_sets_fiducial['xx'][-1] = x
-                                data_sets_fiducial['yy'][-1] = y
-                                data_sets_fiducial['zz'][-1] = z
-
-                                # Calculating vertex interaction time with respect to the primary neutrino
-                                data_sets_fiducial['vertex_times'][-1] = vertex_time
-
-                                # Flavors are particle codes taken from NuRadioProposal.py
-                                data_sets_fiducial['flavors'][-1] = product.code
-            time_proposal = time.time() - init_time
-        else:
-            if(n_batches == 1):
-                data_sets_fiducial = data_sets
+            lepton_positions = np.array([data_sets["xx"], data_sets["yy"], data_sets["zz"]]).T
+            lepton_directions = np.array([-np.sin(data_sets["zeniths"]) * np.cos(data_sets["azimuths"]),
+                                          -np.sin(data_sets["zeniths"]) * np.sin(data_sets["azimuths"]),
+                                          -np.cos(data_sets["zeniths"])]).T
+
+            # geometric preselection of all leptons before any of them is propagated
+            mask_leptons &= np.atleast_1d(get_intersection_volume_neutrino(attributes, lepton_positions, lepton_directions))
+            i_leptons = np.nonzero(mask_leptons)[0]
+
+            if proposal:
+                # propagate all selected leptons of this batch at once
+                products_array = get_secondaries_array_parallel(E_all_leptons[i_leptons],
+                                                                lepton_codes[i_leptons],
+                                                                lepton_positions[i_leptons],
+                                                                lepton_directions[i_leptons],
+                                                                lepton_seeds[i_leptons],
+                                                                config_file=proposal_config,
+                                                                n_cores=proposal_n_cores,
+                                                                tables_path=proposal_tables_path,
+                                                                **proposal_kwargs)
+                products = [product for products in products_array for product in products]
+                data_sets_batch = add_secondary_interactions(data_sets, attributes,
+                                                             np.repeat(i_leptons, [len(products) for products in products_array]),
+                                                             np.array([product.distance for product in products]),
+                                                             np.array([product.energy for product in products]),
+                                                             np.array([product.shower_type for product in products], dtype=str),
+                                                             np.array([product.code for product in products], dtype=int))
             else:
-                for key in data_sets:
-                    if(key not in data_sets_fiducial):
-                        data_sets_fiducial[key] = []
-                    data_sets_fiducial[key].extend(data_sets[key])
+                decay_lengths, decay_times, decay_energies = get_tau_decays(E_all_leptons[i_leptons], rnd=rnd)
+                energy_fractions, shower_types, codes = get_tau_decay_products(lepton_codes[i_leptons], rnd=rnd)
+                # only the shower-inducing decay products create a shower, the neutrinos and the muon of
+                # the muonic decays (which is not propagated) carry the rest of the tau energy
+                mask_showers = shower_types != ''
+                data_sets_batch = add_secondary_interactions(data_sets, attributes, i_leptons[mask_showers],
+                                                             decay_lengths[mask_showers],
+                                                             (decay_energies * energy_fractions)[mask_showers],
+                                                             shower_types[mask_showers],
+                                                             codes[mask_showers])
+            data_sets_batches.append(data_sets_batch)
+            time_proposal += time.time() - init_time
+        else:
+            data_sets_batches.append({key: np.asarray(value) for key, value in iteritems(data_sets)})
+
+    if(len(data_sets_batches) == 1):
+        data_sets_fiducial = data_sets_batches[0]
+    else:
+        data_sets_fiducial = {key: np.concatenate([data_sets_batch[key] for data_sets_batch in data_sets_batches])
+                              for key in data_sets_batches[0]}
 
     time_per_evt = time_proposal / (n_events + 1)
-    logger.info(f"Time per event (PROPOSAL only): {time_per_evt*1e3:.4f} ms")
-    logger.info(f"Total time (PROPOSAL only) {pretty_time_delta(time_proposal)}")
+    logger.info(f"Time per event (secondary interactions only): {time_per_evt*1e3:.4f} ms")
+    logger.info(f"Total time (secondary interactions only) {pretty_time_delta(time_proposal)}")
 
     logger.info(f"number of fiducial showers {len(data_sets_fiducial['xx'])}")
 
@@ -1340,7 +1571,8 @@ def generate_eventlist_cylinder(filename, n_events, Emin, Emax,
     data_sets_fiducial['event_group_ids'] = uegids_inverse + start_event_id
 
     if(write_events):
-        write_events_to_hdf5(filename, data_sets_fiducial, attributes, n_events_per_file=n_events_per_file, start_file_id=start_file_id)
+        write_events_to_hdf5(filename, data_sets_fiducial, attributes, n_events_per_file=n_events_per_file, start_file_id=start_file_id,
+                             schema_version=schema_version)
         logger.status(f"finished in {pretty_time_delta(time.time() - t_start)}")
     else:
         for key, value in data_sets_fiducial.items():
@@ -0,0 +1,37 @@
+import numpy as np
+from numpy.random import Generator, Philox
+from NuRadioReco.utilities import units
+from NuRadioMC.EvtGen import generator
+
+"""
+checks the tau decay channels and the energy fractions of the shower-inducing decay products
+against the published numbers of unpolarized tau decays
+"""
+
+n = 1000000
+tau_codes = np.where(np.arange(n) % 2 == 0, 15, -15)
+energy_fractions, shower_types, codes = generator.get_tau_decay_products(tau_codes, rnd=Generator(Philox(2021)))
+
+# branching ratios (PDG): tau -> e nu nu 17.82%, tau -> mu nu nu 17.39%, hadrons 64.79%
+mask_e = np.abs(codes) == 11
+mask_mu = np.abs(codes) == 13
+mask_had = shower_types == 'had'
+for mask, branching_ratio in [(mask_e, 0.1782), (mask_mu, 0.1739), (mask_had, 0.6479)]:
+    np.testing.assert_allclose(np.mean(mask), branching_ratio, atol=5 * np.sqrt(branching_ratio / n))
+np.testing.assert_equal(shower_types[mask_e], 'em')
+np.testing.assert_equal(shower_types[mask_mu], '')
+# the decay products of tau+ are the antiparticles
+np.testing.assert_equal(np.sign(codes[mask_e | mask_mu]), np.sign(tau_codes[mask_e | mask_mu]))
+
+# mean energy fraction of the electron of the leptonic decay: <y> = int y (5 - 9 y^2 + 4 y^3) / 3 dy = 0.35
+np.testing.assert_allclose(np.mean(energy_fractions[mask_e]), 0.35, atol=0.002)
+# single pion: <y> = (1 + m_pi^2 / m_tau^2) / 2
+mask_pi = np.abs(codes) == 211
+np.testing.assert_allclose(np.mean(energy_fractions[mask_pi]), 0.5 * (1 + (139.57 * units.MeV / generator.tau_mass) ** 2), atol=0.003)
+# all hadronic decays, about 0.65 of the tau energy is visible
+np.testing.assert_allclose(np.mean(energy_fractions[mask_had]), 0.648, atol=0.003)
+# all decays, about half of the tau energy goes into the decay shower
+np.testing.assert_allclose(np.mean(np.where(mask_mu, 0, energy_fractions)), 0.482, atol=0.003)
+assert(np.all((energy_fractions >= 0) & (energy_fractions <= 1)))
+
+print('T10test_tau_decay_products passed without issues')
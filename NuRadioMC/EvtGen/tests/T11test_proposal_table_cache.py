@@ -0,0 +1,60 @@
+import os
+import copy
+import json
+import tempfile
+from numpy import testing
+from NuRadioMC.EvtGen import NuRadioProposal
+
+"""
+checks that the configuration hash of the shared PROPOSAL table cache only depends on the
+parameters that determine the interpolation tables
+"""
+
+config_file = os.path.join(os.path.dirname(NuRadioProposal.__file__), 'config_PROPOSAL_infice.json.sample')
+with open(config_file, 'r') as f:
+    config = json.load(f)
+config_hash = NuRadioProposal.get_config_hash(config)
+
+# the hash is stable for identical configurations, independent of the order of the keys
+testing.assert_equal(NuRadioProposal.get_config_hash(copy.deepcopy(config)), config_hash)
+testing.assert_equal(NuRadioProposal.get_config_hash(json.loads(json.dumps(config, sort_keys=True))), config_hash)
+testing.assert_equal(NuRadioProposal.get_config_hash(dict(reversed(list(config.items())))), config_hash)
+
+# the table paths are not part of the hash, and the config is not modified
+config_paths = copy.deepcopy(config)
+config_paths['global']['interpolation']['path_to_tables'] = '/some/other/path'
+config_paths['global']['interpolation']['path_to_tables_readonly'] = '/some/other/path'
+testing.assert_equal(NuRadioProposal.get_config_hash(config_paths), config_hash)
+testing.assert_equal(config_paths['global']['interpolation']['path_to_tables'], '/some/other/path')
+
+# parameters of the tables change the hash
+config_nodes = copy.deepcopy(config)
+config_nodes['global']['interpolation']['nodes_propagate'] += 1
+config_cuts = copy.deepcopy(config)
+config_cuts['global']['cuts_inside']['e_cut'] *= 2
+for config_changed in [config_nodes, config_cuts]:
+    assert(NuRadioProposal.get_config_hash(config_changed) != config_hash)
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    tables_path = os.path.join(tmp_dir, 'tables')
+    config_files = []
+    for iC, config_iC in enumerate([config, config_paths, config_nodes]):
+        config_files.append(os.path.join(tmp_dir, f'config_{iC}.json'))
+        with open(config_files[-1], 'w') as f:
+            json.dump(config_iC, f)
+    cache_config_files = [NuRadioProposal.get_table_cache_config(filename, tables_path) for filename in config_files]
+
+    # configurations that only differ in the table paths share the cache
+    testing.assert_equal(cache_config_files[0], os.path.join(os.path.abspath(tables_path), config_hash, 'config_PROPOSAL.json'))
+    testing.assert_equal(cache_config_files[1], cache_config_files[0])
+    assert(cache_config_files[2] != cache_config_files[0])
+    # the table paths of the cached config point to the cache directory
+    with open(cache_config_files[0], 'r') as f:
+        cache_config = json.load(f)
+    for key in ['path_to_tables', 'path_to_tables_readonly']:
+        testing.assert_equal(cache_config['global']['interpolation'][key], os.path.dirname(cache_config_files[0]))
+    testing.assert_equal(NuRadioProposal.get_config_hash(cache_config), config_hash)
+    # a second call returns the existing cache
+    testing.assert_equal(NuRadioProposal.get_table_cache_config(config_files[0], tables_path), cache_config_files[0])
+
+print('T11test_proposal_table_cache passed without issues')
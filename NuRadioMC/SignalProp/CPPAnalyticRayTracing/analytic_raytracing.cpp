@@ -833,7 +833,7 @@ void get_path(double n_ice, double delta_n, double z_0, double x1[2], double x2[
 	//zs are z coordinates
 
 
-	double c = pow(n_ice,2.) - pow(C0,-.2);
+	double c = pow(n_ice,2.) - pow(C0,-2.);
 	double C1 = x1[0] - get_y_with_z_mirror(n_ice, delta_n, z_0, x1[1],C0);
 	double gamma_turn, z_turn;
 	get_turning_point(c, gamma_turn, z_turn, n_ice, delta_n, z_0);
@@ -872,6 +872,58 @@ void get_path(double n_ice, double delta_n, double z_0, double x1[2], double x2[
 	}
 }
 
+void get_paths2(double *y1s, double *z1s, double *y2s, double *z2s, double *C0s, int n_paths, int n_points,
+		double n_ice, double delta_n, double z_0, double *yy, double *zz){
+
+	//calculates the ray tracing paths for many start/stop positions in one call
+	//the same as get_path but the results are written into the preallocated
+	//arrays yy and zz of size n_paths * n_points (row major, one path per row)
+	//so that they can be used directly as the memory of numpy arrays
+
+	//parameters
+	//y1s, z1s: start positions
+	//y2s, z2s: stop positions
+	//C0s: first parameter of each path
+	//n_paths: number of paths
+	//n_points: number of points per path
+
+	for(int j=0; j<n_paths; j++){
+		double C0 = C0s[j];
+		double x1[2] = {y1s[j], z1s[j]};
+		double x2[2] = {y2s[j], z2s[j]};
+		double c = pow(n_ice,2.) - pow(C0,-2.);
+		double C1 = x1[0] - get_y_with_z_mirror(n_ice, delta_n, z_0, x1[1],C0);
+		double gamma_turn, z_turn;
+		get_turning_point(c, gamma_turn, z_turn, n_ice, delta_n, z_0);
+		if(z_turn >=0.){
+			//signal reflects at surface
+			z_turn=0.;
+			gamma_turn = get_gamma(0, n_ice, delta_n, z_0);
+		}
+		double y_turn = get_y(gamma_turn, C0, C1, n_ice, delta_n, z_0);
+		double zstart = x1[1];
+		double result[2];
+		get_z_mirrored(x1,x2,C0,result, n_ice, delta_n, z_0);
+		double zstop = result[1];
+		double step_size = 0.;
+		if(n_points > 1){
+			step_size = (zstop-zstart)/double(n_points-1); //do n-1 so that the bounds are actually the bounds
+		}
+		for(int i=0; i<n_points; i++){
+			double z = zstart+i*step_size;
+			int index = j * n_points + i;
+			if(z<z_turn){
+				yy[index] = get_y(get_gamma(z, n_ice, delta_n, z_0),C0,C1, n_ice, delta_n, z_0);
+				zz[index] = z;
+			}
+			else{
+				yy[index] = 2*y_turn - get_y(get_gamma(2 * z_turn - z, n_ice, delta_n, z_0),C0,C1, n_ice, delta_n, z_0);
+				zz[index] = 2*z_turn - z;
+			}
+		}
+	}
+}
+
 int main(int argc, char **argv){
 
 	// first, set a source and transmitter location
@@ -13,6 +13,7 @@ cdef extern from "numpy/arrayobject.h":
 cdef extern from "analytic_raytracing.cpp":
     void find_solutions2(double * &, double * &, int * &, int & , double, double, double, double, double, double, double, int, int, double)
     double get_attenuation_along_path2(double, double, double, double, double, double, double, double, double, int)
+    void get_paths2(double *, double *, double *, double *, double *, int, int, double, double, double, double *, double *)
     
 
 cpdef find_solutions(x1, x2, n_ice, delta_n, z_0, reflection, reflection_case, ice_reflection):
@@ -59,3 +60,24 @@ cpdef get_attenuation_along_path(x1, x2, C0, frequency, n_ice, delta_n, z_0, mod
 #     t = time.time()
     return get_attenuation_along_path2(x1[0], x1[1], x2[0], x2[1], C0, frequency, n_ice, delta_n, z_0, model)
 #     print((time.time() - t) * 1000)
+
+
+cpdef get_paths(x1, x2, C0, n_points, n_ice, delta_n, z_0):
+    """
+    calculates the ray tracing paths for many start/stop positions (shape (N, 2)) and C0 parameters (shape (N,))
+    in one call. The C++ code writes directly into the memory of the returned numpy arrays of shape (N, n_points).
+    """
+    cdef:
+        np.ndarray[double, ndim = 1, mode = "c"] y1s = np.ascontiguousarray(x1[:, 0], dtype=np.double)
+        np.ndarray[double, ndim = 1, mode = "c"] z1s = np.ascontiguousarray(x1[:, 1], dtype=np.double)
+        np.ndarray[double, ndim = 1, mode = "c"] y2s = np.ascontiguousarray(x2[:, 0], dtype=np.double)
+        np.ndarray[double, ndim = 1, mode = "c"] z2s = np.ascontiguousarray(x2[:, 1], dtype=np.double)
+        np.ndarray[double, ndim = 1, mode = "c"] C0s = np.ascontiguousarray(C0, dtype=np.double)
+        int n_paths = C0s.shape[0]
+        np.ndarray[double, ndim = 2, mode = "c"] yy = np.empty((n_paths, n_points), dtype=np.double)
+        np.ndarray[double, ndim = 2, mode = "c"] zz = np.empty((n_paths, n_points), dtype=np.double)
+
+    if(n_paths == 0 or n_points == 0):
+        return yy, zz
+    get_paths2(&y1s[0], &z1s[0], &y2s[0], &z2s[0], &C0s[0], n_paths, n_points, n_ice, delta_n, z_0, &yy[0, 0], &zz[0, 0])
+    return yy, zz
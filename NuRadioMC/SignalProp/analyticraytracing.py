@@ -557,7 +557,70 @@ class ray_tracing_2D():
             self.__logger.debug(f"calculating attenuation for frequencies {freqs}")
             return freqs
 
-    def get_attenuation_along_path(self, x1, x2, C_0, frequency, max_detector_freq, reflection=0, reflection_case=1):
+    def __get_attenuation_adaptive(self, get_attenuation, frequency, filter_response, tolerance):
+        """
+        calculates the attenuation for reference frequencies that are placed adaptively according to the detector response
+
+        The reference frequencies are initialized with the edges of the frequency range, the edges of the detector passband
+        (all frequencies where the normalized detector response is larger than `tolerance`) and the center of the passband.
+        Then, each interval between two reference frequencies is bisected as long as the deviation of the attenuation
+        from the linear interpolation at the interval center, weighted with the maximum detector response in the interval,
+        is larger than `tolerance`. The number of reference frequencies is limited to `n_frequencies_integration`.
+
+        Parameters
+        ----------
+        get_attenuation: function
+            function that returns the attenuation for an array of frequencies
+        frequency: array of floats
+            the frequencies for which the attenuation is calculated (only positive frequencies are considered)
+        filter_response: array of floats
+            the detector response at `frequency`
+        tolerance: float
+            the maximum allowed interpolation error weighted with the detector response normalized to one
+
+        Returns
+        -------
+        freqs: array of floats
+            the reference frequencies (sorted)
+        attenuation: array of floats
+            the attenuation at the reference frequencies
+        """
+        mask = frequency > 0
+        ff = frequency[mask]
+        weights = np.abs(filter_response[mask])
+        if(weights.max() > 0):
+            weights = weights / weights.max()
+        else:
+            weights = np.ones_like(ff)
+        passband = ff[weights > tolerance]
+        if(len(passband) == 0):
+            # tolerance >= 1, the attenuation is only calculated at the edges and the center of the frequency range
+            passband = ff[[0, -1]]
+        freqs = np.unique([ff.min(), passband.min(), 0.5 * (passband.min() + passband.max()), passband.max(), ff.max()])
+        attenuation = get_attenuation(freqs)
+
+        def get_max_weights(freqs):
+            # maximum detector response in each interval between two reference frequencies
+            idx = np.searchsorted(ff, freqs)
+            return np.array([weights[i1:i2 + 1].max() for i1, i2 in zip(idx[:-1], idx[1:])])
+
+        active = get_max_weights(freqs) > tolerance
+        while(np.any(active) and len(freqs) < self.__n_frequencies_integration):
+            iF = np.flatnonzero(active)[:self.__n_frequencies_integration - len(freqs)]
+            f_center = 0.5 * (freqs[iF] + freqs[iF + 1])
+            attenuation_center = get_attenuation(f_center)
+            max_weights = get_max_weights(freqs)[iF]
+            error = max_weights * np.abs(attenuation_center - 0.5 * (attenuation[iF] + attenuation[iF + 1]))
+            # both halves of an interval need to be refined further if the interpolation error is too large
+            active[iF] = error > tolerance
+            active = np.insert(active, iF + 1, error > tolerance)
+            freqs = np.insert(freqs, iF + 1, f_center)
+            attenuation = np.insert(attenuation, iF + 1, attenuation_center)
+        self.__logger.debug(f"calculated attenuation for {len(freqs):d} adaptively chosen frequencies {freqs}")
+        return freqs, attenuation
+
+    def get_attenuation_along_path(self, x1, x2, C_0, frequency, max_detector_freq, reflection=0, reflection_case=1,
+                                   filter_response=None, tolerance=1e-3):
         tmp_attenuation = None
         output = f"calculating attenuation for n_ref = {reflection:d}: "
         for iS, segment in enumerate(self.get_path_segments(x1, x2, C_0, reflection, reflection_case)):
@@ -573,15 +636,11 @@ class ray_tracing_2D():
                 x11, x1, x22, x2, C_0, C_1 = segment
 
             if(cpp_available):
-                mask = frequency > 0
-                freqs = self.__get_frequencies_for_attenuation(frequency, max_detector_freq)
-                tmp = np.zeros_like(freqs)
-                for i, f in enumerate(freqs):
-                    tmp[i] = wrapper.get_attenuation_along_path(
-                        x1, x2, C_0, f, self.medium.n_ice, self.medium.delta_n, self.medium.z_0, self.attenuation_model_int)
-                self.__logger.debug(tmp)
-                attenuation = np.ones_like(frequency)
-                attenuation[mask] = np.interp(frequency[mask], freqs, tmp)
+
+                def get_attenuation(freqs):
+                    return np.array([wrapper.get_attenuation_along_path(x1, x2, C_0, f, self.medium.n_ice, self.medium.delta_n,
+                                                                        self.medium.z_0, self.attenuation_model_int) for f in freqs])
+
             else:
 
                 x2_mirrored = self.get_z_mirrored(x1, x2, C_0)
@@ -590,20 +649,28 @@ class ray_tracing_2D():
                     z = self.get_z_unmirrored(t, C_0)
                     return self.ds(t, C_0) / attenuation_util.get_attenuation_length(z, frequency, self.attenuation_model)
 
-                # to speed up things we only calculate the attenuation for a few frequencies
-                # and interpolate linearly between them
-                mask = frequency > 0
-                freqs = self.__get_frequencies_for_attenuation(frequency, max_detector_freq)
                 gamma_turn, z_turn = self.get_turning_point(self.medium.n_ice ** 2 - C_0 ** -2)
                 points = None
                 if(x1[1] < z_turn and z_turn < x2_mirrored[1]):
                     points = [z_turn]
-                tmp = np.array([integrate.quad(dt, x1[1], x2_mirrored[1], args=(
-                    C_0, f), epsrel=1e-2, points=points)[0] for f in freqs])
-                tmp = np.exp(-1 * tmp)
-        #         tmp = np.array([integrate.quad(dt, x1[1], x2_mirrored[1], args=(C_0, f), epsrel=0.05)[0] for f in frequency[mask]])
-                attenuation = np.ones_like(frequency)
-                attenuation[mask] = np.interp(frequency[mask], freqs, tmp)
+
+                def get_attenuation(freqs):
+                    tmp = np.array([integrate.quad(dt, x1[1], x2_mirrored[1], args=(
+                        C_0, f), epsrel=1e-2, points=points)[0] for f in freqs])
+                    return np.exp(-1 * tmp)
+
+            # to speed up things we only calculate the attenuation for a few frequencies
+            # and interpolate linearly between them
+            mask = frequency > 0
+            if(filter_response is None):
+                freqs = self.__get_frequencies_for_attenuation(frequency, max_detector_freq)
+                tmp = get_attenuation(freqs)
+            else:
+                freqs, tmp = self.__get_attenuation_adaptive(get_attenuation, frequency, filter_response, tolerance)
+            self.__logger.debug(tmp)
+            attenuation = np.ones_like(frequency)
+            attenuation[mask] = np.interp(frequency[mask], freqs, tmp)
+            if(not cpp_available):
                 self.__logger.info("calculating attenuation from ({:.0f}, {:.0f}) to ({:.0f}, {:.0f}) = ({:.0f}, {:.0f}) =  a factor {}".format(
                     x1[0], x1[1], x2[0], x2[1], x2_mirrored[0], x2_mirrored[1], 1 / attenuation))
             iF = len(frequency) // 3
@@ -792,10 +859,57 @@ class ray_tracing_2D():
             C_0, self.__b, gamma_turn, z_turn, y_turn))
         return res, zs
 
-    def get_path_reflections(self, x1, x2, C_0, n_points=1000, reflection=0, reflection_case=1):
+    def get_paths(self, x1, x2, C_0, n_points=1000):
         """
-        calculates the ray path in the presence of reflections at the bottom
-        The full path is constructed by multiple calls to the `get_path()` function to put together the full path
+        calculates the ray tracing paths for many start and stop positions in one call (without bottom reflections)
+
+        This is the vectorized version of `get_path`. If the C++ implementation is available, the paths are calculated
+        in C++ and written directly into the returned numpy arrays.
+        The results are only valid if C_0 is a solution to the ray tracing problem, e.g. obtained from
+        `find_solutions_vectorized`. Paths with C_0 = nan are returned as nan.
+
+        Parameters
+        ----------
+        x1: array of shape (N, 2)
+            start positions (y, z)
+        x2: array of shape (N, 2)
+            stop positions (y, z)
+        C_0: array of shape (N,)
+            first parameter of each path
+        n_points: integer (optional)
+            the number of coordinates to calculate for each path
+
+        Returns
+        -------
+        yy: array of shape (N, n_points)
+            the y coordinates of the ray tracing paths
+        zz: array of shape (N, n_points)
+            the z coordinates of the ray tracing paths
+        """
+        x1 = np.atleast_2d(np.asarray(x1, dtype=float))
+        x2 = np.atleast_2d(np.asarray(x2, dtype=float))
+        C_0 = np.atleast_1d(np.asarray(C_0, dtype=float))
+        if(cpp_available and hasattr(wrapper, "get_paths")):  # older compilations of the C++ code do not provide get_paths
+            return wrapper.get_paths(x1, x2, C_0, n_points, self.medium.n_ice, self.medium.delta_n, self.medium.z_0)
+
+        with np.errstate(all='ignore'):
+            c = self.medium.n_ice ** 2 - C_0 ** -2
+            C_1 = x1[:, 0] - self.__get_y_with_z_mirror_vectorized(x1[:, 1], C_0)
+            gamma_turn, z_turn = self.__get_turning_point_vectorized(c)
+            y_turn = self.__get_y_vectorized(gamma_turn, C_0, C_1)
+            zstart = x1[:, 1]
+            zstop = np.where(y_turn < x2[:, 0], zstart + np.abs(z_turn - zstart) + np.abs(z_turn - x2[:, 1]), x2[:, 1])
+            z = np.linspace(zstart, zstop, n_points, axis=1)
+            mask = z < z_turn[:, None]
+            zz = np.where(mask, z, 2 * z_turn[:, None] - z)
+            yy = self.__get_y_vectorized(self.get_gamma(zz), C_0[:, None], C_1[:, None])
+            yy = np.where(mask, yy, 2 * y_turn[:, None] - yy)
+        return yy, zz
+
+    def get_path_reflection_segments(self, x1, x2, C_0, reflection=0, reflection_case=1):
+        """
+        calculates the start and stop positions of the path segments between bottom reflections
+        that are put together by `get_path_reflections` to form the full ray path
 
         Parameters
         ----------
@@ -805,8 +919,6 @@ class ray_tracing_2D():
             (y, z) coordinate of stop value
         C_0: float
             C_0 parameter of analytic ray path function
-        n_points: int (default 1000)
-            the number of points of the numeric path
         reflection: int (default 0)
             the number of bottom reflections to consider
         reflection_case: int (default 1)
@@ -816,17 +928,17 @@ class ray_tracing_2D():
 
         Returns
         -------
-        yy: array
-            the y coordinates of the ray tracing path
-        zz: array
-            the z coordinates of the ray tracing path
+        x1s: array of shape (n_segments, 2)
+            the start positions of the path segments
+        x2s: array of shape (n_segments, 2)
+            the stop positions of the path segments
         """
-        yy = []
-        zz = []
+        if(reflection == 0):
+            return np.array([x1], dtype=float), np.array([x2], dtype=float)
         x1 = copy.copy(x1)
-        x11 = copy.copy(x1)
-
-        if(reflection and reflection_case == 2):
+        x1s = []
+        x2s = []
+        if(reflection_case == 2):
             # the code only allows upward going rays, thus we find a point left from x1 that has an upward going ray
             # that will produce a downward going ray through x1
             y_turn = self.get_y_turn(C_0, x1)
@@ -834,9 +946,6 @@ class ray_tracing_2D():
             self.__logger.debug("relaction case 2: shifting x1 {} to {}".format(x1, x1[0] - 2 * dy))
             x1[0] = x1[0] - 2 * dy
 
-        if(reflection == 0):
-            # in case of no bottom reflections, return path right away
-            return self.get_path(x1, x2, C_0, n_points)
         x22 = copy.copy(x2)
         for i in range(reflection + 1):
             self.__logger.debug("calculation path for reflection = {}".format(i))
@@ -844,15 +953,50 @@ class ray_tracing_2D():
             x2 = self.get_reflection_point(C_0, C_1)
             if(x2[0] > x22[0]):
                 x2 = x22
-            yyy, zzz = self.get_path(x1, x2, C_0, n_points)
-            yy.extend(yyy)
-            zz.extend(zzz)
+            x1s.append([x1[0], x1[1]])
+            x2s.append([x2[0], x2[1]])
             self.__logger.debug("setting x1 from {} to {}".format(x1, x2))
             x1 = x2
+        return np.array(x1s, dtype=float), np.array(x2s, dtype=float)
+
+    def get_path_reflections(self, x1, x2, C_0, n_points=1000, reflection=0, reflection_case=1):
+        """
+        calculates the ray path in the presence of reflections at the bottom
+        The full path is constructed from the path segments between the bottom reflections
+        which are all calculated in a single call to `get_paths()`
+
+        Parameters
+        ----------
+        x1: tuple
+            (y, z) coordinate of start value
+        x2: tuple
+            (y, z) coordinate of stop value
+        C_0: float
+            C_0 parameter of analytic ray path function
+        n_points: int (default 1000)
+            the number of points of the numeric path
+        reflection: int (default 0)
+            the number of bottom reflections to consider
+        reflection_case: int (default 1)
+            only relevant if `reflection` is larger than 0
+            * 1: rays start upwards
+            * 2: rays start downwards
 
-        yy = np.array(yy)
-        zz = np.array(zz)
-        mask = yy > x11[0]
+        Returns
+        -------
+        yy: array
+            the y coordinates of the ray tracing path
+        zz: array
+            the z coordinates of the ray tracing path
+        """
+        x1s, x2s = self.get_path_reflection_segments(x1, x2, C_0, reflection=reflection, reflection_case=reflection_case)
+        yy, zz = self.get_paths(x1s, x2s, np.full(len(x1s), C_0), n_points)
+        yy = yy.flatten()
+        zz = zz.flatten()
+        if(reflection == 0):
+            # in case of no bottom reflections, return path right away
+            return yy, zz
+        mask = yy > x1[0]
         return yy[mask], zz[mask]
 
     def get_reflection_point(self, C_0, C_1):
@@ -969,6 +1113,91 @@ class ray_tracing_2D():
                 z_mirrored, y2_fit, y2_raw, diff, x2[0], gamma))
             return -1 * diff
 
+    def __get_turning_point_vectorized(self, c):
+        """
+        vectorized version of `get_turning_point`, c can be an array of arbitrary shape
+        """
+        gamma2 = self.__b * 0.5 - (0.25 * self.__b ** 2 - c) ** 0.5  # first solution discarded
+        z2 = np.log(gamma2 / self.medium.delta_n) * self.medium.z_0
+        mask = z2 > 0  # a reflection is just a turning point at z = 0
+        gamma2 = np.where(mask, self.medium.delta_n, gamma2)
+        z2 = np.where(mask, 0., z2)
+        return gamma2, z2
+
+    def __get_y_vectorized(self, gamma, C_0, C_1):
+        """
+        `get_y` without the debug output, the result is nan for invalid parameter combinations
+        """
+        c = self.medium.n_ice ** 2 - C_0 ** -2
+        root = np.abs(gamma ** 2 - gamma * self.__b + c)
+        logargument = gamma / (2 * c ** 0.5 * (root) ** 0.5 - self.__b * gamma + 2 * c)
+        return self.medium.z_0 * (self.medium.n_ice ** 2 * C_0 ** 2 - 1) ** -0.5 * np.log(logargument) + C_1
+
+    def __get_y_with_z_mirror_vectorized(self, z, C_0, C_1=0):
+        """
+        vectorized version of `get_y_with_z_mirror`, all parameters are broadcasted against each other
+        and only the y values are returned
+        """
+        c = self.medium.n_ice ** 2 - C_0 ** -2
+        gamma_turn, z_turn = self.__get_turning_point_vectorized(c)
+        y_turn = self.__get_y_vectorized(gamma_turn, C_0, C_1)
+        y_direct = self.__get_y_vectorized(self.get_gamma(z), C_0, C_1)
+        y_mirrored = 2 * y_turn - self.__get_y_vectorized(self.get_gamma(2 * z_turn - z), C_0, C_1)
+        return np.where(z < z_turn, y_direct, y_mirrored)
+
+    def __get_delta_y_vectorized(self, C_0, y1, z1, y2, z2, reflection, reflection_case):
+        c = self.medium.n_ice ** 2 - C_0 ** -2
+        gamma_turn, z_turn = self.__get_turning_point_vectorized(c)
+
+        if(reflection > 0 and reflection_case == 2):
+            C_1 = y1 - self.__get_y_with_z_mirror_vectorized(z1, C_0)
+            y_turn = self.__get_y_vectorized(gamma_turn, C_0, C_1)
+            y1 = y1 - 2 * (y_turn - y1)
+
+        for i in range(reflection):
+            # move the start point to the point of the bottom reflection
+            C_1 = y1 - self.__get_y_with_z_mirror_vectorized(z1, C_0)
+            y1 = self.__get_y_with_z_mirror_vectorized(-self.medium.reflection + 2 * z_turn, C_0, C_1)
+            z1 = self.medium.reflection
+
+        C_1 = y1 - self.__get_y_with_z_mirror_vectorized(z1, C_0)
+        y_turn = self.__get_y_vectorized(gamma_turn, C_0, C_1)
+        y2_raw = self.__get_y_vectorized(self.get_gamma(z2), C_0, C_1)
+        # see `get_delta_y` for the definition of the three cases
+        diff_deep = -1 * (((z_turn - z2) ** 2 + (y_turn - y2) ** 2) ** 0.5 + 10 * np.abs(z_turn - z2))
+        diff_direct = y2 - y2_raw
+        diff_mirrored = -1 * (y2 - (2 * y_turn - y2_raw))
+        return np.where(z_turn < z2, diff_deep, np.where(y_turn > y2, diff_direct, diff_mirrored))
+
+    def get_delta_y_vectorized(self, C_0, x1, x2, reflection=0, reflection_case=2):
+        """
+        vectorized version of `get_delta_y`
+
+        Parameters
+        ----------
+        C_0: array of floats
+            the C_0 parameters, the array is broadcasted against the y and z components of x1 and x2
+        x1: tuple of arrays
+            (y, z) coordinates of the start points
+        x2: tuple of arrays
+            (y, z) coordinates of the stop points
+        reflection: int (default 0)
+            the number of bottom reflections to consider
+        reflection_case: int (default 2)
+            only relevant if `reflection` is larger than 0
+            * 1: rays start upwards
+            * 2: rays start downwards
+
+        Returns
+        -------
+        delta_y: array of floats
+            the signed difference in the y position between the ray path and the stop point
+        """
+        C_0 = np.asarray(C_0, dtype=float)
+        with np.errstate(all='ignore'):
+            diff = self.__get_delta_y_vectorized(C_0, x1[0], x1[1], x2[0], x2[1], reflection, reflection_case)
+        return np.where(C_0 < 1. / self.medium.n_ice, -np.inf, diff)
+
     def determine_solution_type(self, x1, x2, C_0):
         """ returns the type of the solution
 
@@ -1130,6 +1359,128 @@ class ray_tracing_2D():
 
             return sorted(results, key=itemgetter('type'))
 
+    def find_solutions_vectorized(self, x1, x2, reflection=0, reflection_case=1, precision=1e-9, max_iter=200):
+        """
+        finds the ray tracing solutions for many pairs of start and stop points simultaneously
+
+        This is a pure numpy implementation of the algorithm used in `find_solutions`. First, a root of the
+        squared objective function is searched for all pairs in parallel using the secant method starting at
+        logC0 = -1. If a root was found, additional solutions with higher and lower logC0 are obtained
+        via a vectorized bisection.
+
+        Parameters
+        -----------
+        x1: array of shape (N, 2)
+            (y,z) coordinates of start points
+        x2: array of shape (N, 2)
+            (y,z) coordinates of stop points
+        reflection: int (default 0)
+            how many reflections off the reflective layer (bottom of ice shelf) should be simulated
+        reflection_case: int (default 1)
+            only relevant if `reflection` is larger than 0
+            * 1: rays start upwards
+            * 2: rays start downwards
+        precision: float (default 1e-9)
+            convergence criterion of the root finding. The secant iteration stops if the squared objective
+            function is smaller than this value, the bracketing root finding stops if the interval in logC0 is smaller
+            than this value.
+        max_iter: int (default 200)
+            maximum number of iterations of the secant method
+
+        Returns
+        -------
+        C0s: array of shape (N, 3)
+            the C_0 parameters of the solutions, nan if no solution exists
+        C1s: array of shape (N, 3)
+            the C_1 parameters of the solutions, nan if no solution exists
+        types: array of shape (N, 3)
+            the solution types (see `solution_types`), 0 if no solution exists
+
+        The solutions of each pair are sorted by their type
+        """
+        if(reflection > 0 and self.medium.reflection is None):
+            self.__logger.error("a solution for {:d} reflection(s) off the bottom reflective layer is requested, but ice model does not specify a reflective layer".format(reflection))
+            raise AttributeError("a solution for {:d} reflection(s) off the bottom reflective layer is requested, but ice model does not specify a reflective layer".format(reflection))
+        y1, z1 = np.array(x1, dtype=float).reshape((-1, 2)).T
+        y2, z2 = np.array(x2, dtype=float).reshape((-1, 2)).T
+        n_pairs = len(y1)
+
+        def obj_delta_y(logC_0, mask=Ellipsis):
+            C_0 = self.get_C0_from_log(logC_0)
+            return self.__get_delta_y_vectorized(C_0, y1[mask], z1[mask], y2[mask], z2[mask], reflection, reflection_case)
+
+        # solutions with invalid intermediate values (e.g. nan) are discarded below, so we can ignore numpy warnings
+        with np.errstate(all='ignore'):
+            # find a first root of the squared objective function with the secant method
+            logC_0 = np.full(n_pairs, -1.)
+            f = obj_delta_y(logC_0) ** 2
+            h = 1e-6
+            df = (obj_delta_y(logC_0 + h) ** 2 - f) / h
+            found = np.zeros(n_pairs, dtype=bool)
+            active = np.ones(n_pairs, dtype=bool)
+            for i in range(max_iter):
+                logC_0_new = logC_0 - f / df
+                f_new = obj_delta_y(logC_0_new) ** 2
+                df_new = (f_new - f) / (logC_0_new - logC_0)
+                # pairs for which the objective function can not be evaluated are given up
+                update = active & np.isfinite(logC_0_new) & np.isfinite(f_new)
+                logC_0[update] = logC_0_new[update]
+                f[update] = f_new[update]
+                df[update] = df_new[update]
+                converged = update & (f < precision)
+                found |= converged
+                active &= update & ~converged
+                if(not np.any(active)):
+                    break
+            self.__logger.debug(f"found a first solution for {np.sum(found):d} out of {n_pairs:d} pairs after {i + 1:d} iterations")
+
+            logC0s = np.full((n_pairs, 3), np.nan)
+            logC0s[found, 0] = logC_0[found]
+
+            # check if other solutions with higher or lower logC0 exist
+            idx = np.flatnonzero(found)
+            for iS, (lower, upper) in enumerate([(logC_0[idx] + 0.0001, np.full(len(idx), 100.)),
+                                                 (np.full(len(idx), -100.), logC_0[idx] - 0.0001)]):
+                delta_lower = obj_delta_y(lower, idx)
+                delta_upper = obj_delta_y(upper, idx)
+                bracket = np.signbit(delta_lower) != np.signbit(delta_upper)
+                a, b = lower[bracket], upper[bracket]
+                f_a, f_b = delta_lower[bracket], delta_upper[bracket]
+                idx_bracket = idx[bracket]
+                # bracketing root finding using the Illinois variant of the regula falsi method, every
+                # few iterations a bisection step is used to guarantee convergence for very steep objective functions
+                n_iter = 0
+                while(np.any(np.abs(b - a) > precision)):
+                    n_iter += 1
+                    if(n_iter % 4):
+                        c = b - f_b * (b - a) / (f_b - f_a)
+                        c = np.where(np.isfinite(c), c, 0.5 * (a + b))
+                    else:
+                        c = 0.5 * (a + b)
+                    f_c = obj_delta_y(c, idx_bracket)
+                    same_sign = np.signbit(f_c) == np.signbit(f_b)
+                    a, f_a = np.where(same_sign, a, b), np.where(same_sign, 0.5 * f_a, f_b)
+                    b, f_b = c, f_c
+                    converged = f_c == 0
+                    a[converged] = b[converged]
+                self.__logger.debug(f"bracketing root finding converged after {n_iter:d} iterations")
+                logC0s[idx_bracket, iS + 1] = b
+
+            C0s = self.get_C0_from_log(logC0s)
+            C1s = y1[:, np.newaxis] - self.__get_y_with_z_mirror_vectorized(z1[:, np.newaxis], C0s)
+            # determine the solution types, see `determine_solution_type`
+            gamma_turn, z_turn = self.__get_turning_point_vectorized(self.medium.n_ice ** 2 - C0s ** -2)
+            y_turn = self.__get_y_vectorized(gamma_turn, C0s, C1s)
+            types = np.where(y2[:, np.newaxis] < y_turn, 1, np.where(z_turn == 0, 3, 2))
+        types[np.isnan(C0s)] = 0
+
+        # sort solutions by type, pairs without solution at the end
+        order = np.argsort(np.where(types == 0, 4, types), axis=1, kind='stable')
+        C0s = np.take_along_axis(C0s, order, axis=1)
+        C1s = np.take_along_axis(C1s, order, axis=1)
+        types = np.take_along_axis(types, order, axis=1)
+        return C0s, C1s, types
+
     def plot_result(self, x1, x2, C_0, ax):
         """
         helper function to visualize results
@@ -1668,6 +2019,50 @@ class ray_tracing:
         path = MM.T + self.__X1
         return path
 
+    def get_paths(self, n_points=1000):
+        """
+        calculates the 3D ray paths of all solutions
+
+        The path segments of all solutions are calculated in a single call to `ray_tracing_2D.get_paths`.
+
+        Parameters
+        ----------
+        n_points: int (default 1000)
+            the number of points of each path segment (one segment per bottom reflection)
+
+        Returns
+        -------
+        paths: list of arrays of shape (n, 3)
+            the 3D ray paths of all solutions
+        """
+        x1s = []
+        x2s = []
+        C0s = []
+        n_segments = []
+        for result in self.__results:
+            tmp1, tmp2 = self.__r2d.get_path_reflection_segments(self.__x1, self.__x2, result['C0'],
+                                                                 reflection=result['reflection'],
+                                                                 reflection_case=result['reflection_case'])
+            x1s.append(tmp1)
+            x2s.append(tmp2)
+            C0s.append(np.full(len(tmp1), result['C0']))
+            n_segments.append(len(tmp1))
+        if(len(n_segments) == 0):
+            return []
+        yy, zz = self.__r2d.get_paths(np.concatenate(x1s), np.concatenate(x2s), np.concatenate(C0s), n_points)
+        paths = []
+        for iS, (yyy, zzz) in enumerate(zip(np.split(yy, np.cumsum(n_segments)[:-1]), np.split(zz, np.cumsum(n_segments)[:-1]))):
+            yyy = yyy.flatten()
+            zzz = zzz.flatten()
+            if(self.__results[iS]['reflection'] > 0):
+                mask = yyy > self.__x1[0]
+                yyy = yyy[mask]
+                zzz = zzz[mask]
+            path_2d = np.array([yyy, np.zeros_like(yyy), zzz]).T
+            dP = path_2d - np.array([self.__X1[0], 0, self.__X1[2]])
+            paths.append(np.matmul(self.__R.T, dP.T).T + self.__X1)
+        return paths
+
     def get_launch_vector(self, iS):
         """
         calculates the launch vector (in 3D) of solution iS
@@ -1840,7 +2235,7 @@ class ray_tracing:
                                               reflection=result['reflection'],
                                               reflection_case=result['reflection_case'])
 
-    def get_attenuation(self, iS, frequency, max_detector_freq=None):
+    def get_attenuation(self, iS, frequency, max_detector_freq=None, filter_response=None, tolerance=1e-3):
         """
         calculates the signal attenuation due to attenuation in the medium (ice)
 
@@ -1858,6 +2253,16 @@ class ray_tracing:
             (the simulation is internally run with a higher sampling rate, but the relevant part of the attenuation length
             calculation is the frequency interval visible by the detector, hence a finer calculation is more important)
 
+        filter_response: array of floats or None (default None)
+            the (absolute) response of the detector at `frequency`. If given, the reference frequencies for which the
+            attenuation is calculated are placed adaptively where the detector is sensitive. The maximum number of
+            reference frequencies is `n_frequencies_integration`. `max_detector_freq` is ignored in this case.
+
+        tolerance: float (default 1e-3)
+            only used if `filter_response` is given: the maximum allowed error of the linear interpolation between the
+            reference frequencies, weighted with the detector response normalized to one. A tolerance
+            of one or larger only uses the edges and the center of the frequency range
+
         Returns
         -------
         attenuation: array of floats
@@ -1872,7 +2277,8 @@ class ray_tracing:
         result = self.__results[iS]
         return self.__r2d.get_attenuation_along_path(self.__x1, self.__x2, result['C0'], frequency, max_detector_freq,
                                                      reflection=result['reflection'],
-                                                     reflection_case=result['reflection_case'])
+                                                     reflection_case=result['reflection_case'],
+                                                     filter_response=filter_response, tolerance=tolerance)
 
     def get_focusing(self, iS, dz, limit=2.):
         """
@@ -1929,11 +2335,9 @@ class ray_tracing:
 
         # now also correct for differences in refractive index between emitter and receiver position
         if self.__swap:
-            n1 = self.__medium.get_index_of_refraction(self.__X2)  # emitter
-            n2 = self.__medium.get_index_of_refraction(self.__X1)  # receiver
+            n1, n2 = self.__medium.get_index_of_refraction(np.array([self.__X2, self.__X1]))  # emitter, receiver
         else:
-            n1 = self.__medium.get_index_of_refraction(self.__X1)  # emitter
-            n2 = self.__medium.get_index_of_refraction(self.__X2)  # receiver
+            n1, n2 = self.__medium.get_index_of_refraction(np.array([self.__X1, self.__X2]))  # emitter, receiver
         return focusing * (n1 / n2) ** 0.5
 
     def get_ray_path(self, iS):
@@ -0,0 +1,781 @@
+from __future__ import absolute_import, division, print_function
+import numpy as np
+import weakref
+import scipy.constants
+from NuRadioReco.utilities import units
+from NuRadioMC.utilities import attenuation as attenuation_util
+import logging
+logging.basicConfig()
+
+"""
+numerical ray tracing for arbitrary one dimensional index-of-refraction profiles n(z)
+
+In a medium where the index of refraction only depends on the depth, the ray parameter p = n(z) * sin(theta)
+(theta being the zenith angle of the ray) is conserved along the ray. The ray equation dy/dz = p / sqrt(n^2 - p^2)
+is integrated once for a grid of ray parameters (i.e. a scan over all launch angles) and all depths. To remove the
+singularity at the turning point of the ray, the integration is performed in w = sqrt(z_top - z), where z_top is the
+turning point of the ray or the surface. The ray tracing problem is then solved by scanning this precomputed grid
+for all possible path topologies (direct, via the turning point/surface and including reflections off the bottom)
+and refining the solutions with a few iterations of a bracketed root finder, where each iteration integrates the
+ray equation for all solutions simultaneously.
+
+The only requirement on the medium is that the index of refraction does not increase towards the surface. Below
+the depth `z_min` the index of refraction is assumed to be constant.
+"""
+
+speed_of_light = scipy.constants.c * units.m / units.s
+
+# the precomputed solution grid only depends on the medium, hence the 2D ray tracers are shared between
+# all ray tracing instances that use the same medium
+_ray_tracers_2D = weakref.WeakKeyDictionary()
+
+
+class ray_tracing_2D():
+
+    def __init__(self, medium, z_min=-4 * units.km, dz=0.1 * units.m, n_p=2000, n_w=1000, n_integration=1000,
+                 log_level=logging.WARNING):
+        """
+        initialize 2D numerical ray tracing class
+
+        Parameters
+        ----------
+        medium: medium class
+            class describing the index-of-refraction profile
+        z_min: float (default -4km)
+            the depth down to which the index-of-refraction profile is tabulated. Below this depth the index of
+            refraction is assumed to be constant. If the medium has a reflective layer, its depth is used instead.
+        dz: float (default 10cm)
+            the spacing of the tabulated index-of-refraction profile
+        n_p: int (default 2000)
+            the number of ray parameters (launch angles) of the precomputed solution grid
+        n_w: int (default 1000)
+            the number of depth steps of the precomputed solution grid
+        n_integration: int (default 1000)
+            the number of integration points used to calculate the ray properties of a single ray
+        log_level: logging object
+            specify the log level of the ray tracing class
+        """
+        # only the depth of the reflective layer and the tabulated profile are kept (no reference to the medium),
+        # otherwise the cached ray tracers would keep their keys in `_ray_tracers_2D` alive
+        self.reflection = getattr(medium, "reflection", None)
+        self.__logger = logging.getLogger('numerical_ray_tracing_2D')
+        self.__logger.setLevel(log_level)
+        if(self.reflection is not None):
+            z_min = self.reflection
+        self.__z_min = z_min
+        self.__n_integration = n_integration
+        self.__z = np.linspace(z_min, 0, int(np.round(-z_min / dz)) + 1)
+        self.__n = medium.get_index_of_refraction(np.array([np.zeros_like(self.__z), np.zeros_like(self.__z), self.__z]).T)
+        if(np.any(np.diff(self.__n) > 1e-12)):
+            self.__logger.error("the index of refraction needs to decrease monotonically towards the surface")
+            raise NotImplementedError("the index of refraction needs to decrease monotonically towards the surface")
+        self.__dndz = np.gradient(self.__n, self.__z)
+        self.__n_max = self.__n[0]
+        self.__n_surface = self.__n[-1]
+
+        # precompute the horizontal distance from the turning point (or the surface) to all depths
+        # for a grid of ray parameters. The grid is dense for almost horizontal rays.
+        p_grid = self.__n_max * np.sin(np.linspace(0, 0.5 * np.pi, n_p + 2)[1:-1])
+        p_grid = np.unique(np.append(p_grid, self.__n_max * (1 - np.logspace(-12, -5, n_p // 10))))
+        self.__p_grid = p_grid
+        self.__z_top_grid = self.get_turning_point(p_grid)
+        self.__dw_grid = (self.__z_top_grid - z_min) ** 0.5 / n_w
+        w = (np.arange(n_w) + 0.5)[None, :] * self.__dw_grid[:, None]
+        integrand = p_grid[:, None] / self.__get_root(w, self.__z_top_grid[:, None], p_grid[:, None]) * 2 * w
+        self.__D_grid = np.zeros((len(p_grid), n_w + 1))
+        self.__D_grid[:, 1:] = np.cumsum(integrand * self.__dw_grid[:, None], axis=1)
+        self.__logger.info(f"precomputed solution grid for {len(p_grid):d} ray parameters and {n_w:d} depths")
+
+    def n(self, z):
+        """
+        returns the index of refraction at depth z (from the tabulated profile)
+        """
+        return np.interp(z, self.__z, self.__n)
+
+    def get_turning_point(self, p):
+        """
+        returns the depth of the turning point of rays with ray parameter p, or the surface (z = 0) if the ray
+        reaches the surface
+        """
+        return np.interp(p, self.__n[::-1], self.__z[::-1])
+
+    def get_surface_index_of_refraction(self):
+        return self.__n_surface
+
+    def __get_root(self, w, z_top, p):
+        """
+        returns sqrt(n(z)^2 - p^2) at depth z = z_top - w^2
+
+        Close to the turning point n(z) and p are almost identical, hence n(z) - p is calculated from the gradient
+        of the index of refraction to avoid the loss of precision.
+        """
+        w2 = w ** 2
+        delta_top = np.maximum(self.n(z_top) - p, 0)
+        delta = np.where(w2 < 1e-4 * units.m, delta_top - np.interp(z_top, self.__z, self.__dndz) * w2, self.n(z_top - w2) - p)
+        return np.maximum(delta * (delta + 2 * p), 1e-300) ** 0.5
+
+    def __integrate(self, p, z, numerator):
+        """
+        integrates numerator(z, n(z)) / sqrt(n(z)^2 - p^2) from depth z to the turning point (or the surface)
+        of the rays with ray parameter p
+
+        Parameters
+        ----------
+        p: array of floats
+            the ray parameters
+        z: array of floats
+            the depths (same shape as p)
+        numerator: function
+            function of depth, index of refraction and ray parameter (arrays of shape (len(p), n_integration)).
+            The output can have an additional last dimension (e.g. for different frequencies)
+
+        Returns
+        -------
+        integral: array of floats of shape p.shape (+ the additional dimension of `numerator`)
+        """
+        p = np.asarray(p, dtype=float)
+        z = np.asarray(z, dtype=float)
+        z_top = self.get_turning_point(p)
+        w_end = np.maximum(z_top - np.maximum(z, self.__z_min), 0) ** 0.5
+        w = w_end[:, None] * ((np.arange(self.__n_integration) + 0.5) / self.__n_integration)[None, :]
+        zz = z_top[:, None] - w ** 2
+        nn = self.n(zz)
+        weights = 2 * w / self.__get_root(w, z_top[:, None], p[:, None]) * (w_end / self.__n_integration)[:, None]
+        values = numerator(zz, nn, np.broadcast_to(p[:, None], zz.shape))
+        if(values.ndim > 2):
+            weights = weights[..., None]
+        integral = np.sum(values * weights, axis=1)
+        # below z_min the index of refraction is constant
+        below = z < self.__z_min
+        if(np.any(below)):
+            tmp = numerator(np.full((np.sum(below), 1), self.__z_min), np.full((np.sum(below), 1), self.__n_max), p[below][:, None])[:, 0]
+            tmp = tmp / (self.__n_max ** 2 - p[below] ** 2)[(Ellipsis,) + (None,) * (tmp.ndim - 1)] ** 0.5
+            integral[below] += (self.__z_min - z[below])[(Ellipsis,) + (None,) * (tmp.ndim - 1)] * tmp
+        integral[z > z_top] = np.nan
+        return integral
+
+    def get_horizontal_distance(self, p, z):
+        """
+        returns the horizontal distance that rays with ray parameter p travel between the depth z and
+        their turning point (or the surface)
+        """
+        return self.__integrate(p, z, lambda zz, nn, pp: pp * np.ones_like(zz))
+
+    def __get_horizontal_distance_grid(self, z):
+        """
+        returns the horizontal distance between depth z and the turning point for all rays of the precomputed grid
+        (nan if the ray does not reach depth z)
+        """
+        w = np.maximum(self.__z_top_grid - max(z, self.__z_min), 0) ** 0.5
+        x = w / self.__dw_grid
+        i = np.minimum(np.floor(x).astype(int), self.__D_grid.shape[1] - 2)
+        f = x - i
+        index = np.arange(len(self.__p_grid))
+        D = self.__D_grid[index, i] * (1 - f) + self.__D_grid[index, i + 1] * f
+        if(z < self.__z_min):
+            D += (self.__z_min - z) * self.__p_grid / (self.__n_max ** 2 - self.__p_grid ** 2) ** 0.5
+        D[z > self.__z_top_grid] = np.nan
+        return D
+
+    def get_topologies(self, n_reflections=0):
+        """
+        returns all possible path topologies, defined by the number of bottom reflections, if the ray
+        starts upwards and if the ray arrives upwards at the receiver
+        """
+        topologies = [(0, True, True), (0, False, False), (0, True, False)]
+        for k in range(1, n_reflections + 1):
+            for up1 in [True, False]:
+                for up2 in [True, False]:
+                    topologies.append((k, up1, up2))
+        return topologies
+
+    def get_waypoints(self, p, z1, z2, reflection, up1, up2):
+        """
+        returns the depths of the start point, all turning points and bottom reflections and the stop point of a ray
+
+        Parameters
+        ----------
+        p: float
+            ray parameter
+        z1: float
+            depth of start point
+        z2: float
+            depth of stop point
+        reflection: int
+            number of bottom reflections
+        up1: bool
+            True if the ray starts upwards
+        up2: bool
+            True if the ray arrives upwards at the stop point
+
+        Returns
+        -------
+        waypoints: list of floats
+        top_events: int
+            the number of times the ray turns around at the top (or reflects off the surface)
+        """
+        z_top = float(self.get_turning_point(p))
+        n_top = reflection + int(up1) - int(up2)
+        waypoints = [z1]
+        next_is_top = up1
+        for i in range(n_top + reflection):
+            if(next_is_top):
+                waypoints.append(z_top)
+            else:
+                waypoints.append(self.reflection)
+            next_is_top = not next_is_top
+        waypoints.append(z2)
+        return waypoints, n_top
+
+    def __combine(self, reflection, up1, up2, values_z1, values_z2, values_bottom=None):
+        """
+        combines the horizontal distances between the turning point and the start point, stop point and the bottom
+        to the horizontal distance along the full path (all parameters can be arrays)
+        """
+        total = np.where(up1, values_z1, -values_z1) + np.where(up2, -values_z2, values_z2)
+        if(values_bottom is not None):
+            total = total + 2 * reflection * values_bottom
+        return total
+
+    def find_solutions(self, z1, z2, r, n_reflections=0, precision=1e-6 * units.m, max_iter=100):
+        """
+        finds all ray tracing solutions between a start point at depth z1 and a stop point at depth z2 that are
+        separated by the horizontal distance r
+
+        Parameters
+        ----------
+        z1: float
+            depth of the start point
+        z2: float
+            depth of the stop point
+        r: float
+            horizontal distance between start and stop point
+        n_reflections: int (default 0)
+            the maximum number of bottom reflections
+        precision: float
+            the precision of the horizontal distance of the solutions
+        max_iter: int
+            the maximum number of iterations of the root finder
+
+        Returns
+        -------
+        list of dictionaries with the ray parameter 'p', the number of bottom reflections 'reflection' and the
+        directions at the start ('up1') and stop point ('up2')
+        """
+        p_max = float(self.n(max(z1, z2)))
+        p_end = p_max * (1 - 1e-12)
+        D1 = self.__get_horizontal_distance_grid(z1)
+        D2 = self.__get_horizontal_distance_grid(z2)
+        Db = None
+        if(n_reflections):
+            Db = self.__get_horizontal_distance_grid(self.reflection)
+        mask = self.__p_grid < p_end
+        p_scan = np.append(self.__p_grid[mask], p_end)
+        # the last point of the scan (the ray is horizontal at the shallower point) is calculated exactly
+        D_end = self.get_horizontal_distance(np.array([p_end] * 3), np.array([z1, z2, min(z1, z2)]))
+        D1 = np.append(D1[mask], D_end[0])
+        D2 = np.append(D2[mask], D_end[1])
+        if(n_reflections):
+            Db = np.append(Db[mask], self.get_horizontal_distance(np.array([p_end]), np.array([self.reflection]))[0])
+
+        brackets = []
+        for topology in self.get_topologies(n_reflections):
+            reflection, up1, up2 = topology
+            with np.errstate(invalid='ignore'):
+                f = self.__combine(reflection, up1, up2, D1, D2, Db) - r
+                sign_change = np.flatnonzero(np.sign(f[:-1]) * np.sign(f[1:]) < 0)
+            for i in sign_change:
+                brackets.append([p_scan[i], p_scan[i + 1], f[i], f[i + 1], reflection, up1, up2])
+            for i in np.flatnonzero(f == 0):
+                brackets.append([p_scan[i], p_scan[i], 0, 0, reflection, up1, up2])
+        if(len(brackets) == 0):
+            return []
+
+        # refine all solutions simultaneously with the Illinois algorithm
+        brackets = np.array(brackets, dtype=object)
+        a, b, fa, fb = [brackets[:, i].astype(float) for i in range(4)]
+        reflection = brackets[:, 4].astype(int)
+        up1 = brackets[:, 5].astype(bool)
+        up2 = brackets[:, 6].astype(bool)
+        n = len(a)
+        p = a.copy()
+        side = np.zeros(n)
+        for iteration in range(max_iter):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                p = np.where(fb != fa, (a * fb - b * fa) / (fb - fa), a)
+            if(n_reflections):
+                D = self.get_horizontal_distance(np.tile(p, 3), np.repeat([z1, z2, self.reflection], n)).reshape(3, n)
+                fp = self.__combine(reflection, up1, up2, D[0], D[1], D[2]) - r
+            else:
+                D = self.get_horizontal_distance(np.tile(p, 2), np.repeat([z1, z2], n)).reshape(2, n)
+                fp = self.__combine(reflection, up1, up2, D[0], D[1]) - r
+            if(np.all(np.abs(fp) < precision)):
+                break
+            left = np.sign(fp) == np.sign(fa)
+            # Illinois modification: halve the function value of the side that was kept twice in a row
+            a = np.where(left, p, a)
+            fa = np.where(left, fp, np.where(side == 1, 0.5 * fa, fa))
+            b = np.where(~left, p, b)
+            fb = np.where(~left, fp, np.where(side == -1, 0.5 * fb, fb))
+            side = np.where(left, -1, 1)
+        else:
+            self.__logger.warning(f"root finder did not converge within {max_iter:d} iterations, max deviation = {np.max(np.abs(fp)) / units.m:.2g}m")
+
+        solutions = []
+        for i in range(n):
+            if(np.isnan(fp[i]) or np.abs(fp[i]) > 1 * units.cm):
+                continue
+            solutions.append({'p': p[i], 'reflection': reflection[i], 'up1': up1[i], 'up2': up2[i]})
+        return solutions
+
+    def get_solution_type(self, p, reflection, up1, up2):
+        """
+        returns the solution type (1: direct, 2: refracted, 3: reflected off the surface)
+
+        As for the analytic ray tracer, rays with bottom reflections are classified as refracted or reflected
+        depending on whether they would turn around below the surface or reflect off the surface.
+        """
+        n_top = reflection + int(up1) - int(up2)
+        if(n_top == 0 and reflection == 0):
+            return 1
+        if(p < self.__n_surface):
+            return 3
+        return 2
+
+    def get_integral_along_path(self, p, z1, z2, reflection, up1, up2, numerator):
+        """
+        integrates numerator(z, n) * ds / n along the ray path
+        """
+        waypoints, n_top = self.get_waypoints(p, z1, z2, reflection, up1, up2)
+        values = self.__integrate(np.full(len(waypoints), p), np.array(waypoints), numerator)
+        return np.sum(np.abs(np.diff(values, axis=0)), axis=0)
+
+    def get_path_length(self, p, z1, z2, reflection, up1, up2):
+        return self.get_integral_along_path(p, z1, z2, reflection, up1, up2, lambda zz, nn, pp: nn)
+
+    def get_travel_time(self, p, z1, z2, reflection, up1, up2):
+        return self.get_integral_along_path(p, z1, z2, reflection, up1, up2, lambda zz, nn, pp: nn ** 2 / speed_of_light)
+
+    def get_attenuation_along_path(self, p, z1, z2, reflection, up1, up2, frequency, attenuation_model):
+        """
+        calculates the attenuation factor for an array of frequencies
+        """
+
+        def numerator(zz, nn, pp):
+            return np.stack([nn / attenuation_util.get_attenuation_length(zz, f, attenuation_model) for f in frequency], axis=-1)
+
+        return np.exp(-1 * self.get_integral_along_path(p, z1, z2, reflection, up1, up2, numerator))
+
+    def get_path(self, p, z1, z2, reflection, up1, up2, n_points=1000):
+        """
+        calculates the ray path
+
+        Returns
+        -------
+        yy: array
+            the horizontal distances from the start point
+        zz: array
+            the z coordinates of the ray tracing path
+        """
+        waypoints, n_top = self.get_waypoints(p, z1, z2, reflection, up1, up2)
+        yy = []
+        zz = []
+        y_start = 0
+        for z_start, z_stop in zip(waypoints[:-1], waypoints[1:]):
+            z = np.linspace(z_start, z_stop, n_points)
+            D = self.get_horizontal_distance(np.full(n_points, p), z)
+            yy.append(y_start + np.abs(D - D[0]))
+            zz.append(z)
+            y_start = yy[-1][-1]
+        return np.concatenate(yy), np.concatenate(zz)
+
+
+class ray_tracing:
+    """
+    utility class (wrapper around the 2D numerical ray tracing code) to get
+    ray tracing solutions in 3D for two arbitrary points x1 and x2
+    """
+    solution_types = {1: 'direct',
+                      2: 'refracted',
+                      3: 'reflected'}
+
+    def __init__(self, x1, x2, medium, attenuation_model="SP1", log_level=logging.WARNING,
+                 n_frequencies_integration=100,
+                 n_reflections=0):
+        """
+        class initilization
+
+        Parameters
+        ----------
+        x1: 3dim np.array
+            start point of the ray
+        x2: 3dim np.array
+            stop point of the ray
+        medium: medium class
+            class describing the index-of-refraction profile
+        attenuation_model: string
+            signal attenuation model
+        log_level: logging object
+            specify the log level of the ray tracing class
+            * logging.ERROR
+            * logging.WARNING
+            * logging.INFO
+            * logging.DEBUG
+            default is WARNING
+        n_frequencies_integration: int
+            the number of frequencies for which the frequency dependent attenuation
+            length is being calculated. The attenuation length for all other frequencies
+            is obtained via linear interpolation.
+
+        n_reflections: int (default 0)
+            in case of a medium with a reflective layer at the bottom, how many reflections should be considered
+
+        """
+        self.__X1 = np.array(x1, dtype=float)
+        self.__X2 = np.array(x2, dtype=float)
+        self.__logger = logging.getLogger('numerical_ray_tracing')
+        self.__logger.setLevel(log_level)
+        self.__medium = medium
+        self.__attenuation_model = attenuation_model
+        self.__n_frequencies_integration = n_frequencies_integration
+        if(n_reflections):
+            if(not hasattr(self.__medium, "reflection") or self.__medium.reflection is None):
+                self.__logger.warning("ray paths with bottom reflections requested medium does not have any reflective layer, setting number of reflections to zero.")
+                n_reflections = 0
+        self.__n_reflections = n_reflections
+        if(n_reflections):
+            if(self.__X1[2] < self.__medium.reflection or self.__X2[2] < self.__medium.reflection):
+                self.__logger.error("start or stop point is below the reflective layer at {:.1f}m".format(self.__medium.reflection / units.m))
+                raise AttributeError("start or stop point is below the reflective layer at {:.1f}m".format(self.__medium.reflection / units.m))
+
+        dX = self.__X2 - self.__X1
+        self.__r = np.linalg.norm(dX[:2])
+        self.__horizontal_direction = np.array([1., 0, 0])
+        if(self.__r > 0):
+            self.__horizontal_direction = np.array([dX[0], dX[1], 0]) / self.__r
+        if(medium not in _ray_tracers_2D):
+            _ray_tracers_2D[medium] = ray_tracing_2D(medium, log_level=log_level)
+        self.__r2d = _ray_tracers_2D[medium]
+        self.__results = []
+
+    def set_solution(self, C0s, C1s, solution_types, reflection=None, reflection_case=None):
+        """
+        sets the solutions from a previous ray tracing. As for the analytic ray tracer, C0 is the inverse of the
+        ray parameter n * sin(theta). C1 is +1 (-1) if the ray arrives upwards (downwards) at x2.
+        """
+        results = []
+        if(reflection is None):
+            reflection = np.zeros_like(C0s, dtype=int)
+            reflection_case = np.ones_like(C0s, dtype=int)
+        for i in range(len(C0s)):
+            if(not np.isnan(C0s[i])):
+                results.append({'type': solution_types[i],
+                                'C0': C0s[i],
+                                'C1': C1s[i],
+                                'reflection': reflection[i],
+                                'reflection_case': reflection_case[i]})
+        self.__results = results
+
+    def find_solutions(self):
+        """
+        find all solutions between x1 and x2
+        """
+        results = []
+        for solution in self.__r2d.find_solutions(self.__X1[2], self.__X2[2], self.__r, n_reflections=self.__n_reflections):
+            results.append({'type': self.__r2d.get_solution_type(solution['p'], solution['reflection'], solution['up1'], solution['up2']),
+                            'C0': 1. / solution['p'],
+                            'C1': 1. if solution['up2'] else -1.,
+                            'reflection': solution['reflection'],
+                            'reflection_case': 1 if solution['up1'] else 2})
+        self.__results = sorted(results, key=lambda x: x['type'])
+
+        # check if not too many solutions were found (the same solution can potentially found twice because of numerical imprecision)
+        if(self.get_number_of_solutions() > (2 + 4 * self.__n_reflections)):
+            self.__logger.error(f"{self.get_number_of_solutions()} were found but only {(2 + 4 * self.__n_reflections)} are allowed! Returning zero solutions")
+            self.__results = []
+
+    def has_solution(self):
+        """
+        checks if ray tracing solution exists
+        """
+        return len(self.__results) > 0
+
+    def get_number_of_solutions(self):
+        """
+        returns the number of solutions
+        """
+        return len(self.__results)
+
+    def get_results(self):
+        """
+        returns dictionary of results (C0 is the inverse of the ray parameter n * sin(theta), C1 is +1 (-1) if the
+        ray arrives upwards (downwards) at x2)
+        """
+        return self.__results
+
+    def get_solution_type(self, iS):
+        """ returns the type of the solution
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+
+        Returns
+        -------
+        solution_type: int
+            * 1: 'direct'
+            * 2: 'refracted'
+            * 3: 'reflected
+        """
+        return self.__get_result(iS)['type']
+
+    def __get_result(self, iS):
+        n = self.get_number_of_solutions()
+        if(iS >= n):
+            self.__logger.error("solution number {:d} requested but only {:d} solutions exist".format(iS + 1, n))
+            raise IndexError
+        return self.__results[iS]
+
+    def __get_parameters(self, iS):
+        result = self.__get_result(iS)
+        return (1. / result['C0'], self.__X1[2], self.__X2[2], result['reflection'], result['reflection_case'] == 1,
+                result['C1'] > 0)
+
+    def get_path(self, iS, n_points=1000):
+        """
+        helper function that returns the 3D ray tracing path of solution iS
+
+        Parameters
+        ----------
+        iS: int
+            ray tracing solution
+        n_points: int
+            number of points of each path segment
+        """
+        yy, zz = self.__r2d.get_path(*self.__get_parameters(iS), n_points=n_points)
+        path = self.__X1[None, :] + yy[:, None] * self.__horizontal_direction[None, :]
+        path[:, 2] = zz
+        return path
+
+    def get_paths(self, n_points=1000):
+        """
+        helper function that returns the 3D ray tracing paths of all solutions
+        """
+        return [self.get_path(iS, n_points) for iS in range(self.get_number_of_solutions())]
+
+    def get_launch_vector(self, iS):
+        """
+        calculates the launch vector (in 3D) of solution iS
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+
+        Returns
+        -------
+        launch_vector: 3dim np.array
+            the launch vector
+        """
+        p, z1, z2, reflection, up1, up2 = self.__get_parameters(iS)
+        sin_theta = p / self.__r2d.n(z1)
+        cos_theta = (1 - sin_theta ** 2) ** 0.5
+        if(not up1):
+            cos_theta *= -1
+        return sin_theta * self.__horizontal_direction + np.array([0, 0, cos_theta])
+
+    def get_receive_vector(self, iS):
+        """
+        calculates the receive vector (in 3D) of solution iS
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+
+        Returns
+        -------
+        receive_vector: 3dim np.array
+            the receive vector
+        """
+        p, z1, z2, reflection, up1, up2 = self.__get_parameters(iS)
+        sin_theta = p / self.__r2d.n(z2)
+        cos_theta = (1 - sin_theta ** 2) ** 0.5
+        if(not up2):
+            cos_theta *= -1
+        return -1 * (sin_theta * self.__horizontal_direction + np.array([0, 0, cos_theta]))
+
+    def get_reflection_angle(self, iS):
+        """
+        calculates the angle of reflection at the surface (in case of a reflected ray)
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+
+        Returns
+        -------
+        reflection_angle: float or None
+            the reflection angle (for reflected rays) or None for direct and refracted rays. If the ray reflects
+            more than once off the surface, an array with one reflection angle for each reflection is returned.
+        """
+        p, z1, z2, reflection, up1, up2 = self.__get_parameters(iS)
+        if(self.get_solution_type(iS) != 3):
+            return None
+        waypoints, n_top = self.__r2d.get_waypoints(p, z1, z2, reflection, up1, up2)
+        return np.squeeze([np.arcsin(p / self.__r2d.get_surface_index_of_refraction())] * n_top)
+
+    def get_path_length(self, iS, analytic=True):
+        """
+        calculates the path length of solution iS
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+
+        analytic: bool
+            not used, the path length is always calculated numerically
+
+        Returns
+        -------
+        distance: float
+            distance from x1 to x2 along the ray path
+        """
+        return self.__r2d.get_path_length(*self.__get_parameters(iS))
+
+    def get_travel_time(self, iS, analytic=True):
+        """
+        calculates the travel time of solution iS
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+
+        analytic: bool
+            not used, the travel time is always calculated numerically
+
+        Returns
+        -------
+        time: float
+            travel time
+        """
+        return self.__r2d.get_travel_time(*self.__get_parameters(iS))
+
+    def get_attenuation(self, iS, frequency, max_detector_freq=None, filter_response=None, tolerance=1e-3):
+        """
+        calculates the signal attenuation due to attenuation in the medium (ice)
+
+        The attenuation is calculated for `n_frequencies_integration` reference frequencies (in a single
+        vectorized integration) and linearly interpolated for all other frequencies.
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+
+        frequency: array of floats
+            the frequencies for which the attenuation is calculated
+
+        max_detector_freq: float or None
+            the maximum frequency of the final detector sampling. If given, the reference frequencies are placed
+            below this frequency (and only a few above)
+
+        filter_response: array of floats or None (default None)
+            the (absolute) response of the detector at `frequency`. If given, the reference frequencies are placed
+            where the detector response (normalized to one) is larger than `tolerance`.
+
+        tolerance: float (default 1e-3)
+            only used if `filter_response` is given: the threshold of the normalized detector response that defines
+            the frequency range of the reference frequencies. It doesn't bound the interpolation error. If the
+            detector response is nowhere larger than `tolerance`, the full frequency range is used.
+
+        Returns
+        -------
+        attenuation: array of floats
+            the fraction of the signal that reaches the observer
+            (only ice attenuation, the 1/R signal falloff not considered here)
+        """
+        mask = frequency > 0
+        f_min = frequency[mask].min()
+        f_max = frequency[mask].max()
+        f_detector = f_max
+        if(filter_response is not None):
+            weights = np.abs(filter_response[mask])
+            if(weights.max() > 0):
+                weights = weights / weights.max()
+            passband = frequency[mask][weights > tolerance]
+            if(len(passband) == 0):
+                # no detector response above `tolerance`, the reference frequencies span the full frequency range
+                passband = np.array([f_min, f_max])
+            f_min = passband.min()
+            f_detector = passband.max()
+        elif(max_detector_freq is not None):
+            f_detector = min(max_detector_freq, f_max)
+        freqs = np.linspace(f_min, f_detector, self.__n_frequencies_integration)
+        freqs = np.unique(np.concatenate([frequency[mask][:1], freqs,
+                                          np.linspace(f_detector, f_max, self.__n_frequencies_integration // 2 + 2)]))
+        tmp = self.__r2d.get_attenuation_along_path(*self.__get_parameters(iS), freqs, self.__attenuation_model)
+        attenuation = np.ones_like(frequency)
+        attenuation[mask] = np.interp(frequency[mask], freqs, tmp)
+        return attenuation
+
+    def get_focusing(self, iS, dz, limit=2.):
+        """
+        calculate the focusing effect in the medium
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+
+        dz: float
+            the infinitesimal change of the depth of the receiver, 1cm by default
+
+        Returns
+        -------
+        focusing: a float
+            gain of the signal at the receiver due to the focusing effect:
+        """
+        recVec = -1.0 * self.get_receive_vector(iS)
+        recAng = np.arccos(recVec[2] / np.linalg.norm(recVec))
+        lauVec = self.get_launch_vector(iS)
+        lauAng = np.arccos(lauVec[2] / np.linalg.norm(lauVec))
+        distance = self.get_path_length(iS)
+        recPos1 = np.array([self.__X2[0], self.__X2[1], self.__X2[2] + dz])
+        if(not hasattr(self, "_r1")):
+            self._r1 = ray_tracing(self.__X1, recPos1, self.__medium, self.__attenuation_model, logging.WARNING,
+                                   self.__n_frequencies_integration, self.__n_reflections)
+            self._r1.find_solutions()
+        if iS < self._r1.get_number_of_solutions():
+            lauVec1 = self._r1.get_launch_vector(iS)
+            lauAng1 = np.arccos(lauVec1[2] / np.linalg.norm(lauVec1))
+            focusing = np.sqrt(distance / np.sin(recAng) * np.abs((lauAng1 - lauAng) / dz))
+            if(self.get_solution_type(iS) != self._r1.get_solution_type(iS)):
+                self.__logger.error("solution types are not the same")
+        else:
+            focusing = 1.0
+            self.__logger.info("too few ray tracing solutions, setting focusing factor to 1")
+        self.__logger.debug(f'amplification due to focusing of solution {iS:d} = {focusing:.3f}')
+        if(focusing > limit):
+            self.__logger.info(f"amplification due to focusing is {focusing:.1f}x -> limiting amplification factor to {limit:.1f}x")
+            focusing = limit
+
+        # now also correct for differences in refractive index between emitter and receiver position
+        n1 = self.__r2d.n(self.__X1[2])  # emitter
+        n2 = self.__r2d.n(self.__X2[2])  # receiver
+        return focusing * (n1 / n2) ** 0.5
+
+    def get_ray_path(self, iS):
+        return self.__r2d.get_path(*self.__get_parameters(iS), n_points=10000)
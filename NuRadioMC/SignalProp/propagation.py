@@ -11,9 +11,13 @@ def get_propagation_module(name='analytic'):
     ----------
     name: string
         * analytic: analytic ray tracer
+        * numerical: numerical ray tracer for arbitrary index-of-refraction profiles n(z)
     """
     if(name=='analytic'):
         from NuRadioMC.SignalProp.analyticraytracing import ray_tracing
         return ray_tracing
+    elif(name=='numerical'):
+        from NuRadioMC.SignalProp.numericalraytracing import ray_tracing
+        return ray_tracing
     else:
         raise NotImplementedError("module {} not implemented".format(name))
@@ -102,6 +102,17 @@ class ray_tracing_base:
         """
         pass
 
+    def get_paths(self, n_points=1000):
+        """
+        helper function that returns the 3D ray tracing paths of all solutions
+
+        Parameters
+        ----------
+        n_points: int
+            number of points of path
+        """
+        return [self.get_path(iS, n_points) for iS in range(self.get_number_of_solutions())]
+
 
     def get_launch_vector(self, iS):
         """
@@ -194,7 +205,7 @@ class ray_tracing_base:
         """
         pass
 
-    def get_attenuation(self, iS, frequency, max_detector_freq=None):
+    def get_attenuation(self, iS, frequency, max_detector_freq=None, filter_response=None, tolerance=1e-3):
         """
         calculates the signal attenuation due to attenuation in the medium (ice)
 
@@ -212,6 +223,14 @@ class ray_tracing_base:
             (the simulation is internally run with a higher sampling rate, but the relevant part of the attenuation length
             calculation is the frequency interval visible by the detector, hence a finer calculation is more important)
 
+        filter_response: array of floats or None
+            the (absolute) response of the detector at `frequency`. If given, the attenuation only needs to be accurate
+            where the detector is sensitive.
+
+        tolerance: float
+            the maximum allowed error of the attenuation weighted with the normalized detector response
+            (only used if `filter_response` is given)
+
         Returns
         -------
         attenuation: array of floats
@@ -242,7 +242,7 @@ for key, station in iteritems(fin):
 
         # calculate correct chereknov angle for ice density at vertex position
         ice = medium.southpole_simple()
-        n_indexs = np.array([ice.get_index_of_refraction(x) for x in np.array([np.array(fin['xx'])[triggered], np.array(fin['yy'])[triggered], np.array(fin['zz'])[triggered]]).T])
+        n_indexs = ice.get_index_of_refraction(np.array([np.array(fin['xx'])[triggered], np.array(fin['yy'])[triggered], np.array(fin['zz'])[triggered]]).T)
         rho = np.arccos(1. / n_indexs)
 
         mask = ~np.isnan(viewing_angles)
@@ -172,7 +172,7 @@ viewing_angles_d = np.array([hp.get_angle(x, y) for x, y in zip(shower_axis, lau
 viewing_angles_r = np.array([hp.get_angle(x, y) for x, y in zip(shower_axis, launch_vectors[:, 0, 1])])
 # calculate correct chereknov angle for ice density at vertex position
 ice = medium.southpole_simple()
-n_indexs = np.array([ice.get_index_of_refraction(x) for x in np.array([xx, yy, zz]).T])
+n_indexs = ice.get_index_of_refraction(np.array([xx, yy, zz]).T)
 rho = np.arccos(1. / n_indexs)
 weightsExt = weights
 for chan in range(1, len(launch_vectors[0])):
@@ -5,6 +5,7 @@ from radiotools import coordinatesystems as cstrans
 from NuRadioMC.SignalGen import askaryan as signalgen
 from NuRadioReco.utilities import units
 from NuRadioMC.utilities import medium
+from NuRadioMC.utilities import hdf5_schema
 from NuRadioReco.utilities import fft
 from NuRadioMC.utilities.earth_attenuation import get_weight
 from NuRadioMC.SignalProp import propagation
@@ -240,6 +241,8 @@ class simulation():
         # perfom a dummy detector simulation to determine how the signals are filtered
         self._bandwidth_per_channel = {}
         self._amplification_per_channel = {}
+        self._filter_response_per_channel = {}  # the absolute detector response at the frequencies of self._ff
+        self._surface_index_of_refraction_per_channel = {}  # the index of refraction right below the surface above each channel
         self.__noise_adder_normalization = {}
 
         # first create dummy event and station with channels
@@ -278,6 +281,7 @@ class simulation():
             self._detector_simulation_filter_amp(self._evt, self._station, self._det)
             self._bandwidth_per_channel[self._station_id] = {}
             self._amplification_per_channel[self._station_id] = {}
+            self._filter_response_per_channel[self._station_id] = {}
             for channel_id in range(self._det.get_number_of_channels(self._station_id)):
                 ff = np.linspace(0, 0.5 / self._dt, 10000)
                 filt = np.ones_like(ff, dtype=np.complex)
@@ -286,10 +290,19 @@ class simulation():
                         filt *= instance.get_filter(ff, self._station_id, channel_id, self._det, **kwargs)
 
                 self._amplification_per_channel[self._station_id][channel_id] = np.abs(filt).max()
+                self._filter_response_per_channel[self._station_id][channel_id] = np.interp(self._ff, ff, np.abs(filt))
                 bandwidth = np.trapz(np.abs(filt) ** 2, ff)
                 self._bandwidth_per_channel[self._station_id][channel_id] = bandwidth
                 logger.status(f"bandwidth of station {self._station_id} channel {channel_id} is {bandwidth/units.MHz:.1f}MHz")
 
+            # the index of refraction at the surface is needed for the Fresnel coefficients of surface reflections,
+            # we calculate it for all channels of the station at once
+            channel_ids = range(self._det.get_number_of_channels(self._station_id))
+            surface_positions = np.array([self._det.get_relative_position(self._station_id, channel_id) + self._det.get_absolute_position(self._station_id)
+                                          for channel_id in channel_ids]).reshape(-1, 3)
+            surface_positions[:, 2] = -1 * units.cm
+            self._surface_index_of_refraction_per_channel[self._station_id] = dict(zip(channel_ids, self._ice.get_index_of_refraction(surface_positions)))
+
         ################################
 
         self._bandwidth = next(iter(next(iter(self._bandwidth_per_channel.values())).values()))
@@ -373,7 +386,6 @@ class simulation():
         electricFieldResampler = NuRadioReco.modules.electricFieldResampler.electricFieldResampler()
         if(self._outputfilenameNuRadioReco is not None):
             self._eventWriter.begin(self._outputfilenameNuRadioReco)
-        unique_event_group_ids = np.unique(self._fin['event_group_ids'])
         self._n_showers = len(self._fin['event_group_ids'])
         self._shower_ids = np.array(self._fin['shower_ids'])
         self._shower_index_array = {}  # this array allows to convert the shower id to an index that starts from 0 to be used to access the arrays in the hdf5 file.
@@ -408,44 +420,62 @@ class simulation():
                 pos.append(self._det.get_relative_position(station_id, channel_id))
             self._station_barycenter[iSt] = np.mean(np.array(pos), axis=0) + self._det.get_absolute_position(station_id)
 
+        # the weight calculation is independent of the station, so we calculate the weights of all event groups
+        # at once before the main loop. The weight also depends just on the "mother" particle, i.e. the incident
+        # neutrino which determines the propability of arriving at our simulation volume. All subsequent showers
+        # have the same weight.
+        t1 = time.time()
+        event_group_ids = np.asarray(self._fin['event_group_ids'])
+        unique_event_group_ids, mother_indices, event_group_inverse = np.unique(event_group_ids, return_index=True, return_inverse=True)
+        mother_weights = np.zeros(len(unique_event_group_ids))
+        selected = np.ones(len(unique_event_group_ids), dtype=bool)
+        if(self._event_group_list is not None):
+            selected = np.isin(unique_event_group_ids, self._event_group_list)
+        if(np.any(selected)):
+            iE_mothers = mother_indices[selected]
+            x_int_mothers = np.array([np.asarray(self._fin['xx'])[iE_mothers],
+                                      np.asarray(self._fin['yy'])[iE_mothers],
+                                      np.asarray(self._fin['zz'])[iE_mothers]]).T
+            mother_weights[selected] = get_weight(np.asarray(self._fin['zeniths'])[iE_mothers],
+                                                  np.asarray(self._fin['energies'])[iE_mothers],
+                                                  np.asarray(self._fin['flavors'])[iE_mothers],
+                                                  mode=self._cfg['weights']['weight_mode'],
+                                                  cross_section_type=self._cfg['weights']['cross_section_type'],
+                                                  vertex_position=x_int_mothers,
+                                                  phi_nu=np.asarray(self._fin['azimuths'])[iE_mothers])
+        self._mout['weights'] = mother_weights[event_group_inverse]
+        # skip all events where neutrino weights is zero, i.e., do not
+        # simulate neutrino that propagate through the Earth
+        simulate_event_group = selected & (mother_weights >= self._cfg['speedup']['minimum_weight_cut'])
+        logger.info(f"{np.sum(selected & ~simulate_event_group)} event groups are skipped because the neutrino weight is smaller than {self._cfg['speedup']['minimum_weight_cut']}")
+        weightTime += time.time() - t1
+
+        # calculate the index of refraction at the vertex positions of all showers at once
+        # (needed for the cherenkov angle and the Askaryan signal)
+        vertex_positions_showers = np.array([np.asarray(self._fin['xx']),
+                                             np.asarray(self._fin['yy']),
+                                             np.asarray(self._fin['zz'])]).T
+        n_indices_showers = self._ice.get_index_of_refraction(vertex_positions_showers)
+
         # loop over event groups
         for i_event_group_id, event_group_id in enumerate(unique_event_group_ids):
             logger.debug(f"simulating event group id {event_group_id}")
             if(self._event_group_list is not None and event_group_id not in self._event_group_list):
                 logger.debug(f"skipping event group {event_group_id} because it is not in the event group list provided to the __init__ function")
                 continue
-            event_indices = np.atleast_1d(np.squeeze(np.argwhere(self._fin['event_group_ids'] == event_group_id)))
-
-            # the weight calculation is independent of the station, so we do this calculation only once
-            # the weight also depends just on the "mother" particle, i.e. the incident neutrino which determines
-            # the propability of arriving at our simulation volume. All subsequent showers have the same weight. So
-            # we calculate it just once and save it to all subshowers.
-            t1 = time.time()
-            iE_mother = event_indices[0]
-            x_int_mother = np.array([self._fin['xx'][iE_mother], self._fin['yy'][iE_mother], self._fin['zz'][iE_mother]])
-            self._mout['weights'][event_indices] = get_weight(self._fin['zeniths'][iE_mother],
-                                                         self._fin['energies'][iE_mother],
-                                                         self._fin['flavors'][iE_mother],
-                                                         mode=self._cfg['weights']['weight_mode'],
-                                                         cross_section_type=self._cfg['weights']['cross_section_type'],
-                                                         vertex_position=x_int_mother,
-                                                         phi_nu=self._fin['azimuths'][iE_mother])
-
-            weightTime += time.time() - t1
-            # skip all events where neutrino weights is zero, i.e., do not
-            # simulate neutrino that propagate through the Earth
-            if(self._mout['weights'][iE_mother] < self._cfg['speedup']['minimum_weight_cut']):
+            if(not simulate_event_group[i_event_group_id]):
                 logger.debug("neutrino weight is smaller than {}, skipping event".format(self._cfg['speedup']['minimum_weight_cut']))
                 continue
+            event_indices = np.atleast_1d(np.squeeze(np.argwhere(event_group_ids == event_group_id)))
+
+            vertex_positions = vertex_positions_showers[event_indices]
+            n_indices = n_indices_showers[event_indices]
 
             # these quantities get computed to apply the distance cut as a function of shower energies
             # the shower energies of closeby showers will be added as they can constructively interfere
             if self._cfg['speedup']['distance_cut']:
                 t_tmp = time.time()
-                shower_energies = np.array(self._fin['shower_energies'])[event_indices]
-                vertex_positions = np.array([np.array(self._fin['xx'])[event_indices],
-                                             np.array(self._fin['yy'])[event_indices],
-                                             np.array(self._fin['zz'])[event_indices]]).T
+                shower_energies = np.asarray(self._fin['shower_energies'])[event_indices]
                 vertex_distances = np.linalg.norm(vertex_positions - vertex_positions[0], axis=1)
                 distance_cut_time += time.time() - t_tmp
 
@@ -555,7 +585,7 @@ class simulation():
                     self._shower_axis = -1 * hp.spherical_to_cartesian(self._zenith_shower, self._azimuth_shower)
 
                     # calculate correct chereknov angle for ice density at vertex position
-                    n_index = self._ice.get_index_of_refraction(x1)
+                    n_index = n_indices[iSh]
                     cherenkov_angle = np.arccos(1. / n_index)
 
                     # first step: perform raytracing to see if solution exists
@@ -693,7 +723,12 @@ class simulation():
                             # apply frequency dependent attenuation
                             t_att = time.time()
                             if self._cfg['propagation']['attenuate_ice']:
-                                attn = r.get_attenuation(iS, self._ff, 0.5 * self._sampling_rate_detector)
+                                if(self._cfg['propagation']['attenuation_tolerance'] is None):
+                                    attn = r.get_attenuation(iS, self._ff, 0.5 * self._sampling_rate_detector)
+                                else:
+                                    attn = r.get_attenuation(iS, self._ff, 0.5 * self._sampling_rate_detector,
+                                                             filter_response=self._filter_response_per_channel[self._station_id][channel_id],
+                                                             tolerance=self._cfg['propagation']['attenuation_tolerance'])
                                 spectrum *= attn
                             time_attenuation_length += (time.time() - t_att)
 
@@ -739,10 +774,11 @@ class simulation():
                             for zenith_reflection in zenith_reflections:  # loop through all possible reflections
                                 if(zenith_reflection is None):  # skip all ray segments where not reflection at surface happens
                                     continue
+                                n_surface = self._surface_index_of_refraction_per_channel[self._station_id][channel_id]
                                 r_theta = geo_utl.get_fresnel_r_p(
-                                    zenith_reflection, n_2=1., n_1=self._ice.get_index_of_refraction([x2[0], x2[1], -1 * units.cm]))
+                                    zenith_reflection, n_2=1., n_1=n_surface)
                                 r_phi = geo_utl.get_fresnel_r_s(
-                                    zenith_reflection, n_2=1., n_1=self._ice.get_index_of_refraction([x2[0], x2[1], -1 * units.cm]))
+                                    zenith_reflection, n_2=1., n_1=n_surface)
 
                                 eTheta *= r_theta
                                 ePhi *= r_phi
@@ -1094,10 +1130,8 @@ class simulation():
                 for key2, value2 in iteritems(value):
                     self._fin_stations[key][key2] = np.array(value2)
             else:
-                if len(value) and type(value[0]) == bytes:
-                    self._fin[key] = np.array(value).astype('U')
-                else:
-                    self._fin[key] = np.array(value)
+                # converts enums and strings to unicode strings, independent of the schema version of the file
+                self._fin[key] = hdf5_schema.read_dataset(value)
         for key, value in iteritems(fin.attrs):
             self._fin_attrs[key] = value
         fin.close()
@@ -1398,11 +1432,9 @@ class simulation():
                 if(key.startswith("station_")):
                     continue
                 if(not key in fout.keys()):  # only save data sets that havn't been recomputed and saved already
-                    if self._fin[key].dtype.char == 'U':
-                        fout[key] = np.array(self._fin[key], dtype=h5py.string_dtype(encoding='utf-8'))[saved]
-
-                    else:
-                        fout[key] = np.array(self._fin[key])[saved]
+                    # the input data sets are saved in the same format as in the input file
+                    hdf5_schema.write_dataset(fout, key, np.array(self._fin[key])[saved],
+                                              schema_version=hdf5_schema.get_schema_version(self._fin_attrs))
 
         for key in self._fin_attrs.keys():
             if(not key in fout.attrs.keys()):  # only save atrributes sets that havn't been recomputed and saved already
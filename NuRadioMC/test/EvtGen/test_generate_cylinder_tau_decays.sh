@@ -0,0 +1,6 @@
+set -e
+FILE=NuRadioMC/test/EvtGen/test_tau_decays.hdf5
+if test -f "$FILE"; then
+	rm $FILE
+fi
+python NuRadioMC/EvtGen/generate_cylinder.py $FILE 1000 1e18 1e18 0 3000 -2700 0 --flavor 16 -16 --tabulated_tau_decays
\ No newline at end of file
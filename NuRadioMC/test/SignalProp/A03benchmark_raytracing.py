@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function
+import argparse
+import json
+import logging
+import sys
+import time
+import numpy as np
+from NuRadioMC.SignalProp import analyticraytracing as ray
+from NuRadioMC.utilities import medium
+from NuRadioReco.utilities import units
+logging.basicConfig()
+logger = logging.getLogger('benchmark_raytracing')
+logger.setLevel(logging.INFO)
+
+"""
+benchmark of the hot path of the analytic ray tracer
+
+The execution time of `find_solutions`, `get_attenuation`, `get_travel_time`, `get_path_length` and
+`get_focusing` is measured for different ice models and for both the C++ and the python implementation.
+The results are written to a json file. If a reference json file is given, the timings are compared to the
+reference and the script exits with a non-zero exit code if a function got slower than the specified tolerance.
+
+example:
+python A03benchmark_raytracing.py --output benchmark.json
+python A03benchmark_raytracing.py --output benchmark_new.json --reference benchmark.json --tolerance 0.2
+"""
+
+# name of ice model -> number of bottom reflections that are considered
+media = {'southpole_2015': 0,
+         'mooresbay_simple': 1,
+         'greenland_simple': 0}
+
+functions = ['find_solutions', 'get_attenuation', 'get_travel_time', 'get_path_length', 'get_focusing']
+
+
+def get_points(n_events, seed=0):
+    """
+    returns reproducible random emitter positions and a receiver position
+    """
+    rnd = np.random.RandomState(seed)
+    rr = rnd.triangular(50. * units.m, 1. * units.km, 1. * units.km, n_events)
+    phiphi = rnd.uniform(0, 2 * np.pi, n_events)
+    zz = rnd.uniform(0, -0.5 * units.km, n_events)
+    points = np.array([rr * np.cos(phiphi), rr * np.sin(phiphi), zz]).T
+    return points, np.array([0., 0., -50. * units.m])
+
+
+def benchmark(ice_model, n_reflections, n_events, n_freqs=2049, sampling_rate=5 * units.GHz,
+              max_detector_freq=0.5 * units.GHz, n_frequencies_integration=25):
+    """
+    measures the execution time of the ray tracing functions for one ice model using the
+    currently selected implementation (C++ or python). The default settings correspond to the
+    default settings of a NuRadioMC simulation.
+
+    Returns
+    -------
+    dictionary of function name -> dictionary with the number of calls, the total time (in seconds)
+    and the time per call (in ms)
+    """
+    ice = medium.get_ice_model(ice_model)
+    points, x_receiver = get_points(n_events)
+    ff = np.fft.rfftfreq(2 * (n_freqs - 1), 1. / sampling_rate)
+    timing = {key: 0. for key in functions}
+    n_calls = {key: 0 for key in functions}
+    for x in points:
+        r = ray.ray_tracing(x, x_receiver, ice, n_frequencies_integration=n_frequencies_integration,
+                            n_reflections=n_reflections)
+        t = time.perf_counter()
+        r.find_solutions()
+        timing['find_solutions'] += time.perf_counter() - t
+        n_calls['find_solutions'] += 1
+        for iS in range(r.get_number_of_solutions()):
+            t = time.perf_counter()
+            r.get_attenuation(iS, ff, max_detector_freq)
+            timing['get_attenuation'] += time.perf_counter() - t
+            t = time.perf_counter()
+            r.get_travel_time(iS)
+            timing['get_travel_time'] += time.perf_counter() - t
+            t = time.perf_counter()
+            r.get_path_length(iS)
+            timing['get_path_length'] += time.perf_counter() - t
+            t = time.perf_counter()
+            r.get_focusing(iS, -0.01 * units.m)
+            timing['get_focusing'] += time.perf_counter() - t
+            for key in functions[1:]:
+                n_calls[key] += 1
+    results = {}
+    for key in functions:
+        results[key] = {'n_calls': n_calls[key],
+                        'total_time': timing[key],
+                        'time_per_call': 1000. * timing[key] / max(n_calls[key], 1)}
+    return results
+
+
+def compare(results, reference, tolerance):
+    """
+    compares the time per call to a reference and returns a list of all regressions
+    """
+    regressions = []
+    for backend in results:
+        for ice_model in results[backend]:
+            for key, value in results[backend][ice_model].items():
+                try:
+                    ref = reference['results'][backend][ice_model][key]['time_per_call']
+                except KeyError:
+                    continue
+                ratio = value['time_per_call'] / ref if ref > 0 else 1.
+                logger.info(f"{backend:>6} {ice_model:>16} {key:>15}: {value['time_per_call']:.3f}ms/call (reference {ref:.3f}ms/call, ratio {ratio:.2f})")
+                if(ratio > 1 + tolerance):
+                    regressions.append(f"{backend} {ice_model} {key}: {ratio:.2f}x slower than reference")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='benchmark of the analytic ray tracer')
+    parser.add_argument('--n_events', type=int, default=100, help='number of random emitter positions per ice model')
+    parser.add_argument('--output', type=str, default='benchmark_raytracing.json', help='output json file')
+    parser.add_argument('--reference', type=str, default=None, help='json file of a previous benchmark to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative increase of the execution time compared to the reference')
+    parser.add_argument('--backends', nargs='+', default=['cpp', 'python'], choices=['cpp', 'python'],
+                        help='implementations of the ray tracer to benchmark')
+    parser.add_argument('--media', nargs='+', default=list(media.keys()), choices=list(media.keys()),
+                        help='ice models to benchmark')
+    args = parser.parse_args()
+
+    cpp_available = ray.cpp_available
+    output = {'n_events': args.n_events,
+              'numpy_version': np.__version__,
+              'python_version': sys.version.split()[0],
+              'results': {}}
+    for backend in args.backends:
+        if(backend == 'cpp' and not cpp_available):
+            logger.warning("C++ implementation of the ray tracer is not available, skipping")
+            continue
+        ray.cpp_available = backend == 'cpp'
+        output['results'][backend] = {}
+        for ice_model in args.media:
+            logger.info(f"benchmarking {backend} implementation for {ice_model} ice model")
+            output['results'][backend][ice_model] = benchmark(ice_model, media[ice_model], args.n_events)
+            for key, value in output['results'][backend][ice_model].items():
+                logger.info(f"{key:>15}: {value['time_per_call']:.3f}ms/call ({value['n_calls']:d} calls)")
+    ray.cpp_available = cpp_available
+
+    with open(args.output, 'w') as fout:
+        json.dump(output, fout, indent=4)
+    logger.info(f"benchmark results written to {args.output}")
+
+    if(args.reference is not None):
+        with open(args.reference, 'r') as fin:
+            reference = json.load(fin)
+        if(reference['n_events'] != args.n_events):
+            logger.warning(f"reference was obtained with {reference['n_events']} instead of {args.n_events} events")
+        regressions = compare(output['results'], reference, args.tolerance)
+        if(len(regressions)):
+            for regression in regressions:
+                logger.error(regression)
+            sys.exit(1)
+        logger.info("no performance regressions found")
@@ -0,0 +1,47 @@
+import numpy as np
+import time
+from NuRadioMC.SignalProp import analyticraytracing as ray
+from NuRadioMC.utilities import medium
+from NuRadioReco.utilities import units
+import logging
+from numpy import testing
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('test_raytracing')
+
+"""
+this unit test compares the solutions of the vectorized numpy solver `find_solutions_vectorized` with the
+solutions of `find_solutions` (which uses the C++ implementation if available) for the South Pole and for
+Moore's Bay including reflections off the bottom of the ice shelf
+"""
+
+np.random.seed(0)  # set seed to have reproducible results
+n_events = int(1e3)
+
+for ice, zmax, reflections in [(medium.southpole_simple(), -3. * units.km, [(0, 1)]),
+                               (medium.mooresbay_simple(), -0.5 * units.km, [(0, 1), (1, 1), (1, 2)])]:
+    rr = np.random.triangular(50. * units.m, 3. * units.km, 3. * units.km, n_events)
+    zz = np.random.uniform(0, zmax, n_events)
+    x1 = np.array([np.zeros(n_events), zz]).T
+    x2 = np.array([rr, -5. * np.ones(n_events)]).T
+    r2d = ray.ray_tracing_2D(ice)
+
+    for reflection, reflection_case in reflections:
+        results_C0s = np.zeros((n_events, 3))
+        results_types = np.zeros((n_events, 3), dtype=int)
+        t_start = time.time()
+        for iX in range(n_events):
+            for iS, solution in enumerate(r2d.find_solutions(x1[iX], x2[iX], reflection=reflection, reflection_case=reflection_case)):
+                results_C0s[iX, iS] = solution['C0']
+                results_types[iX, iS] = solution['type']
+        t_single = time.time() - t_start
+
+        t_start = time.time()
+        C0s, C1s, types = r2d.find_solutions_vectorized(x1, x2, reflection=reflection, reflection_case=reflection_case)
+        t_vectorized = time.time() - t_start
+        print("n_reflections = {:d}, reflection case {:d}: {:.2f}ms/event (find_solutions) vs. {:.2f}ms/event (find_solutions_vectorized)".format(
+            reflection, reflection_case, 1000. * t_single / n_events, 1000. * t_vectorized / n_events))
+
+        testing.assert_allclose(np.nan_to_num(C0s), results_C0s, atol=1e-08, rtol=1e-05)
+        testing.assert_equal(types, results_types)
+
+print('T07test_vectorized_solver passed without issues')
@@ -0,0 +1,48 @@
+import numpy as np
+from NuRadioMC.SignalProp import analyticraytracing as ray
+from NuRadioMC.utilities import medium
+from NuRadioReco.utilities import units
+import scipy.signal
+import logging
+from numpy import testing
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('test_raytracing')
+
+"""
+this unit test compares the attenuation calculated with adaptively placed reference frequencies (using the detector
+response) with the attenuation calculated for a dense frequency grid. Within the passband of the detector, the
+difference weighted with the detector response needs to be within the requested tolerance.
+"""
+
+np.random.seed(0)  # set seed to have reproducible results
+n_events = 5
+tolerance = 1e-3
+
+ice = medium.southpole_2015()
+ff = np.fft.rfftfreq(2048, 1. / (5 * units.GHz))
+b, a = scipy.signal.butter(10, [80 * units.MHz, 500 * units.MHz], 'bandpass', analog=True)
+w, h = scipy.signal.freqs(b, a, ff)
+filter_response = np.abs(h)
+
+rr = np.random.uniform(100 * units.m, 2 * units.km, n_events)
+zz = np.random.uniform(-2.5 * units.km, -100 * units.m, n_events)
+n_checked = 0
+for iX in range(n_events):
+    x1 = np.array([rr[iX], 0, zz[iX]])
+    x2 = np.array([0, 0, -100 * units.m])
+    r_dense = ray.ray_tracing(x1, x2, ice, n_frequencies_integration=200)
+    r_dense.find_solutions()
+    r_adaptive = ray.ray_tracing(x1, x2, ice, n_frequencies_integration=25)
+    r_adaptive.find_solutions()
+    for iS in range(r_dense.get_number_of_solutions()):
+        attn_dense = r_dense.get_attenuation(iS, ff, 0.5 * ff.max())
+        attn_adaptive = r_adaptive.get_attenuation(iS, ff, filter_response=filter_response, tolerance=tolerance)
+        # the dense calculation has an interpolation error itself, so we allow for a slightly larger deviation
+        testing.assert_array_less(filter_response * np.abs(attn_adaptive - attn_dense), 2 * tolerance)
+        n_checked += 1
+        # a tolerance of one or larger doesn't refine the reference frequencies but must still work
+        attn_coarse = r_adaptive.get_attenuation(iS, ff, filter_response=filter_response, tolerance=1)
+        testing.assert_equal(attn_coarse.shape, attn_dense.shape)
+        testing.assert_array_less(np.abs(attn_coarse - attn_dense), 1)
+
+print(f'T08test_adaptive_attenuation passed without issues ({n_checked} ray tracing solutions checked)')
@@ -0,0 +1,57 @@
+import numpy as np
+import time
+from NuRadioMC.SignalProp import analyticraytracing as ray
+from NuRadioMC.utilities import medium
+from NuRadioReco.utilities import units
+import logging
+from numpy import testing
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('test_raytracing')
+
+"""
+this unit test checks that the ray paths of many solutions calculated in one call with `get_paths` agree with
+the paths calculated one by one with `get_path` and that the 3D paths of `ray_tracing.get_paths` agree with
+`ray_tracing.get_path` (including reflections off the bottom of the ice shelf)
+"""
+
+np.random.seed(0)  # set seed to have reproducible results
+n_events = 100
+n_points = 1000
+
+ice = medium.southpole_simple()
+rr = np.random.triangular(50. * units.m, 3. * units.km, 3. * units.km, n_events)
+zz = np.random.uniform(0, -3. * units.km, n_events)
+x1 = np.array([np.zeros(n_events), zz]).T
+x2 = np.array([rr, -5. * np.ones(n_events)]).T
+r2d = ray.ray_tracing_2D(ice)
+C0s, C1s, types = r2d.find_solutions_vectorized(x1, x2)
+mask = ~np.isnan(C0s)
+x1s = np.repeat(x1[:, None, :], 3, axis=1)[mask]
+x2s = np.repeat(x2[:, None, :], 3, axis=1)[mask]
+
+t_start = time.time()
+yy_single = np.zeros((len(x1s), n_points))
+zz_single = np.zeros((len(x1s), n_points))
+for i, C0 in enumerate(C0s[mask]):
+    yy_single[i], zz_single[i] = r2d.get_path(x1s[i], x2s[i], C0, n_points)
+t_single = time.time() - t_start
+
+t_start = time.time()
+yy, zz = r2d.get_paths(x1s, x2s, C0s[mask], n_points)
+t_vectorized = time.time() - t_start
+print("{:.2f}ms/path (get_path) vs. {:.2f}ms/path (get_paths)".format(1000. * t_single / len(x1s), 1000. * t_vectorized / len(x1s)))
+testing.assert_allclose(yy, yy_single, rtol=1e-8, atol=1e-6 * units.m)
+testing.assert_allclose(zz, zz_single, rtol=1e-8, atol=1e-6 * units.m)
+
+ice = medium.mooresbay_simple()
+for iX in range(10):
+    x1 = np.array([np.random.uniform(50. * units.m, 2. * units.km), 0, np.random.uniform(-500 * units.m, -10 * units.m)])
+    x2 = np.array([0, 0, -1. * units.m])
+    r = ray.ray_tracing(x1, x2, ice, n_reflections=1)
+    r.find_solutions()
+    paths = r.get_paths(n_points)
+    testing.assert_equal(len(paths), r.get_number_of_solutions())
+    for iS in range(r.get_number_of_solutions()):
+        testing.assert_allclose(paths[iS], r.get_path(iS, n_points), rtol=1e-8, atol=1e-6 * units.m)
+
+print('T09test_get_paths passed without issues')
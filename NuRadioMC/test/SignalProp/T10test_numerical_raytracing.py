@@ -0,0 +1,86 @@
+import gc
+import numpy as np
+import scipy.signal
+from NuRadioMC.SignalProp import analyticraytracing as ana
+from NuRadioMC.SignalProp import numericalraytracing as num
+from NuRadioMC.utilities import medium
+from NuRadioReco.utilities import units
+import logging
+from numpy import testing
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('test_raytracing')
+
+"""
+this unit test compares the solutions of the numerical ray tracer with the analytic ray tracer for an exponential
+index-of-refraction profile (given analytically and as tabulated profile), including reflections off the bottom of
+the ice shelf for Moore's Bay
+"""
+
+np.random.seed(0)  # set seed to have reproducible results
+n_events = 30
+
+ice = medium.southpole_2015()
+zz = np.linspace(-3 * units.km, 0, 30001)
+ice_tabulated = medium.tabulated_profile(zz, ice.n_ice - ice.delta_n * np.exp(zz / ice.z_0))
+for ice, ice_numerical, zmax, n_reflections in [(ice, ice, -2.5 * units.km, 0),
+                                                (ice, ice_tabulated, -2.5 * units.km, 0),
+                                                (medium.mooresbay_simple(), medium.mooresbay_simple(), -0.5 * units.km, 1)]:
+    n_solutions = 0
+    for iX in range(n_events):
+        x1 = np.array([np.random.uniform(50, 2000) * units.m, np.random.uniform(-100, 100) * units.m,
+                       np.random.uniform(zmax, -5 * units.m)])
+        x2 = np.array([0, 0, np.random.uniform(-200, -1) * units.m])
+        r_ana = ana.ray_tracing(x1, x2, ice, n_reflections=n_reflections)
+        r_ana.find_solutions()
+        r_num = num.ray_tracing(x1, x2, ice_numerical, n_reflections=n_reflections)
+        r_num.find_solutions()
+        testing.assert_equal(r_num.get_number_of_solutions(), r_ana.get_number_of_solutions())
+        C0s = np.array([result['C0'] for result in r_num.get_results()])
+        for iS in range(r_ana.get_number_of_solutions()):
+            jS = np.argmin(np.abs(C0s - r_ana.get_results()[iS]['C0']))
+            testing.assert_allclose(C0s[jS], r_ana.get_results()[iS]['C0'], rtol=1e-5)
+            testing.assert_equal(r_num.get_solution_type(jS), r_ana.get_solution_type(iS))
+            testing.assert_allclose(r_num.get_launch_vector(jS), r_ana.get_launch_vector(iS), atol=1e-4)
+            testing.assert_allclose(r_num.get_receive_vector(jS), r_ana.get_receive_vector(iS), atol=1e-4)
+            testing.assert_allclose(r_num.get_path_length(jS), r_ana.get_path_length(iS, analytic=False), atol=1 * units.cm)
+            testing.assert_allclose(r_num.get_travel_time(jS), r_ana.get_travel_time(iS, analytic=False), atol=0.05 * units.ns)
+            n_solutions += 1
+    print(f"{ice_numerical.__class__.__name__}: {n_solutions} solutions agree with the analytic ray tracer")
+
+# the attenuation from the reference frequencies in the passband of the detector agrees with the attenuation
+# calculated for every frequency
+ice = medium.southpole_2015()
+ff = np.fft.rfftfreq(2048, 1. / (5 * units.GHz))
+b, a = scipy.signal.butter(10, [80 * units.MHz, 500 * units.MHz], 'bandpass', analog=True)
+filter_response = np.abs(scipy.signal.freqs(b, a, ff)[1])
+passband = filter_response / filter_response.max() > 1e-3
+n_solutions = 0
+for iX in range(5):
+    x1 = np.array([np.random.uniform(50, 2000) * units.m, 0, np.random.uniform(-2.5 * units.km, -5 * units.m)])
+    x2 = np.array([0, 0, np.random.uniform(-200, -1) * units.m])
+    r_num = num.ray_tracing(x1, x2, ice)
+    r_num.find_solutions()
+    # the reference frequencies of the full calculation are the frequencies themselves
+    r_full = num.ray_tracing(x1, x2, ice, n_frequencies_integration=len(ff) - 1)
+    r_full.find_solutions()
+    for iS in range(r_num.get_number_of_solutions()):
+        attenuation_full = r_full.get_attenuation(iS, ff)
+        attenuation = r_num.get_attenuation(iS, ff, filter_response=filter_response, tolerance=1e-3)
+        testing.assert_allclose(attenuation[passband], attenuation_full[passband], atol=1e-3)
+        # without a detector response above the tolerance, the full frequency range is used
+        attenuation_no_filter = r_num.get_attenuation(iS, ff)
+        testing.assert_allclose(r_num.get_attenuation(iS, ff, filter_response=filter_response, tolerance=1), attenuation_no_filter)
+        testing.assert_allclose(r_num.get_attenuation(iS, ff, filter_response=np.zeros_like(ff)), attenuation_no_filter)
+        n_solutions += 1
+print(f"{n_solutions} attenuations agree with the calculation for every frequency")
+
+# the cached 2D ray tracers are released together with their medium
+n_cached = len(num._ray_tracers_2D)
+ice_temporary = medium.southpole_2015()
+num.ray_tracing(np.array([0, 0, -100.]) * units.m, np.array([100, 0, -10.]) * units.m, ice_temporary)
+testing.assert_equal(len(num._ray_tracers_2D), n_cached + 1)
+del ice_temporary
+gc.collect()
+testing.assert_equal(len(num._ray_tracers_2D), n_cached)
+
+print('T10test_numerical_raytracing passed without issues')
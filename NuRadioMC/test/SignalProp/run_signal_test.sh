@@ -5,3 +5,7 @@ python T02test_analytic_D_T.py
 python T04MooresBay.py
 python T05unit_test_C0_SP.py
 python T06unit_test_C0_mooresbay.py
+python T07test_vectorized_solver.py
+python T08test_adaptive_attenuation.py
+python T09test_get_paths.py
+python T10test_numerical_raytracing.py
@@ -0,0 +1,60 @@
+import numpy as np
+import h5py
+from numpy import testing
+from NuRadioReco.utilities import units
+from NuRadioMC.EvtGen import generator
+from NuRadioMC.simulation import simulation
+from NuRadioMC.utilities import hdf5_schema
+
+"""
+this unit test writes the same event list with both schema versions of the hdf5 files and checks that
+they are read back by the simulation in the same way
+"""
+
+
+def read_input_hdf5(filename):
+    # read the file exactly like the simulation does, without setting up a simulation
+    sim = simulation.simulation.__new__(simulation.simulation)
+    sim._inputfilename = filename
+    sim._read_input_hdf5()
+    return sim._fin, sim._fin_attrs
+
+
+volume = {'fiducial_rmin': 0, 'fiducial_rmax': 3 * units.km, 'fiducial_zmin': -2.7 * units.km, 'fiducial_zmax': 0}
+for schema_version in [hdf5_schema.SCHEMA_VERSION_DEFAULT, hdf5_schema.SCHEMA_VERSION_COMPACT]:
+    # the tau decays add secondary 'had' and 'em' showers
+    generator.generate_eventlist_cylinder(f"T01_schema{schema_version}.hdf5", 1000, 1 * units.EeV, 1 * units.EeV, volume,
+                                          flavor=[12, -12, 14, -14, 16, -16], tabulated_tau_decays=True,
+                                          seed=1234, schema_version=schema_version)
+
+fin1, attrs1 = read_input_hdf5("T01_schema1.hdf5")
+fin2, attrs2 = read_input_hdf5("T01_schema2.hdf5")
+testing.assert_equal(attrs1['schema_version'], hdf5_schema.SCHEMA_VERSION_DEFAULT)
+testing.assert_equal(attrs2['schema_version'], hdf5_schema.SCHEMA_VERSION_COMPACT)
+testing.assert_equal(sorted(fin1.keys()), sorted(fin2.keys()))
+
+with h5py.File("T01_schema1.hdf5", 'r') as f1, h5py.File("T01_schema2.hdf5", 'r') as f2:
+    for key in fin1:
+        if(key in hdf5_schema.categorical_keys):
+            # enum categories decode to the original strings
+            testing.assert_equal(h5py.check_enum_dtype(f2[key].dtype) is not None, True)
+            testing.assert_equal(fin2[key].dtype.kind, 'U')
+            testing.assert_equal(fin2[key], fin1[key])
+            testing.assert_equal(set(fin2[key]) <= set(hdf5_schema.categories), True)
+        elif(hdf5_schema.compact_dtypes.get(key, None) == np.float32):
+            # fields stored with single precision come back as double precision
+            testing.assert_equal(f2[key].dtype, np.float32)
+            testing.assert_equal(fin2[key].dtype, np.float64)
+            testing.assert_allclose(fin2[key], fin1[key], rtol=1e-6)
+        else:
+            testing.assert_equal(fin2[key], fin1[key])
+
+        # schema 1 files are read unchanged
+        value = f1[key][()]
+        if(value.dtype.kind in ['O', 'S']):
+            value = value.astype('U')
+        testing.assert_equal(fin1[key].dtype, value.dtype)
+        testing.assert_equal(fin1[key], value)
+testing.assert_equal(set(fin1['shower_type']), {'had', 'em'})
+
+print('T01test_hdf5_schema passed without issues')
@@ -0,0 +1,125 @@
+import os
+import shutil
+import logging
+import numpy as np
+import h5py
+from numpy import testing
+from NuRadioMC.utilities import merge_hdf5
+merge_hdf5.logger.setLevel(logging.ERROR)
+
+"""
+this unit test merges copies of a simulation output file (with unique, overlapping and without event groups)
+with the streaming merge and into a virtual file and compares the results with the merge of the original
+implementation, which held all data in memory
+"""
+
+reference_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SingleEvents', '1e18_output_reference.hdf5')
+
+
+def shift_event_group_ids(fout, shift):
+    # shifts the event group ids of the file and of its stations
+    for key in ['event_group_ids', 'station_101/event_group_ids']:
+        fout[key][...] = shift(fout[key][...])
+
+
+filenames = []
+for iF, (shift, n_events) in enumerate([(lambda ids: ids, 2000),
+                                        (lambda ids: np.where(ids > 1400, ids + 10000, ids), 1000),  # partially overlapping ids
+                                        (lambda ids: ids + 100000, 3000)]):  # unique ids
+    filenames.append(f"T02_part{iF}.hdf5")
+    shutil.copy(reference_file, filenames[-1])
+    with h5py.File(filenames[-1], 'a') as fout:
+        shift_event_group_ids(fout, shift)
+        fout['weights'][...] = fout['weights'][...] * (iF + 1)
+        fout.attrs['n_events'] = n_events
+# a file without any events
+with h5py.File(reference_file, 'r') as fin, h5py.File("T02_empty.hdf5", 'w') as fout:
+    for key in fin.attrs:
+        fout.attrs[key] = fin.attrs[key]
+    fout.attrs['n_events'] = 500
+filenames.insert(1, "T02_empty.hdf5")
+
+
+def merge_reference(filenames):
+    """
+    the merge of the original implementation: the data sets of all non-empty files are concatenated,
+    event group ids of a file that already exist in the previous files are replaced one after another
+    by new ids (larger than all ids so far)
+    """
+    data = {}
+    attrs = {}
+    unique_ids = np.array([], dtype=int)
+    for filename in filenames:
+        with h5py.File(filename, 'r') as fin:
+            if(len(attrs) == 0):
+                attrs = dict(fin.attrs)
+            else:
+                attrs['n_events'] += fin.attrs['n_events']
+            if('triggered' not in fin):
+                continue
+            file_data = {}
+            fin.visititems(lambda name, obj: file_data.update({name: obj[...]}) if isinstance(obj, h5py.Dataset) else None)
+        current_ids = np.unique(file_data['event_group_ids'])
+        intersect = np.intersect1d(unique_ids, current_ids)
+        if(len(intersect)):
+            new_id = max(unique_ids.max(), current_ids.max()) + 1
+            for event_group_id in intersect:
+                for key in ['event_group_ids', 'station_101/event_group_ids']:
+                    file_data[key][file_data[key] == event_group_id] = new_id
+                new_id += 1
+        unique_ids = np.append(unique_ids, np.unique(file_data['event_group_ids']))
+        for key, value in file_data.items():
+            data.setdefault(key, []).append(value)
+    return {key: np.concatenate(value) for key, value in data.items()}, attrs
+
+
+data_reference, attrs_reference = merge_reference(filenames)
+testing.assert_equal(attrs_reference['n_events'], 6500)
+for filename in ["T02_merged.hdf5", "T02_virtual.hdf5"]:
+    if(os.path.exists(filename)):
+        os.remove(filename)
+merge_hdf5.merge2(filenames, "T02_merged.hdf5")
+merge_hdf5.merge_virtual(filenames, "T02_virtual.hdf5")
+
+for filename in ["T02_merged.hdf5", "T02_virtual.hdf5"]:
+    with h5py.File(filename, 'r') as fin, h5py.File(reference_file, 'r') as fref:
+        testing.assert_equal(sorted(fin.attrs.keys()), sorted(attrs_reference.keys()))
+        for key, value in attrs_reference.items():
+            testing.assert_equal(fin.attrs[key], value)
+        # the virtual file has the additional data sets 'event_group_id_offsets'
+        testing.assert_equal(sorted(set(fin.keys()) - {'event_group_id_offsets'}), sorted(fref.keys()))
+        for key, value in data_reference.items():
+            testing.assert_equal(fin[key].dtype, value.dtype)
+            if(key.endswith('event_group_ids')):
+                continue
+            testing.assert_equal(fin[key][...], value)
+
+# the streaming merge replaces the non-unique event group ids in the same way
+with h5py.File("T02_merged.hdf5", 'r') as fin:
+    for key in ['event_group_ids', 'station_101/event_group_ids']:
+        testing.assert_equal(fin[key][...], data_reference[key])
+    assert('event_group_id_offsets' not in fin)
+
+# the virtual file shifts the ids of the second file, the ids plus their offsets identify the same event groups
+with h5py.File("T02_virtual.hdf5", 'r') as fin:
+    testing.assert_equal(fin['event_group_ids'].is_virtual, True)
+    event_group_ids = {}
+    for key in ['event_group_ids', 'station_101/event_group_ids']:
+        event_group_ids_parts = []
+        for filename in filenames[:1] + filenames[2:]:
+            with h5py.File(filename, 'r') as fpart:
+                event_group_ids_parts.append(fpart[key][...])
+        testing.assert_equal(fin[key][...], np.concatenate(event_group_ids_parts))
+        # only the ids of the file with overlapping ids are shifted
+        offsets = np.split(fin[key[:-len('event_group_ids')] + 'event_group_id_offsets'][...],
+                           np.cumsum([len(ids) for ids in event_group_ids_parts])[:-1])
+        testing.assert_equal(np.concatenate([offsets[0], offsets[2]]), 0)
+        assert(np.all(offsets[1] > 0))
+        event_group_ids[key] = fin[key][...] + np.concatenate(offsets)
+    # one-to-one correspondence between the event groups of both merges, the same for the stations
+    pairs = {key: set(zip(event_group_ids[key], data_reference[key])) for key in event_group_ids}
+    testing.assert_equal(len({pair[0] for pair in pairs['event_group_ids']}), len(pairs['event_group_ids']))
+    testing.assert_equal(len({pair[1] for pair in pairs['event_group_ids']}), len(pairs['event_group_ids']))
+    assert(pairs['station_101/event_group_ids'] <= pairs['event_group_ids'])
+
+print('T02test_merge_hdf5 passed without issues')
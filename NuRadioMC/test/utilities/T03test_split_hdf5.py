@@ -0,0 +1,87 @@
+import os
+import glob
+import shutil
+import logging
+import numpy as np
+import h5py
+from numpy import testing
+from NuRadioReco.utilities import units
+from NuRadioMC.EvtGen import generator
+from NuRadioMC.utilities import hdf5_schema, merge_hdf5, split_hdf5
+merge_hdf5.logger.setLevel(logging.ERROR)
+
+"""
+this unit test splits event lists of both schema versions and a simulation output file (with station groups)
+and merges the parts again. The event groups must not be split across files and the merged file must be
+identical to the original file.
+"""
+
+reference_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SingleEvents', '1e18_output_reference.hdf5')
+volume = {'fiducial_rmin': 0, 'fiducial_rmax': 3 * units.km, 'fiducial_zmin': -2.7 * units.km, 'fiducial_zmax': 0}
+
+input_files = []
+for schema_version in [hdf5_schema.SCHEMA_VERSION_DEFAULT, hdf5_schema.SCHEMA_VERSION_COMPACT]:
+    # electron neutrino CC interactions and tau decays create event groups with several showers
+    input_files.append(f"T03_schema{schema_version}.hdf5")
+    generator.generate_eventlist_cylinder(input_files[-1], 1000, 1 * units.EeV, 1 * units.EeV, volume,
+                                          flavor=[12, -12, 16, -16], tabulated_tau_decays=True,
+                                          seed=42, schema_version=schema_version)
+    with h5py.File(input_files[-1], 'a') as fout:
+        # the merge only considers files with triggered events
+        fout['triggered'] = np.ones(fout['event_group_ids'].shape[0], dtype=bool)
+input_files.append("T03_output.hdf5")
+shutil.copy(reference_file, input_files[-1])
+
+for input_file, n_events_per_file, n_cores in zip(input_files, [150, 150, 4], [1, 2, 1]):
+    output_file = input_file.replace('.hdf5', '_split.hdf5')
+    for filename in glob.glob(output_file + '.part????') + glob.glob(input_file.replace('.hdf5', '_merged.hdf5')):
+        os.remove(filename)
+    split_hdf5.split_hdf5_input_file(input_file, output_file, n_events_per_file, n_cores=n_cores)
+    parts = sorted(glob.glob(output_file + '.part????'))
+
+    with h5py.File(input_file, 'r') as fin:
+        n_event_groups = len(np.unique(fin['event_group_ids'][...]))
+        testing.assert_equal(len(parts), int(np.ceil(n_event_groups / n_events_per_file)))
+        assert(n_event_groups > n_events_per_file)
+        if(input_file != "T03_output.hdf5"):
+            assert(fin['event_group_ids'].shape[0] > n_event_groups)
+
+        # the event groups are never split across files
+        event_group_ids_parts = []
+        n_events = 0
+        for iPart, part in enumerate(parts):
+            with h5py.File(part, 'r') as fpart:
+                event_group_ids = fpart['event_group_ids'][...]
+                testing.assert_equal(len(np.unique(event_group_ids)), min(n_events_per_file, n_event_groups - iPart * n_events_per_file))
+                for key in fpart:
+                    if(isinstance(fpart[key], h5py.Group) and 'event_group_ids' in fpart[key]):
+                        assert(np.all(np.isin(fpart[key]['event_group_ids'][...], event_group_ids)))
+                        # the data sets per shower refer to the showers of this part
+                        assert(np.all(np.isin(fpart[key]['shower_id'][...], fpart['shower_ids'][...])))
+                        testing.assert_equal(fpart[key]['triggered'].shape[0], fpart[key]['shower_id'].shape[0])
+                testing.assert_equal(fpart.attrs['total_number_of_events'], fin.attrs['n_events'])
+                n_events += fpart.attrs['n_events']
+            event_group_ids_parts.append(np.unique(event_group_ids))
+        all_event_group_ids = np.concatenate(event_group_ids_parts)
+        testing.assert_equal(len(all_event_group_ids), n_event_groups)
+        testing.assert_equal(n_events, fin.attrs['n_events'])
+
+    # merging the parts gives the original file
+    merged_file = input_file.replace('.hdf5', '_merged.hdf5')
+    merge_hdf5.merge2(parts, merged_file)
+    with h5py.File(input_file, 'r') as fin, h5py.File(merged_file, 'r') as fmerged:
+        for key in fin.attrs:
+            testing.assert_equal(fmerged.attrs[key], fin.attrs[key])
+
+        def compare(name, dataset):
+            if(isinstance(dataset, h5py.Dataset)):
+                testing.assert_equal(fmerged[name].dtype, dataset.dtype)
+                testing.assert_equal(h5py.check_enum_dtype(fmerged[name].dtype), h5py.check_enum_dtype(dataset.dtype))
+                testing.assert_equal(fmerged[name][...], dataset[...])
+            else:
+                testing.assert_equal(sorted(fmerged[name].keys()), sorted(dataset.keys()))
+        testing.assert_equal(sorted(fmerged.keys()), sorted(fin.keys()))
+        fin.visititems(compare)
+    print(f"{input_file}: {n_event_groups} event groups split into {len(parts)} files and merged again")
+
+print('T03test_split_hdf5 passed without issues')
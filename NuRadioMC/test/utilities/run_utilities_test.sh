@@ -0,0 +1,6 @@
+set -e
+cd NuRadioMC/test/utilities/
+python T01test_hdf5_schema.py
+python T02test_merge_hdf5.py
+python T03test_split_hdf5.py
+rm -f T01_*.hdf5* T02_*.hdf5 T03_*.hdf5*
@@ -29,22 +29,28 @@ def remove_duplicate_triggers(triggered, gids):
     Parameters
     ----------
     triggered: array of bools
-        
+        one entry per shower. A 2D array of shape (n_showers, n_triggers) is
+        treated as independent triggered arrays, one per column.
     gids: array of ints
         the event group ids
         
     Returns: array of floats
         the corrected triggered array
     """
-    gids = np.array(gids)
-    triggered = np.array(triggered)
-    uids, unique_mask, inv_mask, counts = np.unique(gids, return_index=True, return_inverse=True, return_counts=True)
-    for gid in uids[counts > 1]:
-        mask = gids == gid
-        if(np.sum(triggered[mask]) > 1):
-            idx = np.arange(len(triggered), dtype=np.int)[mask][triggered[mask] == True][1:]
-            triggered[idx] = False
-    return triggered
+    gids = np.asarray(gids)
+    triggered = np.asarray(triggered)
+    uids, inv_mask = np.unique(gids, return_inverse=True)
+    # the indices of the triggered showers are sorted (row major), so the first occurrence of every
+    # event group (and column) among them is its first triggered shower
+    idx = np.nonzero(triggered)
+    keys = inv_mask[idx[0]]
+    if(triggered.ndim == 2):
+        keys = keys * triggered.shape[1] + idx[1]
+    first = np.unique(keys, return_index=True)[1]
+    first_triggered = tuple(i[first] for i in idx)
+    triggered_corrected = np.zeros_like(triggered)
+    triggered_corrected[first_triggered] = triggered[first_triggered]
+    return triggered_corrected
 
 
 def FC_limits(counts):
@@ -140,9 +146,121 @@ def get_Veff_water_equivalent(Veff, density_medium=0.917 * units.g / units.cm **
     return Veff * density_medium / density_water
 
 
-def get_Veff_Aeff_single(filename, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff="veff"):
+class ColumnReader():
     """
-    calculates the effective volume or effective area from surface muons from a single NuRadioMC hdf5 file
+    read-only access to the data sets of a NuRadioMC hdf5 file
+
+    Every data set is read from disk only once and cached afterwards, i.e. using the same
+    data set again (e.g. for another trigger combination) doesn't reread the file.
+    The returned arrays are read-only.
+    """
+
+    def __init__(self, filename, mmap=False, rows=None):
+        """
+        Parameters
+        ----------
+        filename: string
+            filename of the hdf5 file
+        mmap: bool
+            if True, uncompressed data sets with contiguous storage are memory mapped
+            instead of being read into memory
+        rows: tuple of two ints or None
+            if not None, only the rows `start:stop` of the per-shower data sets (the data sets
+            in the root of the file) are read, the data sets of the stations are always read completely
+        """
+        self.filename = filename
+        self.mmap = mmap
+        self.file = h5py.File(filename, 'r')
+        self.attrs = self.file.attrs
+        self.rows = rows
+        self.n_rows = None
+        if('event_group_ids' in self.file):
+            self.n_rows = self.file['event_group_ids'].shape[0]
+        self.__cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.__cache = {}
+        self.file.close()
+
+    def keys(self):
+        return self.file.keys()
+
+    def __contains__(self, key):
+        return key in self.file
+
+    def __getitem__(self, key):
+        """
+        returns the content of the data set `key` (can be a path, e.g. 'station_101/event_group_ids')
+        """
+        if(key not in self.__cache):
+            value = self.__read(key, self.file[key])
+            offsets_key = key[:-len('event_group_ids')] + 'event_group_id_offsets'
+            if(key.endswith('event_group_ids') and offsets_key in self.file):
+                # virtual files of `merge_hdf5.merge_virtual` store the offsets that make the event group ids unique
+                value = value + self.__read(offsets_key, self.file[offsets_key])
+                value.flags.writeable = False
+            self.__cache[key] = value
+        return self.__cache[key]
+
+    def __read(self, key, dataset):
+        start, stop = 0, None
+        if(self.rows is not None and '/' not in key.strip('/') and dataset.ndim > 0 and dataset.shape[0] == self.n_rows):
+            start, stop = self.rows
+        if(dataset.ndim == 0):
+            return dataset[()]
+        start, stop, _ = slice(start, stop).indices(dataset.shape[0])
+        shape = (max(stop - start, 0),) + dataset.shape[1:]
+        if(self.mmap and dataset.dtype.kind in ['b', 'i', 'u', 'f'] and np.prod(shape) > 0):
+            offset = dataset.id.get_offset()  # None for chunked (e.g. compressed) data sets
+            if(offset is not None):
+                offset += start * dataset.dtype.itemsize * int(np.prod(dataset.shape[1:]))
+                return np.memmap(self.filename, dtype=dataset.dtype, mode='r', offset=offset, shape=shape)
+        value = dataset[start:stop]
+        if(isinstance(value, np.ndarray)):
+            value.flags.writeable = False
+        return value
+
+
+def get_Veff_and_uncertainties(weight_sum, volume_proj_area, n_events):
+    """
+    calculates the effective volume (or area) and its uncertainties from the weighted sum of triggered events
+
+    Parameters
+    ----------
+    weight_sum: float
+        the weighted number of triggered events
+    volume_proj_area: float
+        the simulated volume (or projected area)
+    n_events: int
+        the number of simulated events
+
+    Returns
+    -------
+    list of the effective volume, its uncertainty, the weighted sum of triggered events,
+    lower 68% uncertainty, upper 68% uncertainty
+    """
+    Veff = volume_proj_area * weight_sum / n_events
+    Veff_error = 0
+    if(weight_sum > 0):
+        Veff_error = Veff / weight_sum ** 0.5
+    FC_low, FC_high = FC_limits(weight_sum)
+    Veff_low = volume_proj_area * FC_low / n_events
+    Veff_high = volume_proj_area * FC_high / n_events
+    return [Veff, Veff_error, weight_sum, Veff_low, Veff_high]
+
+
+def get_Veff_Aeff_partial(filename, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff="veff", mmap=False, rows=None):
+    """
+    calculates the weighted sums of triggered events of a single NuRadioMC hdf5 file or a range of rows of it
+
+    The results of one or several calls (e.g. for different row ranges of the same file) are combined
+    into the effective volume or effective area with `combine_Veff_Aeff_partials`.
 
     the effective volume is NOT normalized to a water equivalent. It is also NOT multiplied with the solid angle (typically 4pi).
 
@@ -178,241 +296,332 @@ def get_Veff_Aeff_single(filename, trigger_names, trigger_names_dict, trigger_co
         can be 
         * "veff" (default)
         * "aeff_surface_muons"
+    mmap: bool
+        if True, the (uncompressed) data sets are memory mapped instead of being read into memory
+    rows: tuple of two ints or None
+        the range of rows (start, stop) of the per-shower data sets that is processed. The range must not
+        split an event group, see `get_event_group_boundary`. If None, the complete file is processed.
 
     Returns
     ----------
-    list of dictionary. Each file is one entry. The dictionary keys store all relevant properties
+    out: dict
+        the properties of the file. The entries of `out[veff_aeff]` are the weighted sum of triggered
+        events and the efficiency weighted sum of triggered events per trigger name
+    volume_proj_area: float
+        the simulated volume (or projected area)
+    n_events: int
+        the number of simulated events of the file
     """
     if(veff_aeff not in ["veff", "aeff_surface_muons"]):
         raise AttributeError(f"the paramter `veff_aeff` needs to be one of either `veff` or `aeff_surface_muons`")
-    logger.warning(f"processing file  {filename}")
-    fin = h5py.File(filename, 'r')
-    out = {}
-    Emin = fin.attrs['Emin']
-    Emax = fin.attrs['Emax']
-    E = 10 ** (0.5 * (np.log10(Emin) + np.log10(Emax)))
-    out['energy'] = E
-    out['energy_min'] = Emin
-    out['energy_max'] = Emax
-
-    # calculate effective
-    thetamin = 0
-    thetamax = np.pi
-    phimin = 0
-    phimax = 2 * np.pi
-    if('thetamin' in fin.attrs):
-        thetamin = fin.attrs['thetamin']
-    if('thetamax' in fin.attrs):
-        thetamax = fin.attrs['thetamax']
-    if('phimin' in fin.attrs):
-        phimin = fin.attrs['phimin']
-    if('phimax' in fin.attrs):
-        phimax = fin.attrs['phimax']
-    if(veff_aeff == "veff"):
-        volume_proj_area = fin.attrs['volume']
-    elif(veff_aeff == "aeff_surface_muons"):
-        area = fin.attrs['area']
-        # The used area must be the projected area, perpendicular to the incoming
-        # flux, which leaves us with the following correction. Remember that the
-        # zenith bins must be small for the effective area to be correct.
-        volume_proj_area = area * 0.5 * (np.abs(np.cos(thetamin)) + np.abs(np.cos(thetamax)))
-    else:
-        raise AttributeError(f"attributes do neither contain volume nor area")
-
-    Vrms = np.nan
-    if 'Vrms' in fin.attrs:
-        Vrms = fin.attrs['Vrms']
-
-    # Solid angle needed for the effective volume calculations
-    out['domega'] = np.abs(phimax - phimin) * np.abs(np.cos(thetamin) - np.cos(thetamax))
-    out['thetamin'] = thetamin
-    out['thetamax'] = thetamax
-    out['deposited'] = deposited
-    out[veff_aeff] = {}
-    out['n_triggered_weighted'] = {}
-    out['SNRs'] = {}
-    n_events = fin.attrs['n_events']
-
-    if('weights' not in fin.keys()):
-        logger.warning(f"file {filename} is empty")
-        FC_low, FC_high = FC_limits(0)
-        Veff_low = volume_proj_area * FC_low / n_events
-        Veff_high = volume_proj_area * FC_high / n_events
-        for iT, trigger_name in enumerate(trigger_names):
-            out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
-        for trigger_name, values in iteritems(trigger_combinations):
-            out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
-        return out
-
-    triggered = np.array(fin['triggered'])
-    if('trigger_names' in fin.attrs):
-        if(np.any(trigger_names != fin.attrs['trigger_names'])):
-            if(triggered.size == 0 and fin.attrs['trigger_names'].size == 0):
-                logger.warning("file {} has no triggering events. Using trigger names from another file".format(filename))
-            else:
-                logger.error("file {} has inconsistent trigger names: {}\ncurrent trigger names {}".format(filename, fin.attrs['trigger_names'], trigger_names))
-                raise AttributeError("file {} has inconsistent trigger names: {}\ncurrent trigger names {}".format(filename, fin.attrs['trigger_names'], trigger_names))
-    else:
-        logger.warning(f"file {filename} has no triggering events. Using trigger names from a different file: {trigger_names}")
-
-    weights = np.array(fin['weights'])
-    if(triggered.size == 0):
-        FC_low, FC_high = FC_limits(0)
-        Veff_low = volume_proj_area * FC_low / n_events
-        Veff_high = volume_proj_area * FC_high / n_events
-        for iT, trigger_name in enumerate(trigger_names):
-            out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
-        for trigger_name, values in iteritems(trigger_combinations):
-            out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
-    else:
-        for iT, trigger_name in enumerate(trigger_names):
-            triggered = np.array(fin['multiple_triggers'][:, iT], dtype=np.bool)
-            triggered = remove_duplicate_triggers(triggered, fin['event_group_ids'])
-            Veff = volume_proj_area * np.sum(weights[triggered]) / n_events
-            Veff_error = 0
-            if(np.sum(weights[triggered]) > 0):
-                Veff_error = Veff / np.sum(weights[triggered]) ** 0.5
-            FC_low, FC_high = FC_limits(np.sum(weights[triggered]))
-            Veff_low = volume_proj_area * FC_low / n_events
-            Veff_high = volume_proj_area * FC_high / n_events
-            out[veff_aeff][trigger_name] = [Veff, Veff_error, np.sum(weights[triggered]), Veff_low, Veff_high]
-
-        for trigger_name, values in iteritems(trigger_combinations):
+    logger.info(f"processing file {filename}, rows {rows}")
+    with ColumnReader(filename, mmap=mmap, rows=rows) as fin:
+        out = {}
+        Emin = fin.attrs['Emin']
+        Emax = fin.attrs['Emax']
+        E = 10 ** (0.5 * (np.log10(Emin) + np.log10(Emax)))
+        out['energy'] = E
+        out['energy_min'] = Emin
+        out['energy_max'] = Emax
+
+        # calculate effective
+        thetamin = 0
+        thetamax = np.pi
+        phimin = 0
+        phimax = 2 * np.pi
+        if('thetamin' in fin.attrs):
+            thetamin = fin.attrs['thetamin']
+        if('thetamax' in fin.attrs):
+            thetamax = fin.attrs['thetamax']
+        if('phimin' in fin.attrs):
+            phimin = fin.attrs['phimin']
+        if('phimax' in fin.attrs):
+            phimax = fin.attrs['phimax']
+        if(veff_aeff == "veff"):
+            volume_proj_area = fin.attrs['volume']
+        elif(veff_aeff == "aeff_surface_muons"):
+            area = fin.attrs['area']
+            # The used area must be the projected area, perpendicular to the incoming
+            # flux, which leaves us with the following correction. Remember that the
+            # zenith bins must be small for the effective area to be correct.
+            volume_proj_area = area * 0.5 * (np.abs(np.cos(thetamin)) + np.abs(np.cos(thetamax)))
+        else:
+            raise AttributeError(f"attributes do neither contain volume nor area")
+
+        Vrms = np.nan
+        if 'Vrms' in fin.attrs:
+            Vrms = fin.attrs['Vrms']
+
+        # Solid angle needed for the effective volume calculations
+        out['domega'] = np.abs(phimax - phimin) * np.abs(np.cos(thetamin) - np.cos(thetamax))
+        out['thetamin'] = thetamin
+        out['thetamax'] = thetamax
+        out['deposited'] = deposited
+        out[veff_aeff] = {}
+        out['n_triggered_weighted'] = {}
+        out['SNRs'] = {}
+        n_events = fin.attrs['n_events']
+
+        if('weights' not in fin):
+            logger.warning(f"file {filename} is empty")
+            for trigger_name in list(trigger_names) + list(trigger_combinations.keys()):
+                out[veff_aeff][trigger_name] = [0, 0]
+            return out, volume_proj_area, n_events
+
+        triggered = fin['triggered']
+        if('trigger_names' in fin.attrs):
+            if(np.any(trigger_names != fin.attrs['trigger_names'])):
+                if(triggered.size == 0 and fin.attrs['trigger_names'].size == 0):
+                    logger.warning("file {} has no triggering events. Using trigger names from another file".format(filename))
+                else:
+                    logger.error("file {} has inconsistent trigger names: {}\ncurrent trigger names {}".format(filename, fin.attrs['trigger_names'], trigger_names))
+                    raise AttributeError("file {} has inconsistent trigger names: {}\ncurrent trigger names {}".format(filename, fin.attrs['trigger_names'], trigger_names))
+        else:
+            logger.warning(f"file {filename} has no triggering events. Using trigger names from a different file: {trigger_names}")
+
+        if(triggered.size == 0):
+            for trigger_name in list(trigger_names) + list(trigger_combinations.keys()):
+                out[veff_aeff][trigger_name] = [0, 0]
+            return out, volume_proj_area, n_events
+
+        weights = fin['weights']
+        gids = fin['event_group_ids']
+        multiple_triggers = np.array(fin['multiple_triggers'], dtype=np.bool)
+        n_triggers = len(trigger_names)
+
+        # the trigger masks of the individual triggers and of all trigger combinations are
+        # calculated first and the duplicate triggers are removed in one go for all of them
+        masks = np.zeros((len(multiple_triggers), n_triggers + len(trigger_combinations)), dtype=np.bool)
+        masks[:, :n_triggers] = multiple_triggers[:, :n_triggers]
+        max_amplitudes_ray_solution = None
+        for iC, (trigger_name, values) in enumerate(iteritems(trigger_combinations)):
             indiv_triggers = values['triggers']
-            triggered = np.zeros_like(fin['multiple_triggers'][:, 0], dtype=np.bool)
             if(isinstance(indiv_triggers, str)):
-                triggered = triggered | np.array(fin['multiple_triggers'][:, trigger_names_dict[indiv_triggers]], dtype=np.bool)
-            else:
-                for indiv_trigger in indiv_triggers:
-                    triggered = triggered | np.array(fin['multiple_triggers'][:, trigger_names_dict[indiv_trigger]], dtype=np.bool)
+                indiv_triggers = [indiv_triggers]
+            triggered = np.any(multiple_triggers[:, [trigger_names_dict[indiv_trigger] for indiv_trigger in indiv_triggers]], axis=1)
             if 'triggerAND' in values:
-                triggered = triggered & np.array(fin['multiple_triggers'][:, trigger_names_dict[values['triggerAND']]], dtype=np.bool)
+                triggered = triggered & multiple_triggers[:, trigger_names_dict[values['triggerAND']]]
             if 'notriggers' in values:
                 indiv_triggers = values['notriggers']
                 if(isinstance(indiv_triggers, str)):
-                    triggered = triggered & ~np.array(fin['multiple_triggers'][:, trigger_names_dict[indiv_triggers]], dtype=np.bool)
-                else:
-                    for indiv_trigger in indiv_triggers:
-                        triggered = triggered & ~np.array(fin['multiple_triggers'][:, trigger_names_dict[indiv_trigger]], dtype=np.bool)
+                    indiv_triggers = [indiv_triggers]
+                for indiv_trigger in indiv_triggers:
+                    triggered = triggered & ~multiple_triggers[:, trigger_names_dict[indiv_trigger]]
             if('min_sigma' in values.keys()):
+                if(max_amplitudes_ray_solution is None):
+                    # we use the this quantity because it is always computed before noise is added!
+                    max_amplitudes_ray_solution = np.max(np.nan_to_num(fin['max_amp_ray_solution']), axis=-1)
+                As = max_amplitudes_ray_solution
                 if(isinstance(values['min_sigma'], list)):
-                    if(trigger_name not in out['SNR']):
-                        out['SNR'][trigger_name] = {}
-                    masks = np.zeros_like(triggered)
+                    if(trigger_name not in out['SNRs']):
+                        out['SNRs'][trigger_name] = {}
+                    mask = np.zeros_like(triggered)
                     for iS in range(len(values['min_sigma'])):
-                        As = np.max(np.nan_to_num(fin['max_amp_ray_solution']), axis=-1)  # we use the this quantity because it is always computed before noise is added!
                         As_sorted = np.sort(As[:, values['channels'][iS]], axis=1)
                         # the smallest of the three largest amplitudes
                         max_amplitude = As_sorted[:, -values['n_channels'][iS]]
-                        mask = np.sum(As[:, values['channels'][iS]] >= (values['min_sigma'][iS] * Vrms), axis=1) >= values['n_channels'][iS]
-                        masks = masks | mask
-                        out['SNR'][trigger_name][iS] = max_amplitude[mask] / Vrms
-                    triggered = triggered & masks
+                        mask_S = np.sum(As[:, values['channels'][iS]] >= (values['min_sigma'][iS] * Vrms), axis=1) >= values['n_channels'][iS]
+                        mask = mask | mask_S
+                        out['SNRs'][trigger_name][iS] = max_amplitude[mask_S] / Vrms
                 else:
-                    As = np.max(np.nan_to_num(fin['max_amp_ray_solution']), axis=-1)  # we use the this quantity because it is always computed before noise is added!
-
                     As_sorted = np.sort(As[:, values['channels']], axis=1)
-                    max_amplitude = As_sorted[:, -values['n_channels']]  # the smallest of the three largest amplitudes
-
                     mask = np.sum(As[:, values['channels']] >= (values['min_sigma'] * Vrms), axis=1) >= values['n_channels']
-                    out['SNR'][trigger_name] = As_sorted[mask] / Vrms
-                    triggered = triggered & mask
+                    out['SNRs'][trigger_name] = As_sorted[mask] / Vrms
+                triggered = triggered & mask
             if('ray_solution' in values.keys()):
-                As = np.array(fin['max_amp_ray_solution'])
+                As = fin['max_amp_ray_solution']
                 max_amps = np.argmax(As[:, values['ray_channel']], axis=-1)
-                sol = np.array(fin['ray_tracing_solution_type'])
-                mask = np.array([sol[i, values['ray_channel'], max_amps[i]] == values['ray_solution'] for i in range(len(max_amps))], dtype=np.bool)
+                sol = fin['ray_tracing_solution_type']
+                mask = sol[np.arange(len(max_amps)), values['ray_channel'], max_amps] == values['ray_solution']
                 triggered = triggered & mask
 
             if('n_reflections' in values.keys()):
                 if(np.sum(triggered)):
-                    As = np.array(fin[f'station_{station:d}/max_amp_ray_solution'])
+                    As = fin[f'station_{station:d}/max_amp_ray_solution']
                     # find the ray tracing solution that produces the largest amplitude
                     max_amps = np.argmax(np.argmax(As[:, :], axis=-1), axis=-1)
                     # advanced indexing: selects the ray tracing solution per event with the highest amplitude
-                    triggered = triggered & (np.array(fin[f'station_{station:d}/ray_tracing_reflection'])[..., max_amps, 0][:, 0] == values['n_reflections'])
-
-            triggered = remove_duplicate_triggers(triggered, fin['event_group_ids'])
-            Veff = volume_proj_area * np.sum(weights[triggered]) / n_events
-            Vefferror = 0
-            if(np.sum(weights[triggered]) > 0):
-                Vefferror = Veff / np.sum(weights[triggered]) ** 0.5
-            FC_low, FC_high = FC_limits(np.sum(weights[triggered]))
-            Veff_low = volume_proj_area * FC_low / n_events
-            Veff_high = volume_proj_area * FC_high / n_events
-
-            if('efficiency' in values.keys() and Veff > 0):
+                    triggered = triggered & (fin[f'station_{station:d}/ray_tracing_reflection'][..., max_amps, 0][:, 0] == values['n_reflections'])
+            masks[:, n_triggers + iC] = triggered
+        masks = remove_duplicate_triggers(masks, gids)
+
+        for iT, trigger_name in enumerate(trigger_names):
+            weight_sum = np.sum(weights[masks[:, iT]])
+            out[veff_aeff][trigger_name] = [weight_sum, weight_sum]
+
+        for iC, (trigger_name, values) in enumerate(iteritems(trigger_combinations)):
+            triggered = masks[:, n_triggers + iC]
+            weight_sum = np.sum(weights[triggered])
+            out[veff_aeff][trigger_name] = [weight_sum, weight_sum]
+
+            if('efficiency' in values.keys() and weight_sum > 0):
                 get_efficiency = values['efficiency']['func']
                 channel_ids = values['efficiency']['channel_ids']
-                gids = np.array(fin['event_group_ids'])
-                ugids = np.unique(np.array(fin['event_group_ids']))
-
-                # calculate the group event ids that triggered
-                ugids_triggered_index = []
-                ugids_triggered = []
-                for i_ugid, ugid in enumerate(ugids):
-                    mask = ugid == gids
-                    if(np.any(triggered[mask])):
-                        ugids_triggered_index.append(i_ugid)
-                        ugids_triggered.append(ugid)
-                ugids_triggered = np.array(ugids_triggered)
-                ugids_triggered_index = np.array(ugids_triggered_index)
 
+                # the (sorted) event group ids that triggered
+                ugids_triggered = np.unique(gids[triggered])
                 n_unique_gids = len(ugids_triggered)
-                sorter = np.argsort(ugids_triggered)
                 max_amplitudes = np.zeros(n_unique_gids)
                 for key in fin.keys():
                     if(key.startswith("station_")):
-                        if('event_group_ids' not in fin[key]):
+                        if(f'{key}/event_group_ids' not in fin):
                             continue  # the station might have no triggers
-                        sgids = np.array(fin[key]['event_group_ids'])
-                        usgids = np.unique(sgids)
-                        usgids, comm1, comm2 = np.intersect1d(usgids, ugids_triggered, assume_unique=True, return_indices=True)  # select only the gids that triggered
-                        common_mask = np.isin(sgids, usgids)
-                        sgids = sgids[common_mask]  # also reduce gids array to the event groups that triggered
-                        if(len(usgids) == 0):  # skip stations that don't have any trigger for this trigger combination
+                        sgids = fin[f'{key}/event_group_ids']
+                        # select only the events of the event groups that triggered
+                        index = np.minimum(np.searchsorted(ugids_triggered, sgids), n_unique_gids - 1)
+                        common_mask = ugids_triggered[index] == sgids
+                        if(not np.any(common_mask)):  # skip stations that don't have any trigger for this trigger combination
                             continue
-                        usgids_index = sorter[np.searchsorted(ugids_triggered, usgids, sorter=sorter)]
-                        # each station might have multiple triggeres per event group id. We need to select the one
-                        # event with the largest amplitude. Let's first check if one event group created more than one event
-                        max_amps_per_event_channel = np.nan_to_num(np.array(fin[key]['maximum_amplitudes_envelope'])[common_mask])
+                        max_amps_per_event_channel = np.nan_to_num(fin[f'{key}/maximum_amplitudes_envelope'][common_mask])
                         max_amps_per_event = np.amax(max_amps_per_event_channel[:, channel_ids], axis=1)  # select the maximum amplitude of all considered channels
-                        if(len(sgids) != len(usgids)):
-                            # at least one event group created more than one event. Let's calculate it the slow but correct way
-                            for sgid in np.unique(sgids):  # loop over all event groups which triggered this station
-                                if(sgid not in usgids):
-                                    continue
-                                mask_gid = sgid == sgids  # select all event that are part of this event group
-                                index = np.squeeze(np.argwhere(ugids_triggered == sgid))
-                                max_amplitudes[index] = max(max_amplitudes[index], max_amps_per_event[mask_gid].max())
-                        else:
-                            max_amplitudes[usgids_index] = np.maximum(max_amplitudes[usgids_index], max_amps_per_event)
+                        # each station might have multiple events per event group id. We select the one
+                        # with the largest amplitude (unbuffered, so repeated indices are handled correctly)
+                        np.maximum.at(max_amplitudes, index[common_mask], max_amps_per_event)
                 if('scale' in values['efficiency']):
                     max_amplitudes *= values['efficiency']['scale']
                 if("Vrms" in values['efficiency']):
                     Vrms = values['efficiency']['Vrms']
-                e = get_efficiency(max_amplitudes / Vrms)  # we calculated the maximum amplitudes for all gids, now we select only those that triggered
-                Veff = volume_proj_area * np.sum(weights[triggered] * e) / n_events
-                Vefferror = 0
-                if(np.sum(weights[triggered]) > 0):
-                    Vefferror = Veff / np.sum(weights[triggered] * e) ** 0.5
-                FC_low, FC_high = FC_limits(np.sum(weights[triggered] * e))
-                Veff_low = volume_proj_area * FC_low / n_events
-                Veff_high = volume_proj_area * FC_high / n_events
-
-            out[veff_aeff][trigger_name] = [Veff, Vefferror, np.sum(weights[triggered]), Veff_low, Veff_high]
+                # we calculated the maximum amplitudes for all gids that triggered, now we assign them to the triggered showers
+                e = get_efficiency(max_amplitudes[np.searchsorted(ugids_triggered, gids[triggered])] / Vrms)
+                out[veff_aeff][trigger_name] = [weight_sum, np.sum(weights[triggered] * e)]
+    return out, volume_proj_area, n_events
+
+
+def combine_Veff_Aeff_partials(partials, veff_aeff="veff"):
+    """
+    combines the results of `get_Veff_Aeff_partial` of one file into the effective volume or effective area
+
+    Parameters
+    ----------
+    partials: list of tuples
+        the return values of `get_Veff_Aeff_partial` for disjoint row ranges of the same file,
+        ordered by the row ranges
+    veff_aeff: string
+        "veff" or "aeff_surface_muons"
+
+    Returns
+    ----------
+    dictionary with the properties of the file. The entries of `out[veff_aeff]` are lists of
+    the effective volume, its uncertainty, the weighted sum of triggered events,
+    lower 68% uncertainty, upper 68% uncertainty
+    """
+    out, volume_proj_area, n_events = partials[0]
+    out = copy.copy(out)
+    out['SNRs'] = {}
+    out[veff_aeff] = {}
+    weight_sums = {}
+    for partial in partials:
+        for trigger_name, value in partial[0][veff_aeff].items():
+            weight_sums[trigger_name] = np.array(value) + weight_sums.get(trigger_name, 0)
+        for trigger_name, SNRs in partial[0]['SNRs'].items():
+            if(isinstance(SNRs, dict)):
+                out['SNRs'].setdefault(trigger_name, {})
+                for iS, SNR in SNRs.items():
+                    out['SNRs'][trigger_name][iS] = np.append(out['SNRs'][trigger_name].get(iS, []), SNR)
+            else:
+                out['SNRs'][trigger_name] = SNRs if trigger_name not in out['SNRs'] else np.append(out['SNRs'][trigger_name], SNRs, axis=0)
+    for trigger_name, (weight_sum, efficiency_weight_sum) in weight_sums.items():
+        # the effective volume is calculated from the efficiency weighted sum of triggered events
+        out[veff_aeff][trigger_name] = get_Veff_and_uncertainties(efficiency_weight_sum, volume_proj_area, n_events)
+        out[veff_aeff][trigger_name][2] = weight_sum
     return out
 
 
-def tmp(args):
-    return get_Veff_Aeff_single(*args)
+def get_Veff_Aeff_single(filename, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff="veff", mmap=False):
+    """
+    calculates the effective volume or effective area from surface muons from a single NuRadioMC hdf5 file
+
+    the effective volume is NOT normalized to a water equivalent. It is also NOT multiplied with the solid angle (typically 4pi).
+    See `get_Veff_Aeff_partial` for a description of the parameters.
+
+    Returns
+    ----------
+    dictionary with the properties of the file, see `combine_Veff_Aeff_partials`
+    """
+    partial = get_Veff_Aeff_partial(filename, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff, mmap)
+    return combine_Veff_Aeff_partials([partial], veff_aeff)
+
+
+def get_file_info(filename):
+    """
+    returns the information needed to schedule the calculation of the effective volume of a file
+
+    Only the attributes and the shape of the data sets are read.
+
+    Parameters
+    ----------
+    filename: string
+        filename of the hdf5 file
+
+    Returns
+    -------
+    dictionary with the keys 'filename', 'size' (in bytes), 'n_rows' (number of showers),
+    'trigger_names' and 'deposited' (None if the attributes are not present)
+    """
+    with h5py.File(filename, 'r') as fin:
+        n_rows = 0
+        if('event_group_ids' in fin):
+            n_rows = fin['event_group_ids'].shape[0]
+        return {'filename': filename,
+                'size': os.path.getsize(filename),
+                'n_rows': n_rows,
+                'trigger_names': fin.attrs.get('trigger_names', None),
+                'deposited': fin.attrs.get('deposited', None)}
+
+
+def get_event_group_boundary(event_group_ids, row, block_size=10000):
+    """
+    returns the first row >= `row` at which a new event group starts
+
+    The rows of one event group are contiguous in NuRadioMC files, so row ranges between
+    these boundaries never split an event group.
+
+    Parameters
+    ----------
+    event_group_ids: array or h5py.Dataset
+        the event group ids of all showers
+    row: int
+        the row index
+    block_size: int
+        the number of event group ids that are read at once
+
+    Returns
+    -------
+    int: the row index of the boundary (the number of rows if there is no boundary after `row`)
+    """
+    n_rows = event_group_ids.shape[0]
+    if(row <= 0):
+        return 0
+    while(row < n_rows):
+        block = event_group_ids[row - 1:min(row + block_size, n_rows)]
+        changes = np.nonzero(block[1:] != block[:-1])[0]
+        if(len(changes)):
+            return row + changes[0]
+        row += block_size
+    return n_rows
+
+
+def _get_Veff_Aeff_task(args):
+    """
+    process one task of `get_Veff_Aeff`, i.e. a file or a range of rows of it
+    """
+    iF, size, rows, filename = args[:4]
+    if(rows is not None):
+        with h5py.File(filename, 'r') as fin:
+            rows = tuple(get_event_group_boundary(fin['event_group_ids'], row) for row in rows)
+        if(rows[0] == rows[1]):  # the range is part of the event group of the previous range
+            return iF, size, rows, None
+    return iF, size, rows, get_Veff_Aeff_partial(filename, *args[4:], rows=rows)
 
 
 def get_Veff_Aeff(folder,
              trigger_combinations={},
              station=101,
              veff_aeff="veff",
-             n_cores=1):
+             n_cores=1,
+             mmap=False,
+             n_tasks_per_core=4,
+             min_rows_per_task=100000):
     """
     calculates the effective volume or effective area from surface muons from NuRadioMC hdf5 files
 
@@ -449,6 +658,13 @@ def get_Veff_Aeff(folder,
         
     n_cores: int
         the number of cores to use
+    mmap: bool
+        if True, the (uncompressed) data sets are memory mapped instead of being read into memory
+    n_tasks_per_core: int
+        if more than one core is used, large files are split into ranges of rows (at event group
+        boundaries) such that every task processes about 1/(n_cores * n_tasks_per_core) of the data
+    min_rows_per_task: int
+        files are not split into ranges with less rows than this
 
     Returns
     ----------
@@ -466,22 +682,27 @@ def get_Veff_Aeff(folder,
         if(len(glob.glob(os.path.join(folder, '*.hdf5'))) == 0):
             raise FileNotFoundError(f"couldnt find any hdf5 file in folder {folder}")
         filenames = sorted(glob.glob(os.path.join(folder, '*.hdf5')))
-    for iF, filename in enumerate(filenames):
-        fin = h5py.File(filename, 'r')
-        if 'deposited' in fin.attrs:
-            deposited = fin.attrs['deposited']
+
+    from multiprocessing import Pool
+    # only the attributes are needed to find the trigger names and to schedule the tasks
+    if(n_cores == 1):
+        infos = [get_file_info(filename) for filename in filenames]
+    else:
+        with Pool(n_cores) as p:
+            infos = p.map(get_file_info, filenames)
+    for info in infos:
+        if info['deposited'] is not None:
+            deposited = info['deposited']
             if prev_deposited is None:
                 prev_deposited = deposited
             elif prev_deposited != deposited:
                 raise AttributeError("The deposited parameter is not consistent among the input files!")
 
-        if('trigger_names' in fin.attrs):
-            trigger_names = fin.attrs['trigger_names']
-            if(len(trigger_names) > 0):
-                for iT, trigger_name in enumerate(trigger_names):
-                    trigger_names_dict[trigger_name] = iT
-                logger.info(f"first file with triggernames {filename}: {trigger_names}")
-                break
+        if(trigger_names is None and info['trigger_names'] is not None and len(info['trigger_names']) > 0):
+            trigger_names = info['trigger_names']
+            for iT, trigger_name in enumerate(trigger_names):
+                trigger_names_dict[trigger_name] = iT
+            logger.info(f"first file with triggernames {info['filename']}: {trigger_names}")
 
     trigger_combinations['all_triggers'] = {'triggers': trigger_names}
     logger.info(f"Trigger names:  {trigger_names}")
@@ -493,23 +714,49 @@ def get_Veff_Aeff(folder,
                 logger.warning(f"trigger {value} not available, removing this trigger from the trigger combination {key}")
                 trigger_combinations[key]['triggers'].pop(i)
                 i -= 1
-    from multiprocessing import Pool
-    logger.warning(f"running {len(filenames)} jobs on {n_cores} cores")
 
+    # large files are split into ranges of rows to balance the load between the processes. This is not
+    # possible for the `n_reflections` option which uses the station data sets row by row.
+    total_size = sum([info['size'] for info in infos])
+    split_files = n_cores > 1 and not np.any(['n_reflections' in values for values in trigger_combinations.values()])
     args = []
-    for f in filenames:
-        args.append([f, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff])
+    for iF, info in enumerate(infos):
+        n_parts = 1
+        if(split_files and total_size > 0):
+            n_parts = int(np.ceil(info['size'] * n_cores * n_tasks_per_core / total_size))
+            n_parts = max(1, min(n_parts, info['n_rows'] // min_rows_per_task))
+        options = [info['filename'], trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff, mmap]
+        if(n_parts == 1):
+            args.append([iF, info['size'], None] + options)
+        else:
+            edges = np.linspace(0, info['n_rows'], n_parts + 1).astype(int)
+            for start, stop in zip(edges[:-1], edges[1:]):
+                args.append([iF, info['size'] * (stop - start) / info['n_rows'], (start, stop)] + options)
+    # the largest tasks first, the small ones fill the gaps at the end
+    args = sorted(args, key=lambda x: -x[1])
+    logger.warning(f"running {len(args)} jobs ({len(filenames)} files) on {n_cores} cores")
+
+    partials = [[] for filename in filenames]
+    processed_size = 0
+
+    def collect(results):
+        nonlocal processed_size
+        for iTask, (iF, size, rows, partial) in enumerate(results):
+            if(partial is not None):
+                partials[iF].append((0 if rows is None else rows[0], partial))
+            processed_size += size
+            logger.info(f"finished {iTask + 1}/{len(args)} jobs ({processed_size / max(total_size, 1):.0%} of the data)")
+
     if n_cores == 1:
-        output = []
-        for arg in args:
-            output.append(tmp(arg))
-        return output
+        collect(map(_get_Veff_Aeff_task, args))
     else:
         with Pool(n_cores) as p:
-            output = p.map(tmp, args)
-            print("output")
-            print(output)
-            return output
+            collect(p.imap_unordered(_get_Veff_Aeff_task, args))
+    output = []
+    for iF in range(len(filenames)):
+        # the partial results of a file are combined in the order of the rows
+        output.append(combine_Veff_Aeff_partials([partial for start, partial in sorted(partials[iF], key=lambda x: x[0])], veff_aeff))
+    return output
 
 
 def get_Veff_Aeff_array(data):
@@ -1,12 +1,29 @@
 import numpy as np
 from NuRadioReco.utilities import units
-from scipy.interpolate import interp1d
 from scipy import constants
 import logging
 
 logger = logging.getLogger("cross sections")
 
 
+# parameters of the CTW cross section parameterization, see `param`
+_ctw_coefficients = {
+    'cc': (-1.826, -17.31, -6.406, 1.431, -17.91),  # nu, CC
+    'nc': (-1.826, -17.31, -6.448, 1.431, -18.61),  # nu, NC
+    'cc_bar': (-1.033, -15.95, -7.247, 1.569, -17.72),  # nu_bar, CC
+    'nc_bar': (-1.033, -15.95, -7.296, 1.569, -18.30),  # nu_bar, NC
+
+    'nc_up': (-1.456, 32.23, -32.32, 5.881, -49.41),  # nu, NC
+    'cc_up': (-1.456, 33.47, -33.02, 6.026, -49.41),  # nu, CC
+    'nc_bar_up': (-2.945, 143.2, -76.70, 11.75, -142.8),  # nu_bar, NC
+    'cc_bar_up': (-2.945, 144.5, -77.44, 11.9, -142.8),  # nu_bar, CC
+    'nc_down': (-15.35, 16.16, 37.71, -8.801, -253.1),  # nu, NC
+    'cc_down': (-15.35, 13.86, 39.84, -9.205, -253.1),  # nu, CC
+    'nc_bar_down': (-13.08, 15.17, 31.19, -7.757, -216.1),  # nu_bar, NC
+    'cc_bar_down': (-13.08, 12.48, 33.52, -8.191, -216.1)  # nu_bar, CC
+}
+
+
 def param(energy, inttype='cc'):
     """
     Parameterization and constants as used in
@@ -21,34 +38,10 @@ def param(energy, inttype='cc'):
         else:
             return np.nan
 
-    if inttype == 'cc':
-        c = (-1.826, -17.31, -6.406, 1.431, -17.91)  # nu, CC
-    elif inttype == 'nc':
-        c = (-1.826, -17.31, -6.448, 1.431, -18.61)  # nu, NC
-    elif inttype == 'cc_bar':
-        c = (-1.033, -15.95, -7.247, 1.569, -17.72)  # nu_bar, CC
-    elif inttype == 'nc_bar':
-        c = (-1.033, -15.95, -7.296, 1.569, -18.30)  # nu_bar, NC
-
-    elif inttype == 'nc_up':
-        c = (-1.456, 32.23, -32.32, 5.881, -49.41)  # nu, NC
-    elif inttype == 'cc_up':
-        c = (-1.456, 33.47, -33.02, 6.026, -49.41)  # nu, CC
-    elif inttype == 'nc_bar_up':
-        c = (-2.945, 143.2, -76.70, 11.75, -142.8)  # nu_bar, NC
-    elif inttype == 'cc_bar_up':
-        c = (-2.945, 144.5, -77.44, 11.9, -142.8)  # nu_bar, CC
-    elif inttype == 'nc_down':
-        c = (-15.35, 16.16, 37.71, -8.801, -253.1)  # nu, NC
-    elif inttype == 'cc_down':
-        c = (-15.35, 13.86, 39.84, -9.205, -253.1)  # nu, CC
-    elif inttype == 'nc_bar_down':
-        c = (-13.08, 15.17, 31.19, -7.757, -216.1)  # nu_bar, NC
-    elif inttype == 'cc_bar_down':
-        c = (-13.08, 12.48, 33.52, -8.191, -216.1)  # nu_bar, CC
-    else:
+    if inttype not in _ctw_coefficients:
         logger.error("Type {0} of interaction not defined".format(inttype))
         raise NotImplementedError
+    c = _ctw_coefficients[inttype]
 
     epsilon = np.log10(energy / units.GeV)
     l_eps = np.log(epsilon - c[0])
@@ -57,113 +50,136 @@ def param(energy, inttype='cc'):
     return crscn
 
 
+def _evaluate_per_group(energy, groups, n_groups, evaluate):
+    """
+    evaluates the cross sections for scalars or arrays of energies. The cross sections of all elements
+    with `groups == i` are calculated in one call of `evaluate(energies, i)`, elements that don't belong to
+    any group (negative group) get zero.
+    """
+    shape = np.broadcast(energy, groups).shape
+    if(shape == ()):  # single neutrino, no bookkeeping of the groups needed
+        if(groups < 0 or groups >= n_groups):
+            return 0.
+        return evaluate(energy, int(groups))
+    energy = np.broadcast_to(energy, shape).flatten()
+    groups = np.broadcast_to(groups, shape).flatten()
+    crscn = np.zeros(energy.shape)
+    for i in range(n_groups):
+        indices = np.nonzero(groups == i)[0]
+        if(len(indices)):
+            crscn[indices] = evaluate(energy[indices], i)
+    return crscn.reshape(shape)
+
+
+def _param_per_group(energy, groups, inttypes):
+    """
+    evaluates the CTW parameterization, all elements with `groups == i` get the sum of the cross sections of the
+    interaction types `inttypes[i]`
+    """
+    def evaluate(group_energy, i):
+        crscn = param(group_energy, inttypes[i][0])
+        for inttype in inttypes[i][1:]:
+            crscn = crscn + param(group_energy, inttype)
+        return crscn
+
+    return _evaluate_per_group(energy, groups, len(inttypes), evaluate)
+
+
+# tabulated CSMS cross sections, columns are energy (GeV), CC and NC cross section (picobarn)
+_csms_neutrino = np.array((
+    [50, 0.32, 0.10],
+    [100, 0.65, 0.20],
+    [200, 1.3, 0.41],
+    [500, 3.2, 1.0],
+    [1000, 6.2, 2.0],
+    [2000, 12., 3.8],
+    [5000, 27., 8.6],
+    [10000, 47., 15.],
+    [20000, 77., 26.],
+    [50000, 140., 49.],
+    [100000, 210., 75.],
+    [200000, 310., 110.],
+    [500000, 490., 180.],
+    [1e6, 690., 260.],
+    [2e6, 950., 360.],
+    [5e6, 1400., 540.],
+    [1e7, 1900., 730.],
+    [2e7, 2600., 980.],
+    [5e7, 3700., 1400.],
+    [1e8, 4800., 1900.],
+    [2e8, 6200., 2400.],
+    [5e8, 8700., 3400.],
+    [1e9, 11000., 4400.],
+    [2e9, 14000., 5600.],
+    [5e9, 19000., 7600.],
+    [1e10, 24000., 9600.],
+    [2e10, 30000., 12000.],
+    [5e10, 39000., 16000.],
+    [1e11, 48000., 20000.],
+    [2e11, 59000., 24000.],
+    [5e11, 75000., 31000.]
+    )) * np.array([units.GeV, units.picobarn, units.picobarn])
+
+_csms_antineutrino = np.array((
+    [50, 0.15, 0.05],
+    [100, 0.33, 0.12],
+    [200, 0.69, 0.24],
+    [500, 1.8, 0.61],
+    [1000, 3.6, 1.20],
+    [2000, 7., 2.4],
+    [5000, 17., 5.8],
+    [10000, 31., 11.],
+    [20000, 55., 19.],
+    [50000, 110., 39.],
+    [100000, 180., 64.],
+    [200000, 270., 99.],
+    [500000, 460., 170.],
+    [1e6, 660., 240.],
+    [2e6, 920., 350.],
+    [5e6, 1400., 530.],
+    [1e7, 1900., 730.],
+    [2e7, 2500., 980.],
+    [5e7, 3700., 1400.],
+    [1e8, 4800., 1900.],
+    [2e8, 6200., 2400.],
+    [5e8, 8700., 3400.],
+    [1e9, 11000., 4400.],
+    [2e9, 14000., 5600.],
+    [5e9, 19000., 7600.],
+    [1e10, 24000., 9600.],
+    [2e10, 30000., 12000.],
+    [5e10, 39000., 16000.],
+    [1e11, 48000., 20000.],
+    [2e11, 59000., 24000.],
+    [5e11, 75000., 31000.]
+    )) * np.array([units.GeV, units.picobarn, units.picobarn])
+
+
+# the CSMS cross sections of neutrinos (CC, NC, total) and antineutrinos (CC, NC, total)
+_csms_energies = _csms_neutrino[:, 0]
+_csms_cross_sections = np.array([_csms_neutrino[:, 1], _csms_neutrino[:, 2], _csms_neutrino[:, 1] + _csms_neutrino[:, 2],
+                                 _csms_antineutrino[:, 1], _csms_antineutrino[:, 2], _csms_antineutrino[:, 1] + _csms_antineutrino[:, 2]])
+
+
 def csms(energy, inttype, flavors):
     """
     Neutrino cross sections according to
     Amanda Cooper-Sarkar, Philipp Mertsch, Subir Sarkar
     JHEP 08 (2011) 042
-    """
-    if type(inttype) == str:
-        inttype = np.array([inttype] * energy.shape[0])
-
-    if (type(flavors) == int or type(flavors) == np.int64):
-        flavors = np.array([flavors] * energy.shape[0])
-
-    neutrino = np.array((
-        [50, 0.32, 0.10],
-        [100, 0.65, 0.20],
-        [200, 1.3, 0.41],
-        [500, 3.2, 1.0],
-        [1000, 6.2, 2.0],
-        [2000, 12., 3.8],
-        [5000, 27., 8.6],
-        [10000, 47., 15.],
-        [20000, 77., 26.],
-        [50000, 140., 49.],
-        [100000, 210., 75.],
-        [200000, 310., 110.],
-        [500000, 490., 180.],
-        [1e6, 690., 260.],
-        [2e6, 950., 360.],
-        [5e6, 1400., 540.],
-        [1e7, 1900., 730.],
-        [2e7, 2600., 980.],
-        [5e7, 3700., 1400.],
-        [1e8, 4800., 1900.],
-        [2e8, 6200., 2400.],
-        [5e8, 8700., 3400.],
-        [1e9, 11000., 4400.],
-        [2e9, 14000., 5600.],
-        [5e9, 19000., 7600.],
-        [1e10, 24000., 9600.],
-        [2e10, 30000., 12000.],
-        [5e10, 39000., 16000.],
-        [1e11, 48000., 20000.],
-        [2e11, 59000., 24000.],
-        [5e11, 75000., 31000.]
-        ))
-
-    neutrino[:, 0] *= units.GeV
-    neutrino[:, 1] *= units.picobarn  # CC
-    neutrino[:, 2] *= units.picobarn  # NC
-
-    neutrino_cc = interp1d(neutrino[:, 0], neutrino[:, 1], bounds_error=True)
-    neutrino_nc = interp1d(neutrino[:, 0], neutrino[:, 2], bounds_error=True)
-
-    antineutrino = np.array((
-        [50, 0.15, 0.05],
-        [100, 0.33, 0.12],
-        [200, 0.69, 0.24],
-        [500, 1.8, 0.61],
-        [1000, 3.6, 1.20],
-        [2000, 7., 2.4],
-        [5000, 17., 5.8],
-        [10000, 31., 11.],
-        [20000, 55., 19.],
-        [50000, 110., 39.],
-        [100000, 180., 64.],
-        [200000, 270., 99.],
-        [500000, 460., 170.],
-        [1e6, 660., 240.],
-        [2e6, 920., 350.],
-        [5e6, 1400., 530.],
-        [1e7, 1900., 730.],
-        [2e7, 2500., 980.],
-        [5e7, 3700., 1400.],
-        [1e8, 4800., 1900.],
-        [2e8, 6200., 2400.],
-        [5e8, 8700., 3400.],
-        [1e9, 11000., 4400.],
-        [2e9, 14000., 5600.],
-        [5e9, 19000., 7600.],
-        [1e10, 24000., 9600.],
-        [2e10, 30000., 12000.],
-        [5e10, 39000., 16000.],
-        [1e11, 48000., 20000.],
-        [2e11, 59000., 24000.],
-        [5e11, 75000., 31000.]
-    ))
-
-    antineutrino[:, 0] *= units.GeV
-    antineutrino[:, 1] *= units.picobarn  # CC
-    antineutrino[:, 2] *= units.picobarn  # NC
-
-    antineutrino_cc = interp1d(antineutrino[:, 0], antineutrino[:, 1], bounds_error=True)
-    antineutrino_nc = interp1d(antineutrino[:, 0], antineutrino[:, 2], bounds_error=True)
-
-    crscn = np.zeros_like(energy)
-
-    particles_cc = np.where((flavors >= 0) & (inttype == 'cc'))
-    particles_nc = np.where((flavors >= 0) & (inttype == 'nc'))
-    antiparticles_cc = np.where((flavors < 0) & (inttype == 'cc'))
-    antiparticles_nc = np.where((flavors < 0) & (inttype == 'nc'))
-#
-    crscn[particles_cc] = neutrino_cc(energy[particles_cc])
-    crscn[particles_nc] = neutrino_nc(energy[particles_nc])
-    crscn[antiparticles_cc] = antineutrino_cc(energy[antiparticles_cc])
-    crscn[antiparticles_nc] = antineutrino_nc(energy[antiparticles_nc])
 
-    return crscn
+    The tabulated cross sections are interpolated linearly. `energy`, `inttype` and `flavors` can be
+    scalars or arrays which are broadcasted against each other.
+    """
+    energy = np.asarray(energy)
+    if(np.any(energy < _csms_energies[0]) or np.any(energy > _csms_energies[-1])):
+        logger.error(f"CSMS cross sections are only tabulated between {_csms_energies[0]/units.GeV:.0f}GeV and {_csms_energies[-1]/units.GeV:.2g}GeV")
+        raise ValueError("A value in energy is outside of the interpolation range.")
+    inttype = np.asarray(inttype)
+    antiparticles = np.asarray(flavors) < 0
+    groups = np.select([inttype == 'cc', inttype == 'nc', inttype == 'total'],
+                       [3 * antiparticles, 3 * antiparticles + 1, 3 * antiparticles + 2], -1)
+    return _evaluate_per_group(energy, groups, len(_csms_cross_sections),
+                               lambda group_energy, i: np.interp(group_energy, _csms_energies, _csms_cross_sections[i]))
 
 
 def get_nu_cross_section(energy, flavors, inttype='total', cross_section_type='ctw'):
@@ -201,79 +217,19 @@ def get_nu_cross_section(energy, flavors, inttype='total', cross_section_type='c
         crscn = 7.84e-36 * units.cm ** 2 * np.power(energy / units.GeV, 0.363)
 
     elif cross_section_type == 'ctw':
-        crscn = np.zeros_like(energy)
+        # particles and antiparticles have different cross sections
+        antiparticles = np.asarray(flavors) < 0
         if type(inttype) == str:
-            if inttype == 'total':
-
-                if (type(flavors) == int or type(flavors) == np.int64):
-                    if flavors >= 0:
-                        crscn = param(energy, 'nc') + param(energy, 'cc')
-                    else:
-                        crscn = param(energy, 'nc_bar') + param(energy, 'cc_bar')
-                else:
-                    antiparticles = np.where(flavors < 0)
-                    particles = np.where(flavors >= 0)
-
-                    crscn[particles] = param(energy[particles], 'nc') + param(energy[particles], 'cc')
-                    crscn[antiparticles] = param(energy[antiparticles], 'nc_bar') + param(energy[antiparticles], 'cc_bar')
-            elif inttype == 'total_up':
-
-                if (type(flavors) == int or type(flavors) == np.int64):
-                    if flavors >= 0:
-                        crscn = param(energy, 'nc_up') + param(energy, 'cc_up')
-                    else:
-                        crscn = param(energy, 'nc_bar_up') + param(energy, 'cc_bar_up')
-                else:
-                    antiparticles = np.where(flavors < 0)
-                    particles = np.where(flavors >= 0)
-
-                    crscn[particles] = param(energy[particles], 'nc_up') + param(energy[particles], 'cc_up')
-                    crscn[antiparticles] = param(energy[antiparticles], 'nc_bar_up') + param(energy[antiparticles], 'cc_bar_up')
-            elif inttype == 'total_down':
-
-                if (type(flavors) == int or type(flavors) == np.int64):
-                    if flavors >= 0:
-                        crscn = param(energy, 'nc_down') + param(energy, 'cc_down')
-                    else:
-                        crscn = param(energy, 'nc_bar_down') + param(energy, 'cc_bar_down')
-                else:
-                    antiparticles = np.where(flavors < 0)
-                    particles = np.where(flavors >= 0)
-
-                    crscn[particles] = param(energy[particles], 'nc_down') + param(energy[particles], 'cc_down')
-                    crscn[antiparticles] = param(energy[antiparticles], 'nc_bar_down') + param(energy[antiparticles], 'cc_bar_down')
-
+            if inttype in ['total', 'total_up', 'total_down']:
+                suffix = inttype[len('total'):]
+                crscn = _param_per_group(energy, antiparticles.astype(int),
+                                         [('nc' + suffix, 'cc' + suffix), ('nc_bar' + suffix, 'cc_bar' + suffix)])
             else:
-                if (type(flavors) == int or type(flavors) == np.int64):
-                    crscn = param(energy, inttype)
-                else:
-                    antiparticles = np.where(flavors < 0)
-                    particles = np.where(flavors >= 0)
-                    crscn[particles] = param(energy[particles], inttype)
-                    crscn[antiparticles] = param(energy[antiparticles], inttype)
+                crscn = param(energy, inttype)
         else:
-
-                if (type(flavors) == int or type(flavors) == np.int64):
-
-                    particles_cc = np.where(inttype == 'cc')
-                    particles_nc = np.where(inttype == 'nc')
-                    if flavors >= 0:
-                        crscn[particles_cc] = param(energy[particles_cc], 'cc')
-                        crscn[particles_nc] = param(energy[particles_nc], 'nc')
-                    else:
-                        crscn[particles_cc] = param(energy[particles_cc], 'cc_bar')
-                        crscn[particles_nc] = param(energy[particles_nc], 'nc_bar')
-
-                else:
-                    particles_cc = np.where((flavors >= 0) & (inttype == 'cc'))
-                    particles_nc = np.where((flavors >= 0) & (inttype == 'nc'))
-                    antiparticles_cc = np.where((flavors < 0) & (inttype == 'cc'))
-                    antiparticles_nc = np.where((flavors < 0) & (inttype == 'nc'))
-
-                    crscn[particles_cc] = param(energy[particles_cc], 'cc')
-                    crscn[particles_nc] = param(energy[particles_nc], 'nc')
-                    crscn[antiparticles_cc] = param(energy[antiparticles_cc], 'cc_bar')
-                    crscn[antiparticles_nc] = param(energy[antiparticles_nc], 'nc_bar')
+            inttype = np.asarray(inttype)
+            groups = np.select([inttype == 'cc', inttype == 'nc'], [2 * antiparticles, 2 * antiparticles + 1], -1)
+            crscn = _param_per_group(energy, groups, [('cc',), ('nc',), ('cc_bar',), ('nc_bar',)])
 
     elif cross_section_type == 'csms':
         crscn = csms(energy, inttype, flavors)
@@ -292,7 +248,7 @@ def get_interaction_length(Enu, density=.917 * units.g / units.cm ** 3, flavor=1
 
     Parameters
     ----------
-    Enu: float
+    Enu: float or array of floats
         neutrino energy
     density: float (optional)
         density of the medium, default density of ice = 0.917 g/cm**3
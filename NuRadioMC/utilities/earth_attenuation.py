@@ -20,6 +20,8 @@ def get_weight(theta_nu, pnu, flavors, mode='simple', cross_section_type='ctw',
         the zenith angle of the neutrino direction (where it came from, i.e., opposite to the direction of propagation)
     pnu: float or array of floats
         the momentum of the neutrino
+    flavors: int or array of ints
+        the flavor of the neutrino
     mode: string
         * 'simple': assuming interaction happens at the surface and approximating the Earth with constant density
         * 'core_mantle_crust_simple': assuming interaction happens at the surface and approximating the Earth with 3 layers of constant density
@@ -27,33 +29,30 @@ def get_weight(theta_nu, pnu, flavors, mode='simple', cross_section_type='ctw',
         * 'PREM': density of Earth is parameterized as a fuction of radius, path through Earth to interaction vertex is considered
     cross_section_type: string
         'ghandi', 'ctw' or 'csms' (see description in `cross_sections.py`)
-    vertex_position: 3-dim array or None (default)
+    vertex_position: 3-dim array, array of shape (N, 3) or None (default)
         the position of the neutrino interaction
-    phi_nu: float
+    phi_nu: float or array of floats
         the azimuth angle of the neutrino direction
+
+    Returns
+    -------
+    weight: float or array of floats
+        the probability of the neutrino to reach the interaction vertex
     """
     if(mode == 'simple'):
         return get_simple_weight(theta_nu, pnu, cross_section_type=cross_section_type)
     elif (mode == "core_mantle_crust_simple"):
         return get_core_mantle_crust_weight(theta_nu, pnu, flavors, cross_section_type=cross_section_type)
-    elif (mode == "core_mantle_crust"):
-        earth = CoreMantleCrustModel()
-        direction = hp.spherical_to_cartesian(theta_nu, phi_nu)
-        slant_depth = earth.slant_depth(vertex_position, direction)
-        # by requesting the interaction length for a density of 1, we get it in units of length**2/weight
-        L_int = cross_sections.get_interaction_length(pnu, density=1., flavor=flavors, inttype='total',
-                                                      cross_section_type=cross_section_type)
-        return np.exp(-slant_depth / L_int)
-    elif (mode == "PREM"):
-        earth = PREM()
-        direction = hp.spherical_to_cartesian(theta_nu, phi_nu)
+    elif (mode == "core_mantle_crust" or mode == "PREM"):
+        earth = _earth_models[mode]
+        direction = hp.spherical_to_cartesian(np.asarray(theta_nu), np.asarray(phi_nu))
         slant_depth = earth.slant_depth(vertex_position, direction)
         # by requesting the interaction length for a density of 1, we get it in units of length**2/weight
         L_int = cross_sections.get_interaction_length(pnu, density=1., flavor=flavors, inttype='total',
                                                       cross_section_type=cross_section_type)
         return np.exp(-slant_depth / L_int)
     elif (mode == "None"):
-        return 1.
+        return np.ones_like(theta_nu, dtype=float)[()]
     else:
         logger.error('mode {} not supported'.format(mode))
         raise NotImplementedError
@@ -76,12 +75,10 @@ def get_simple_weight(theta_nu, pnu, cross_section_type='ctw'):
     """
     R_earth = 6357390 * units.m
     DensityCRUST = 2900 * units.kg / units.m ** 3
-    if(theta_nu <= 0.5 * np.pi):  # coming from above
-        return np.ones_like(theta_nu)
-    else:  # coming from below
-        sigma = cross_sections.get_nu_cross_section(pnu, flavors=0, cross_section_type=cross_section_type)
-        d = -2 * R_earth * np.cos(theta_nu)
-        return np.exp(-d * sigma * DensityCRUST / AMU)
+    sigma = cross_sections.get_nu_cross_section(pnu, flavors=0, cross_section_type=cross_section_type)
+    # neutrinos coming from above don't traverse the Earth
+    d = np.maximum(-2 * R_earth * np.cos(theta_nu), 0)
+    return np.exp(-d * sigma * DensityCRUST / AMU)
 
 
 def get_core_mantle_crust_weight(theta_nu, pnu, flavors, cross_section_type='ctw'):
@@ -107,21 +104,15 @@ def get_core_mantle_crust_weight(theta_nu, pnu, flavors, cross_section_type='ctw
     densities = np.array([14000.0, 3400.0, 2900.0]) * units.kg / units.m ** 3  # inner layer, middle layer, outer layer
     radii = np.array([3.46e6 * units.m, R_EARTH - 4.0e4 * units.m, R_EARTH])  # average radii of boundaries between earth layers
     sigma = cross_sections.get_nu_cross_section(pnu, flavors, cross_section_type=cross_section_type)
-    if(theta_nu <= 0.5 * np.pi):  # coming from above
-        return np.ones_like(theta_nu)
-    elif (theta_nu <= np.pi - np.arcsin(radii[1] / radii[2])):  # only go through the outer layer
-        d_outer = -2 * R_EARTH * np.cos(theta_nu)
-        weight = np.exp(-d_outer * sigma * densities[2] / AMU)
-    elif (theta_nu <= np.pi - np.arcsin(radii[0] / radii[2])):  # only go through the outer and middle layer
-        d_middle = 2 * np.sqrt(radii[1] * radii[1] - radii[2] * radii[2] * np.sin(np.pi - theta_nu) * np.sin(np.pi - theta_nu))
-        d_outer = -2 * R_EARTH * np.cos(theta_nu) - d_middle
-        weight = np.exp(-d_outer * sigma * densities[2] / AMU - d_middle * sigma * densities[1] / AMU)
-    else:  # go through all three layers
-        d_inner = 2 * np.sqrt(radii[0] * radii[0] - radii[2] * radii[2] * np.sin(np.pi - theta_nu) * np.sin(np.pi - theta_nu))
-        d_middle = 2 * np.sqrt(radii[1] * radii[1] - radii[2] * radii[2] * np.sin(np.pi - theta_nu) * np.sin(np.pi - theta_nu)) - d_inner
-        d_outer = -2 * R_EARTH * np.cos(theta_nu) - d_middle - d_inner
-        weight = np.exp(-d_outer * sigma * densities[2] / AMU - d_middle * sigma * densities[1] / AMU - d_inner * sigma * densities[0] / AMU)
-    return weight
+    # length of the chord through the Earth (zero for neutrinos coming from above) and through the inner
+    # and middle layer, the chord only crosses a layer if its impact parameter is smaller than the layer radius
+    upgoing = np.asarray(theta_nu) > 0.5 * np.pi
+    d_total = np.where(upgoing, -2 * R_EARTH * np.cos(theta_nu), 0)
+    impact_parameter = radii[2] * np.sin(theta_nu)
+    d_inner = np.where(upgoing, 2 * np.sqrt(np.maximum(radii[0] ** 2 - impact_parameter ** 2, 0)), 0)
+    d_middle = np.where(upgoing, 2 * np.sqrt(np.maximum(radii[1] ** 2 - impact_parameter ** 2, 0)), 0) - d_inner
+    d_outer = d_total - d_middle - d_inner
+    return np.exp(-d_outer * sigma * densities[2] / AMU - d_middle * sigma * densities[1] / AMU - d_inner * sigma * densities[0] / AMU)
 
 
 # PREM class from pyrex: https://github.com/bhokansonfasig/pyrex/blob/d84a3270efa19fb4a21590510f7c3458845c9600/pyrex/earth_model.py
@@ -177,6 +168,22 @@ class PREM:
         1.02 * units.g / units.cm ** 3
     )
 
+    # the same densities as polynomial coefficients (constant, x, x**2, x**3) which are used to integrate the density
+    # along a chord analytically
+    density_coefficients = (
+        (13.0885, 0, -8.8381, 0),
+        (12.5815, -1.2638, -3.6426, -5.5281),
+        (7.9565, -6.4761, 5.5283, -3.0807),
+        (5.3197, -1.4836, 0, 0),
+        (11.2494, -8.0298, 0, 0),
+        (7.1089, -3.8045, 0, 0),
+        (2.691, 0.6924, 0, 0),
+        (2.9, 0, 0, 0),
+        (2.6, 0, 0, 0),
+        (1.02, 0, 0, 0)
+    )
+    density_coefficients_unit = units.g / units.cm ** 3
+
     def density(self, r):
         """
         Calculates the Earth's density at a given radius.
@@ -200,29 +207,36 @@ class PREM:
                           zip(radius_bounds[:-1], radius_bounds[1:]))
         return np.piecewise(r / self.earth_radius, conditions, self.densities)
 
-    def slant_depth(self, endpoint, direction, step=500 * units.m):
+    def slant_depth(self, endpoint, direction, step=None):
         """
         Calculates the column density of a chord cutting through Earth.
 
         Integrates the Earth's density along the chord, resulting in a column
-        density (or material thickness) with units of mass per area.
+        density (or material thickness) with units of mass per area. The
+        density of every layer is a polynomial in the radius, so the integral
+        over the part of the chord within each layer is calculated analytically.
+
+        Supports passing arrays of endpoints and directions.
 
         Parameters
         ----------
         endpoint : array_like
             Vector position of the chord endpoint, in a coordinate system
             centered on the surface of the Earth (e.g. a negative third
-            coordinate represents the depth below the surface).
+            coordinate represents the depth below the surface). Either a
+            3-dim vector or an array of shape (N, 3).
         direction : array_like
             Vector direction of the chord, in a coordinate system
             centered on the surface of the Earth (e.g. a negative third
-            coordinate represents the chord pointing into the Earth).
+            coordinate represents the chord pointing into the Earth). Either a
+            3-dim vector or an array of shape (N, 3).
         step : float, optional
-            Step size for the integration.
+            Not used anymore (was the step size of the numerical integration),
+            only kept for backwards compatibility.
 
         Returns
         -------
-        float
+        float or array of floats
             Column density along the chord starting from `depth` and
             passing through the Earth at `angle`.
 
@@ -231,32 +245,51 @@ class PREM:
         PREM.density : Calculates the Earth's density at a given radius.
 
         """
+        single = (np.ndim(endpoint) == 1) and (np.ndim(direction) == 1)
         # Convert to Earth-centric coordiante system (e.g. center of the Earth
-        # is at (0, 0, 0))
-        endpoint = np.array([endpoint[0], endpoint[1],
-                             endpoint[2] + self.earth_radius])
-        direction /= np.linalg.norm(direction)
-        dot_prod = np.dot(endpoint, direction)
-        # Check for intersection of line and sphere
-        discriminant = dot_prod ** 2 - np.sum(endpoint ** 2) + self.earth_radius ** 2
-        if discriminant <= 0:
-            return 0
-        # Calculate the distance at which the line intersects the sphere
-        distance = -dot_prod + np.sqrt(discriminant)
-        if distance <= 0:
-            return 0
-        # Parameterize line integral with ts from 0 to 1, with steps just under
-        # the given step size (in meters)
-        n_steps = int(distance / step)
-        if distance % step:
-            n_steps += 1
-        ts = np.linspace(0, 1, n_steps)
-        xs = endpoint[0] + ts * distance * direction[0]
-        ys = endpoint[1] + ts * distance * direction[1]
-        zs = endpoint[2] + ts * distance * direction[2]
-        rs = np.sqrt(xs ** 2 + ys ** 2 + zs ** 2)
-        rhos = self.density(rs)
-        return np.trapz(rhos * distance, ts)
+        # is at (0, 0, 0)) and use the Earth radius as unit of length
+        endpoint = np.array(endpoint, dtype=float, ndmin=2)
+        endpoint[:, 2] += self.earth_radius
+        endpoint /= self.earth_radius
+        direction = np.array(direction, dtype=float, ndmin=2)
+        direction = direction / np.linalg.norm(direction, axis=1, keepdims=True)
+        # the chord is parameterized by the distance s to the point of closest approach to the center of the Earth,
+        # i.e. r(s)**2 = b**2 + s**2 with the impact parameter b. The chord starts at the endpoint.
+        s_start = np.sum(endpoint * direction, axis=1)
+        b2 = np.maximum(np.sum(endpoint ** 2, axis=1) - s_start ** 2, 0)
+        radii = np.array(self.radii) / self.earth_radius
+
+        def integrals(s):
+            """
+            returns the antiderivatives of r(s)**k (k = 0, 1, 2, 3) with respect to s
+            """
+            r = np.sqrt(b2 + s ** 2)
+            b = np.sqrt(b2)
+            asinh = np.where(b > 0, np.arcsinh(s / np.where(b > 0, b, 1)), 0)
+            return np.array([s,
+                             0.5 * (s * r + b2 * asinh),
+                             b2 * s + s ** 3 / 3.,
+                             0.25 * s * r ** 3 + 0.375 * b2 * s * r + 0.375 * b2 ** 2 * asinh])
+
+        def sphere_integrals(radius):
+            """
+            returns the integrals of r**k (k = 0, 1, 2, 3) along the part of the chord that is inside of a sphere
+            """
+            # the chord intersects the sphere at s = +-h, the chord only covers s > s_start
+            h = np.sqrt(np.maximum(radius ** 2 - b2, 0))
+            s_low = np.minimum(np.maximum(-h, s_start), h)
+            return integrals(h) - integrals(s_low)
+
+        column_density = np.zeros(len(endpoint))
+        inner = np.zeros((4, len(endpoint)))
+        for radius, coefficients in zip(radii, self.density_coefficients):
+            outer = sphere_integrals(radius)
+            column_density += np.dot(coefficients, outer - inner)
+            inner = outer
+        column_density *= self.density_coefficients_unit * self.earth_radius
+        if(single):
+            return column_density[0]
+        return column_density
 
 
 class CoreMantleCrustModel(PREM):
@@ -288,3 +321,9 @@ class CoreMantleCrustModel(PREM):
 
     densities = (14 * units.g / units.cm ** 3, 3.4 * units.g / units.cm ** 3, 2.9 * units.g / units.cm ** 3)
 
+    density_coefficients = ((14, 0, 0, 0), (3.4, 0, 0, 0), (2.9, 0, 0, 0))
+
+
+# the Earth models are stateless, so one instance per model is shared by all weight calculations
+_earth_models = {'core_mantle_crust': CoreMantleCrustModel(), 'PREM': PREM()}
+
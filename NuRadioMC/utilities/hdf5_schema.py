@@ -0,0 +1,183 @@
+"""
+This module defines how the data sets of the NuRadioMC input and output hdf5 files
+are stored on disk. The schema version is saved as the file attribute 'schema_version'.
+
+Schema version 1 (default, also files without 'schema_version' attribute):
+    categorical fields (e.g. 'interaction_type' and 'shower_type') are stored as
+    variable-length utf-8 strings, all other fields with the dtype of the data
+    (typically int64 and float64)
+
+Schema version 2 (compact):
+    categorical fields are stored as 1-byte HDF5 enums, the mapping between the
+    categories and the integer codes is part of the dtype of the data set.
+    Particle codes and interaction numbers are stored as int32 and quantities
+    that don't need double precision (energies, inelasticities and angles) as
+    float32. Positions and times keep double precision. By default, all data sets
+    are chunked and compressed.
+
+Files of both schema versions are read with `read_dataset`, which converts the data
+sets back to the in-memory representation.
+"""
+
+import numpy as np
+import h5py
+import logging
+logger = logging.getLogger("HDF5-schema")
+
+SCHEMA_VERSION_DEFAULT = 1
+SCHEMA_VERSION_COMPACT = 2
+
+# the categories of the categorical fields, the index is the integer code of the enum
+categories = ('cc', 'nc', 'had', 'em')
+categorical_keys = ('interaction_type', 'shower_type')
+categories_dtype = h5py.enum_dtype({category: code for code, category in enumerate(categories)}, basetype='i1')
+
+compact_dtypes = {'flavors': np.int32,
+                  'n_interaction': np.int32,
+                  'energies': np.float32,
+                  'shower_energies': np.float32,
+                  'inelasticity': np.float32,
+                  'zeniths': np.float32,
+                  'azimuths': np.float32}
+
+compact_dataset_options = {'chunks': True, 'compression': 'gzip', 'compression_opts': 4, 'shuffle': True}
+
+
+def get_schema_version(attributes):
+    """
+    Returns the schema version of a file from its attributes
+
+    Parameters
+    ----------
+    attributes: dict or h5py attributes
+        the attributes of the file
+
+    Returns
+    -------
+    schema_version: int
+    """
+    return int(attributes.get('schema_version', SCHEMA_VERSION_DEFAULT))
+
+
+def get_dataset_options(dataset_options, key):
+    """
+    Returns the keyword arguments of `h5py.Group.create_dataset` for one data set
+
+    Parameters
+    ----------
+    dataset_options: dict or None
+        keyword arguments for all data sets. Entries whose value is a dictionary
+        are the options of the data set with this name and update the options
+        for all data sets, e.g. {'compression': 'gzip', 'xx': {'compression': 'lzf'}}
+    key: string
+        name of the data set
+
+    Returns
+    -------
+    options: dict
+    """
+    if(dataset_options is None):
+        return {}
+    options = {k: v for k, v in dataset_options.items() if not isinstance(v, dict)}
+    if(isinstance(dataset_options.get(key, None), dict)):
+        options.update(dataset_options[key])
+    return options
+
+
+def encode_dataset(key, value, schema_version=SCHEMA_VERSION_DEFAULT):
+    """
+    Converts the data of a data set to its on-disk representation
+
+    Parameters
+    ----------
+    key: string
+        name of the data set
+    value: array
+        data of the data set
+    schema_version: int
+        the schema version of the file
+
+    Returns
+    -------
+    value: array
+        the data with the dtype that is written to the file
+    """
+    value = np.asarray(value)
+    if(schema_version == SCHEMA_VERSION_COMPACT):
+        if(key in categorical_keys and value.dtype.kind in ['U', 'S', 'O']):
+            strings = value.astype('U')
+            unique_strings, inverse = np.unique(strings, return_inverse=True)
+            if(np.all(np.isin(unique_strings, categories))):
+                codes = np.array([categories.index(category) for category in unique_strings], dtype=np.int8)
+                return codes[inverse].reshape(value.shape).astype(categories_dtype)
+            logger.warning(f"data set {key} contains values that are not part of the categories {categories}, it is stored as strings")
+        elif(key in compact_dtypes and value.dtype.kind in ['i', 'u', 'f']):
+            return value.astype(compact_dtypes[key])
+    elif(schema_version != SCHEMA_VERSION_DEFAULT):
+        logger.error(f"schema version {schema_version} is not supported")
+        raise ValueError(f"schema version {schema_version} is not supported")
+
+    if(value.dtype.kind == 'U'):
+        return np.array(value, dtype=h5py.string_dtype(encoding='utf-8'))
+    return value
+
+
+def write_dataset(group, key, value, schema_version=SCHEMA_VERSION_DEFAULT, dataset_options=None):
+    """
+    Writes a data set in the format of the given schema version
+
+    Parameters
+    ----------
+    group: h5py.File or h5py.Group
+        the file or group the data set is written to
+    key: string
+        name of the data set
+    value: array
+        data of the data set
+    schema_version: int
+        the schema version of the file
+    dataset_options: dict or None
+        keyword arguments of `h5py.Group.create_dataset`, see `get_dataset_options`.
+        If None, the compact schema uses `compact_dataset_options`.
+    """
+    value = encode_dataset(key, value, schema_version)
+    if(dataset_options is None and schema_version == SCHEMA_VERSION_COMPACT):
+        dataset_options = compact_dataset_options
+    options = get_dataset_options(dataset_options, key)
+    if(len(options) and value.ndim > 0 and value.size > 0):
+        group.create_dataset(key, data=value, **options)
+    else:
+        group[key] = value
+
+
+def read_dataset(dataset, decode_strings=True):
+    """
+    Reads a data set of a file of any schema version into memory
+
+    Enums are converted to their categories, data sets stored with reduced precision
+    are converted back to double precision.
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+        the data set
+    decode_strings: bool
+        if True, (byte) strings are converted to unicode strings
+
+    Returns
+    -------
+    value: array
+    """
+    mapping = h5py.check_enum_dtype(dataset.dtype)
+    value = dataset[()]
+    if(mapping is not None):
+        names = np.empty(max(mapping.values()) + 1, dtype=f"U{max(len(name) for name in mapping)}")
+        for name, code in mapping.items():
+            names[code] = name
+        return names[value]
+    if(value.dtype == np.float32):
+        return value.astype(np.float64)
+    if(value.dtype.kind == 'O' or value.dtype.kind == 'S'):
+        if(decode_strings):
+            return value.astype('U')
+    return value
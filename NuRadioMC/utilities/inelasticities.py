@@ -54,20 +54,13 @@ def get_ccnc(n_events, rnd=None):
     Returns:
     --------
     ccnc: array
-        Array with 'cc' or 'nc'
+        Array with 'cc' or 'nc' (fixed-width unicode strings)
     """
     if(rnd is None):
         rnd = np.random.default_rng()
     random_sequence = rnd.uniform(0., 1., n_events)
-    ccnc = []
-    for i, r in enumerate(random_sequence):
-        #    if (r <= 0.6865254):#from AraSim
-        if(r <= 0.7064):
-            ccnc.append('cc')
-        else:
-            ccnc.append('nc')
-
-    return np.array(ccnc)
+    #    cc fraction 0.6865254 from AraSim
+    return np.where(random_sequence <= 0.7064, 'cc', 'nc')
 
 
 def random_tau_branch(rnd=None):
@@ -24,15 +24,15 @@ class medium():
 
         Parameters
         ---------
-        x: 3dim np.array
-            point
+        x: 3dim np.array or np.array of shape (N, 3)
+            point or array of points
 
         Returns:
         --------
-        n: float
+        n: float or array of floats
             index of refraction
         """
-        return self.n_ice - self.delta_n * np.exp(x[2] / self.z_0)
+        return self.n_ice - self.delta_n * np.exp(np.asarray(x)[..., 2] / self.z_0)
 
     def get_average_index_of_refraction(self, z1, z2):
         """
@@ -40,14 +40,19 @@ class medium():
 
         Parameters
         ----------
-        z1: float
+        z1: float or array of floats
             depth 1
-        z2: float
+        z2: float or array of floats
             depth 2
 
         Returns: depth averaged index of refraction
         """
-        return self.n_ice - self.delta_n * self.z_0 / (z2 - z1) * (np.exp(z2 / self.z_0) - np.exp(z1 / self.z_0))
+        z1 = np.asarray(z1, dtype=float)
+        z2 = np.asarray(z2, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            n_avg = self.n_ice - self.delta_n * self.z_0 / (z2 - z1) * (np.exp(z2 / self.z_0) - np.exp(z1 / self.z_0))
+        # the average over a depth interval of zero length is the index of refraction at this depth
+        return np.where(z1 == z2, self.n_ice - self.delta_n * np.exp(z1 / self.z_0), n_avg)[()]
 
 
 class southpole_simple(medium):
@@ -110,3 +115,85 @@ class greenland_simple(medium):
         self.n_ice = 1.78
         self.z_0 = 37.25 * units.m
         self.delta_n = 0.51
+
+
+class tabulated_profile(medium):
+    """
+    medium with an arbitrary (e.g. measured) index-of-refraction profile that is linearly interpolated between
+    the tabulated depths. Above and below the tabulated depths the index of refraction is constant.
+
+    This medium can only be used with the numerical ray tracer.
+    """
+
+    def __init__(self, z, n, reflection=None, reflection_coefficient=None, reflection_phase_shift=None):
+        """
+        Parameters
+        ----------
+        z: array of floats
+            the depths (z coordinates) of the tabulated profile
+        n: array of floats
+            the index of refraction at the depths `z`
+        reflection: float or None
+            the depth of a reflective layer at the bottom of the ice
+        reflection_coefficient: float or None
+            the reflection coefficient of the reflective layer
+        reflection_phase_shift: float or None
+            the phase shift of the reflection off the reflective layer
+        """
+        sort = np.argsort(z)
+        self.z = np.array(z, dtype=float)[sort]
+        self.n = np.array(n, dtype=float)[sort]
+        # integral of the index of refraction from the lowest tabulated depth
+        self.__n_integral = np.append(0, np.cumsum(0.5 * (self.n[1:] + self.n[:-1]) * np.diff(self.z)))
+        self.reflection = reflection
+        self.reflection_coefficient = reflection_coefficient
+        self.reflection_phase_shift = reflection_phase_shift
+
+    def get_index_of_refraction(self, x):
+        """
+        returns the index of refraction at position x
+
+        Parameters
+        ---------
+        x: 3dim np.array or np.array of shape (N, 3)
+            point or array of points
+
+        Returns:
+        --------
+        n: float or array of floats
+            index of refraction
+        """
+        return np.interp(np.asarray(x)[..., 2], self.z, self.n)
+
+    def __get_integral(self, z):
+        """
+        returns the integral of the (linearly interpolated) index of refraction from the lowest tabulated depth to z
+        """
+        i = np.clip(np.searchsorted(self.z, z) - 1, 0, len(self.z) - 2)
+        dz = z - self.z[i]
+        slope = (self.n[i + 1] - self.n[i]) / (self.z[i + 1] - self.z[i])
+        integral = self.__n_integral[i] + self.n[i] * dz + 0.5 * slope * dz ** 2
+        # the index of refraction is constant outside of the tabulated depths
+        below = z < self.z[0]
+        above = z > self.z[-1]
+        integral = np.where(below, self.n[0] * (z - self.z[0]), integral)
+        return np.where(above, self.__n_integral[-1] + self.n[-1] * (z - self.z[-1]), integral)
+
+    def get_average_index_of_refraction(self, z1, z2):
+        """
+        returns the average index of refraction between two depths
+
+        Parameters
+        ----------
+        z1: float or array of floats
+            depth 1
+        z2: float or array of floats
+            depth 2
+
+        Returns: depth averaged index of refraction
+        """
+        z1 = np.asarray(z1, dtype=float)
+        z2 = np.asarray(z2, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            n_avg = (self.__get_integral(z2) - self.__get_integral(z1)) / (z2 - z1)
+        return np.where(z1 == z2, np.interp(z1, self.z, self.n), n_avg)[()]
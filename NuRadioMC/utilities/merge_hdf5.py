@@ -13,12 +13,70 @@ logging.basicConfig(format='%(asctime)s %(levelname)s:%(name)s:%(message)s')
 logger.setLevel(logging.WARNING)
 
 
-def merge2(filenames, output_filename):
-    logger.warning(f"merging {len(filenames)} files into {os.path.basename(output_filename)}")
-    data = OrderedDict()
+def _remap_event_group_ids(event_group_ids, remapped_ids, first_new_id):
+    """
+    replaces the event group ids `remapped_ids` (sorted) by `first_new_id`, `first_new_id` + 1, ...
+    """
+    event_group_ids = np.array(event_group_ids)
+    if(len(remapped_ids) and len(event_group_ids)):
+        index = np.minimum(np.searchsorted(remapped_ids, event_group_ids), len(remapped_ids) - 1)
+        mask = remapped_ids[index] == event_group_ids
+        event_group_ids[mask] = first_new_id + index[mask]
+    return event_group_ids
+
+
+def _copy_dataset(dataset_in, dataset_out, offset, remapping=None):
+    """
+    copies the data set `dataset_in` into `dataset_out` starting at row `offset`
+
+    The data is copied in blocks that are aligned to the chunks of the output data set, i.e.
+    only one chunk is held in memory at a time.
+
+    Parameters
+    ----------
+    dataset_in: h5py.Dataset
+        the input data set
+    dataset_out: h5py.Dataset
+        the (preallocated) output data set
+    offset: int
+        the row of the output data set where the input data set starts
+    remapping: tuple or None
+        the sorted event group ids that are replaced and the first new id, see `_remap_event_group_ids`
+    """
+    n_rows = dataset_in.shape[0]
+    chunk_rows = n_rows
+    if(dataset_out.chunks is not None):
+        chunk_rows = dataset_out.chunks[0]
+    start = 0
+    while(start < n_rows):
+        stop = min(n_rows, ((offset + start) // chunk_rows + 1) * chunk_rows - offset)
+        block = dataset_in[start:stop]
+        if(remapping is not None):
+            block = _remap_event_group_ids(block, *remapping)
+        dataset_out[offset + start:offset + stop] = block
+        start = stop
+
+
+def _read_metadata(filenames):
+    """
+    first pass of the merge: reads the attributes and the shapes and dtypes of all data sets
+
+    Parameters
+    ----------
+    filenames: list of strings
+        the input files
+
+    Returns
+    -------
+    dictionary with the merged attributes ('attrs', 'group_attrs'), the shapes and dtypes of the data sets
+    per file ('data', 'groups'), the total number of rows per data set ('n_data', 'n_groups'), the files
+    that contain events ('non_empty_filenames') and the total number of events ('n_events_total')
+    """
     attrs = OrderedDict()
-    groups = OrderedDict()
     group_attrs = OrderedDict()
+    # the shapes and dtypes of the data sets per file
+    data = OrderedDict()
+    groups = OrderedDict()
     n_data = {}
     n_groups = {}
     non_empty_filenames = []
@@ -46,10 +104,10 @@ def merge2(filenames, output_filename):
                 if(key not in n_groups):
                     n_groups[key] = {}
                 for key2 in fin[key]:
-                    groups[f][key][key2] = fin[key][key2][...]
+                    groups[f][key][key2] = (fin[key][key2].shape, fin[key][key2].dtype)
                     if(key2 not in n_groups[key]):
                         n_groups[key][key2] = 0
-                    n_groups[key][key2] += len(groups[f][key][key2])
+                    n_groups[key][key2] += fin[key][key2].shape[0]
                 if(key not in group_attrs):
                     group_attrs[key] = {}
                     for key2 in fin[key].attrs:
@@ -59,10 +117,10 @@ def merge2(filenames, output_filename):
                         if(not np.all(group_attrs[key][key2] == fin[key].attrs[key2])):
                             logger.warning(f"attribute {key2} of group {key} of file {filenames[0]} and {f} are different ({group_attrs[key][key2]} vs. {fin[key].attrs[key2]}. Using attribute value of first file, but you have been warned!")
             else:
-                data[f][key] = fin[key][...]
+                data[f][key] = (fin[key].shape, fin[key].dtype)
                 if(key not in n_data):
                     n_data[key] = 0
-                n_data[key] += len(data[f][key])
+                n_data[key] += fin[key].shape[0]
 
         for key in fin.attrs:
             if(key not in attrs):
@@ -83,6 +141,85 @@ def merge2(filenames, output_filename):
             if((('trigger_names' not in attrs) or (len(attrs['trigger_names']) == 0)) and 'trigger_names' in fin.attrs):
                 attrs['trigger_names'] = fin.attrs['trigger_names']
         fin.close()
+    attrs['n_events'] = n_events_total
+    return {'attrs': attrs, 'group_attrs': group_attrs, 'data': data, 'groups': groups, 'n_data': n_data,
+            'n_groups': n_groups, 'non_empty_filenames': non_empty_filenames, 'n_events_total': n_events_total}
+
+
+def _get_output_datasets(metadata):
+    """
+    returns the data sets of the merged file
+
+    Parameters
+    ----------
+    metadata: dict
+        the output of `_read_metadata`
+
+    Returns
+    -------
+    datasets: OrderedDict
+        the shape and dtype of every data set of the merged file (keys are the paths, e.g. 'station_101/triggered')
+    group_names: list of strings
+        the names of the groups (stations) of the merged file
+    """
+    data = metadata['data']
+    groups = metadata['groups']
+    non_empty_filenames = metadata['non_empty_filenames']
+    datasets = OrderedDict()
+    keys = data[non_empty_filenames[0]]
+    for key in keys:
+        all_files_have_key = True
+        for f in non_empty_filenames:
+            if(not key in data[f]):
+                logger.debug(f"key {key} not in {f}")
+                all_files_have_key = False
+        if(not all_files_have_key):
+            logger.warning(f"not all files have the key {key}. This key will not be present in the merged file.")
+            continue
+        shape, dtype = data[non_empty_filenames[0]][key]
+        shape = list(shape)
+        shape[0] = metadata['n_data'][key]
+        datasets[key] = (shape, dtype)
+
+    group_names = list(groups[non_empty_filenames[0]].keys())
+    for key in group_names:  # loop through all groups
+        # first loop through all keys of this group(station) to find all available entries (necessary because some
+        # of the files might be empty
+        list_of_keys = list(groups[non_empty_filenames[0]][key].keys())
+        list_of_dtypes = {}
+        list_of_shapes = {}
+        for f in non_empty_filenames:
+            for key2 in groups[f].get(key, {}):  # loop through all datasets of this group
+                if(key2 not in list_of_dtypes):
+                    list_of_shapes[key2], list_of_dtypes[key2] = groups[f][key][key2]
+                if(key2 not in list_of_keys):
+                    list_of_keys.append(key2)
+        for key2 in list_of_keys:  # loop through all datasets of this group
+            shape = list(list_of_shapes[key2])
+            shape[0] = metadata['n_groups'][key][key2]
+            datasets[f"{key}/{key2}"] = (shape, list_of_dtypes[key2])
+    return datasets, group_names
+
+
+def merge2(filenames, output_filename):
+    """
+    merges multiple NuRadioMC hdf5 files into one file
+
+    The merge is done in two passes. The first pass reads only the attributes, the shapes
+    and dtypes of the data sets and the event group ids (to make them unique). The second
+    pass copies the data sets block by block into the preallocated output data sets, so the
+    memory consumption doesn't depend on the size or the number of the input files.
+
+    Parameters
+    ----------
+    filenames: list of strings
+        the input files
+    output_filename: string
+        the output file
+    """
+    logger.warning(f"merging {len(filenames)} files into {os.path.basename(output_filename)}")
+    metadata = _read_metadata(filenames)
+    non_empty_filenames = metadata['non_empty_filenames']
 
     # create data sets
     logger.info("creating data sets")
@@ -93,106 +230,66 @@ def merge2(filenames, output_filename):
         # to start, get the 'event_group_ids' for the first file name only
         # then, loop over all the other files (iF-th file) in the set, and check to see if there
         # is any overlap (intersection) between the iF-th file and the first file
-        # if so, then identify what the overlap is, and increment the id number in the iF-th file by 1
-        # so that it again becomes unique; then use a np mask to replace the overlapping
-        # number with the new unique number in the iF-th file
+        # if so, then identify what the overlap is, and assign new ids (larger than all existing ids) to the
+        # overlapping event groups of the iF-th file. The new ids are applied to the event group ids
+        # of the iF-th file (and its stations) when the data is copied to the output file.
         # then, append the now totally unique list of id's from the iF-th file
         # to the list from the first file, and so on
-        unique_uegids = np.unique(data[non_empty_filenames[0]]['event_group_ids'])
+        remappings = {}
+        with h5py.File(non_empty_filenames[0], 'r') as fin:
+            unique_uegids = np.unique(fin['event_group_ids'][...])
         for iF, f in enumerate(non_empty_filenames):
             if(iF == 0):
                 continue
-            current_uegids = np.unique(data[f]['event_group_ids'])
+            with h5py.File(f, 'r') as fin:
+                current_uegids = np.unique(fin['event_group_ids'][...])
             intersect = np.intersect1d(unique_uegids, current_uegids, assume_unique=True)
             if(np.sum(intersect)):
-                current_egids = data[f]['event_group_ids']
+                # there can be multiple entries per unique event group id, all of them get the new id
                 new_egid = max(unique_uegids.max(), current_uegids.max()) + 1
-                for gid in intersect:
-                    mask = gid == current_egids  # there can be multiple entries per unique event group id, we need to change all of them to the new id
-                    current_egids[mask] = new_egid
-                    # also change the event_group_id arrays of the station groups
-                    if f in non_empty_filenames:
-                        for key in groups[f]:  # loop through all groups
-                            if 'event_group_ids' in groups[f][key]:
-                                g_egids = groups[f][key]['event_group_ids']
-                                mask_g = gid == g_egids
-                                if(np.sum(mask_g)):  # station might not have this event group id, so skip stations where this egid is not present
-                                    g_egids[mask_g] = new_egid
-                    new_egid += 1
+                remappings[f] = (intersect, new_egid)
+                current_uegids = np.unique(_remap_event_group_ids(current_uegids, intersect, new_egid))
 
                 logger.warning(f"event group ids are not unique per file, current file is {f}, new unique ids have been generated.")
                 logger.debug(f"non-unique event ids: {intersect}")
-            current_uegids = np.unique(data[f]['event_group_ids'])  # get the updated list of unique event group ids. Now there should be no intersection with the ids of the previous files
             # test again for uniqueness
             intersect = np.intersect1d(unique_uegids, current_uegids, assume_unique=True)
             if(np.sum(intersect)):
                 raise IndexError(f"event group ids are not unique per file, current file is {f}")
             unique_uegids = np.append(unique_uegids, current_uegids)
 
-        keys = data[non_empty_filenames[0]]
-        for key in keys:
-            logger.info(f"merging key {key}")
-            all_files_have_key = True
-            for f in non_empty_filenames:
-                if(not key in data[f]):
-                    logger.debug(f"key {key} not in {f}")
-                    all_files_have_key = False
-            if(not all_files_have_key):
-                logger.warning(f"not all files have the key {key}. This key will not be present in the merged file.")
-                continue
-            shape = list(data[non_empty_filenames[0]][key].shape)
-            shape[0] = n_data[key]
-
-            tmp = np.zeros(shape, dtype=data[non_empty_filenames[0]][key].dtype)
-
-            i = 0
-            for f in non_empty_filenames:
-                tmp[i:(i + len(data[f][key]))] = data[f][key]
-                i += len(data[f][key])
-
-            fout.create_dataset(key, tmp.shape, dtype=tmp.dtype,
-                                compression='gzip')[...] = tmp
-
-        keys = groups[non_empty_filenames[0]]
-        for key in keys:  # loop through all groups
+        # preallocate the output data sets, their size is known from the first pass
+        datasets, group_names = _get_output_datasets(metadata)
+        for key, (shape, dtype) in datasets.items():
+            if('/' not in key):
+                fout.create_dataset(key, shape, dtype=dtype, compression='gzip')
+        for key in group_names:
             logger.info("writing group {}".format(key))
-            # first loop through all keys of this group(station) to find all available entries (necessary because some
-            # of the files might be empty
-            list_of_keys = list(groups[non_empty_filenames[0]][key].keys())
-            list_of_dtypes = {}
-            list_of_shapes = {}
-            for f in non_empty_filenames:
-                for key2 in groups[f][key]:  # loop through all datasets of this group
-                    if(key2 not in list_of_dtypes):
-                        list_of_dtypes[key2] = groups[f][key][key2].dtype
-                        list_of_shapes[key2] = list(groups[f][key][key2].shape)
-                    groups[f][key][key2].dtype
-                    if(key2 not in list_of_keys):
-                        list_of_keys.append(key2)
-
             g = fout.create_group(key)
-            for key2 in list_of_keys:  # loop through all datasets of this group
-                shape = list_of_shapes[key2]
-                shape[0] = n_groups[key][key2]
-
-                tmp = np.zeros(shape, dtype=list_of_dtypes[key2])
-                i = 0
-                for f in non_empty_filenames:
-                    if(key2 in groups[f][key]):
-                        tmp[i:(i + len(groups[f][key][key2]))] = groups[f][key][key2]
-                        i += len(groups[f][key][key2])
-                    else:
-                        logger.info(f"data set {key2} not in file {f} of station {key}")
-
-                g.create_dataset(key2, shape, dtype=list_of_dtypes[key2],
-                                 compression='gzip')[...] = tmp
+            for key2, (shape, dtype) in datasets.items():
+                if(key2.startswith(key + '/')):
+                    g.create_dataset(key2[len(key) + 1:], shape, dtype=dtype, compression='gzip')
             # save group attributes
-            for key2 in group_attrs[key]:
-                fout[key].attrs[key2] = group_attrs[key][key2]
+            for key2 in metadata['group_attrs'][key]:
+                fout[key].attrs[key2] = metadata['group_attrs'][key][key2]
+
+        # copy the data file by file
+        offsets = {}
+        for f in non_empty_filenames:
+            logger.info(f"copying data of file {f}")
+            with h5py.File(f, 'r') as fin:
+                for key in datasets:
+                    if(key not in fin):
+                        if('/' in key):
+                            logger.info(f"data set {key} not in file {f}")
+                        continue
+                    offsets.setdefault(key, 0)
+                    remapping = remappings.get(f, None) if key.split('/')[-1] == 'event_group_ids' else None
+                    _copy_dataset(fin[key], fout[key], offsets[key], remapping)
+                    offsets[key] += fin[key].shape[0]
         # save all atrributes
-        attrs['n_events'] = n_events_total
-        for key in attrs:
-            fout.attrs[key] = attrs[key]
+        for key in metadata['attrs']:
+            fout.attrs[key] = metadata['attrs'][key]
     else:  # now handle the case
         logger.warning("All files are empty. Copying content of first file to output file and keeping track of total number of simulated events.")
         # all files are empty, so just copy the content of the first file (attributes and empyt data sets) to the output file
@@ -200,24 +297,216 @@ def merge2(filenames, output_filename):
         fin = h5py.File(filenames[0], 'r')
         for key in fin.attrs:
             if(key == "n_events"):
-                fout.attrs[key] = n_events_total
+                fout.attrs[key] = metadata['n_events_total']
             else:
                 fout.attrs[key] = fin.attrs[key]
         for key in fin:
             if isinstance(fin[key], h5py._hl.group.Group):
                 g = fout.create_group(key)
                 for key2 in fin[key]:
-                    g.create_dataset(key2, fin[key][key2].shape, dtype=fin[key][key2].dtype,
-                                     compression='gzip')[...] = fin[key][key2]
+                    _copy_dataset(fin[key][key2], g.create_dataset(key2, fin[key][key2].shape, dtype=fin[key][key2].dtype,
+                                                                   compression='gzip'), 0)
                 for key2 in fin[key].attrs:
                     g.attrs[key2] = fin[key].attrs[key2]
             else:
-                fout.create_dataset(key, fin[key].shape, dtype=fin[key].dtype,
-                                    compression='gzip')[...] = fin[key]
+                _copy_dataset(fin[key], fout.create_dataset(key, fin[key].shape, dtype=fin[key].dtype,
+                                                            compression='gzip'), 0)
+        fin.close()
 
     fout.close()
 
 
+def merge_virtual(filenames, output_filename, relative_paths=True):
+    """
+    merges multiple NuRadioMC hdf5 files into one virtual file
+
+    Instead of copying the data, every data set of the output file is an HDF5 virtual data set that
+    maps onto the data sets of the input files, i.e. only the metadata is written and the input files
+    need to be kept. The attributes are merged as in `merge2`.
+
+    If the event group ids of the files are not unique, the ids of a file are shifted by an offset.
+    The offsets are stored per row in the data sets 'event_group_id_offsets' (next to every
+    'event_group_ids' data set) and need to be added to the event group ids, which is done
+    automatically by `NuRadioMC.utilities.Veff`. Virtual files should not be merged again with `merge2`.
+
+    Parameters
+    ----------
+    filenames: list of strings
+        the input files
+    output_filename: string
+        the output file
+    relative_paths: bool
+        if True, the input files are referenced relative to the directory of the output file,
+        i.e. the files can be moved together
+    """
+    logger.warning(f"merging {len(filenames)} files virtually into {os.path.basename(output_filename)}")
+    metadata = _read_metadata(filenames)
+    if(len(metadata['non_empty_filenames']) == 0):
+        logger.warning("All files are empty. Mapping the content of the first file and keeping track of total number of simulated events.")
+        n_events_total = metadata['n_events_total']
+        metadata = _read_metadata(filenames[:1])
+        metadata['attrs']['n_events'] = n_events_total
+        metadata['non_empty_filenames'] = [filenames[0]]
+    non_empty_filenames = metadata['non_empty_filenames']
+    datasets, group_names = _get_output_datasets(metadata)
+
+    # shift the event group ids of a file above the largest id so far if they are not unique
+    offsets = {}
+    unique_uegids = np.array([], dtype=int)
+    for f in non_empty_filenames:
+        offsets[f] = 0
+        with h5py.File(f, 'r') as fin:
+            if('event_group_ids' not in fin):
+                continue
+            current_uegids = np.unique(fin['event_group_ids'][...])
+        if(len(np.intersect1d(unique_uegids, current_uegids, assume_unique=True))):
+            offsets[f] = unique_uegids.max() + 1 - current_uegids.min()
+            logger.warning(f"event group ids are not unique per file, current file is {f}, the ids are shifted by {offsets[f]}.")
+        unique_uegids = np.union1d(unique_uegids, current_uegids + offsets[f])
+
+    output_directory = os.path.dirname(os.path.abspath(output_filename))
+    with h5py.File(output_filename, 'w') as fout:
+        for key in group_names:
+            g = fout.create_group(key)
+            for key2 in metadata['group_attrs'][key]:
+                g.attrs[key2] = metadata['group_attrs'][key][key2]
+        for key, (shape, dtype) in datasets.items():
+            layout = h5py.VirtualLayout(shape=tuple(shape), dtype=dtype)
+            offset_rows = []
+            i = 0
+            for f in non_empty_filenames:
+                if('/' in key):
+                    group, key2 = key.split('/')
+                    shape_dtype = metadata['groups'][f].get(group, {}).get(key2, None)
+                else:
+                    shape_dtype = metadata['data'][f].get(key, None)
+                if(shape_dtype is None):
+                    continue
+                n_rows = shape_dtype[0][0]
+                if(n_rows):
+                    source = os.path.abspath(f)
+                    if(relative_paths):
+                        source = os.path.relpath(source, output_directory)
+                    layout[i:i + n_rows] = h5py.VirtualSource(source, key, shape=shape_dtype[0])
+                    offset_rows.append((i, i + n_rows, offsets[f]))
+                i += n_rows
+            fout.create_virtual_dataset(key, layout)
+            if(key.split('/')[-1] == 'event_group_ids' and np.any([offset for _, _, offset in offset_rows])):
+                key_offsets = key[:-len('event_group_ids')] + 'event_group_id_offsets'
+                dset = fout.create_dataset(key_offsets, (shape[0],), dtype=np.int64, compression='gzip')
+                for start, stop, offset in offset_rows:
+                    if(offset):
+                        dset[start:stop] = offset
+        for key in metadata['attrs']:
+            fout.attrs[key] = metadata['attrs'][key]
+
+
+def select_input_files(filenames, min_size=1000):
+    """
+    deselects input files that are too small or that can't be read
+
+    Parameters
+    ----------
+    filenames: list of strings
+        the input files
+    min_size: int
+        files with less bytes are deselected
+
+    Returns
+    -------
+    list of the selected files
+    """
+    filenames = np.array(filenames)
+    mask = np.array([os.path.getsize(x) > min_size for x in filenames], dtype=np.bool)
+    if(np.sum(~mask)):
+        logger.warning("{:d} files were deselected because their filesize was to small".format(np.sum(~mask)))
+    selected_filenames = []
+    for filename in filenames[mask]:
+        try:
+            with h5py.File(filename, 'r') as fin:
+                fin.attrs['n_events']
+        except Exception as e:
+            logger.error(f"file {filename} was deselected because it can't be read: {e}")
+            continue
+        selected_filenames.append(filename)
+    return selected_filenames
+
+
+def merge_task(kwargs):
+    """
+    merges the input files of one output file, used as task of `merge_parallel`
+
+    All files are opened in the process that executes the task. A failing merge is reported
+    and the incomplete output file is removed, the other tasks are not affected.
+
+    Parameters
+    ----------
+    kwargs: dict
+        the input files ('filenames'), the output file ('output_filename') and optionally
+        'virtual' (if True, the files are merged with `merge_virtual`)
+
+    Returns
+    -------
+    output_filename: string
+    error: string or None
+        the error message if the merge failed
+    """
+    output_filename = kwargs['output_filename']
+    try:
+        filenames = select_input_files(kwargs['filenames'])
+        if(len(filenames) == 0):
+            raise IOError("no valid input files")
+        if(kwargs.get('virtual', False)):
+            merge_virtual(filenames, output_filename)
+        else:
+            merge2(filenames, output_filename)
+    except Exception as e:
+        logger.exception(f"merging into {output_filename} failed")
+        if(os.path.exists(output_filename)):
+            os.remove(output_filename)
+        return output_filename, str(e)
+    return output_filename, None
+
+
+def merge_parallel(input_args, n_cores=1):
+    """
+    merges several sets of input files, each into its own output file
+
+    The tasks are executed with the largest total input size first and distributed over
+    `n_cores` processes. Failing tasks are reported at the end.
+
+    Parameters
+    ----------
+    input_args: list of dicts
+        the arguments of `merge_task` per task
+    n_cores: int
+        the number of processes
+
+    Returns
+    -------
+    list of the output files that failed
+    """
+    input_args = sorted(input_args, key=lambda x: -np.sum([os.path.getsize(f) for f in x['filenames']]))
+    logger.warning(f"running {len(input_args)} job on {n_cores} cores")
+    failed = []
+
+    def collect(results):
+        for i, (output_filename, error) in enumerate(results):
+            if(error is not None):
+                failed.append(output_filename)
+            logger.warning(f"finished {i + 1}/{len(input_args)} jobs ({os.path.basename(output_filename)})")
+
+    if(n_cores == 1):
+        collect(map(merge_task, input_args))
+    else:
+        from multiprocessing import Pool
+        with Pool(n_cores) as p:
+            collect(p.imap_unordered(merge_task, input_args))
+    if(len(failed)):
+        logger.error(f"{len(failed)} of {len(input_args)} merges failed: {failed}")
+    return failed
+
+
 if __name__ == "__main__":
     """
     merges multiple hdf5 output files into one single files.
@@ -233,6 +522,7 @@ if __name__ == "__main__":
     parser.add_argument('files', nargs='+', help='input file or files')
     parser.add_argument('--loglevel', metavar='level', help='loglevel set to either DEBUG, INFO, or WARNING')
     parser.add_argument('--cores', default=1, type=int, help='number of cores to use')
+    parser.add_argument('--virtual', action='store_true', help='create a virtual file that references the input files instead of copying the data')
     args = parser.parse_args()
 
     if args.loglevel is not None:
@@ -263,25 +553,11 @@ if __name__ == "__main__":
                 if(os.path.exists(output_filename)):
                     logger.error('file {} already exists, skipping'.format(output_filename))
                 else:
-                    #                 try:
                     input_files = np.array(sorted(glob.glob(filename + '.part????')))
                     input_files = np.append(input_files, np.array(sorted(glob.glob(filename + '.part??????'))))
-                    mask = np.array([os.path.getsize(x) > 1000 for x in input_files], dtype=np.bool)
-                    if(np.sum(~mask)):
-                        logger.warning("{:d} files were deselected because their filesize was to small".format(np.sum(~mask)))
-                    input_args.append({'filenames': input_files[mask], 'output_filename': output_filename})
-        if(args.cores == 1):
-            for i in range(len(input_args)):
-                merge2(input_args[i]['filenames'], input_args[i]['output_filename'])
-        else:
-            from multiprocessing import Pool
-            logger.warning(f"running {len(input_args)} job on {args.cores} cores")
-
-            def tmp(kwargs):
-                merge2(**kwargs)
-
-            with Pool(args.cores) as p:
-                p.map(tmp, input_args)
+                    input_args.append({'filenames': input_files, 'output_filename': output_filename, 'virtual': args.virtual})
+        if(len(merge_parallel(input_args, args.cores))):
+            sys.exit(1)
 
     elif(len(args.files) > 1):
         output_filename = args.files[0]
@@ -289,4 +565,7 @@ if __name__ == "__main__":
             logger.error('file {} already exists, skipping'.format(output_filename))
         else:
             input_files = args.files[1:]
-            merge2(input_files, output_filename)
+            if(args.virtual):
+                merge_virtual(input_files, output_filename)
+            else:
+                merge2(input_files, output_filename)
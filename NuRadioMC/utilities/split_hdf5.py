@@ -10,95 +10,227 @@ logging.basicConfig(level=logging.DEBUG)
 logger.setLevel(logging.WARNING)
 
 
-def split_hdf5_input_file(input_filename, output_filename, number_of_events_per_file):
+def _get_dataset_options(dataset):
+    """
+    returns the keyword arguments of `h5py.Group.create_dataset` that reproduce the storage of `dataset`
+    """
+    if(dataset.chunks is None):
+        return {}
+    return {'chunks': True, 'compression': dataset.compression,
+            'compression_opts': dataset.compression_opts, 'shuffle': dataset.shuffle}
+
+
+def _copy_rows(dataset_in, dataset_out, rows, block_size):
+    """
+    copies the rows of `dataset_in` to `dataset_out` in blocks of `block_size` rows
+
+    Parameters
+    ----------
+    dataset_in: h5py.Dataset
+        the input data set
+    dataset_out: h5py.Dataset
+        the output data set, its length is the number of copied rows
+    rows: slice or array of ints
+        a range of rows or the (increasing) indices of the rows that are copied
+    block_size: int
+        the maximum number of rows that are held in memory
+    """
+    n_rows = dataset_out.shape[0]
+    if(n_rows == 0):
+        return
+    buffer = np.empty((min(block_size, n_rows),) + dataset_in.shape[1:], dtype=dataset_in.dtype)
+    for start in range(0, n_rows, block_size):
+        stop = min(start + block_size, n_rows)
+        if(isinstance(rows, slice)):
+            dataset_in.read_direct(buffer, np.s_[rows.start + start:rows.start + stop], np.s_[0:stop - start])
+        else:  # h5py reads lists of increasing indices
+            buffer[:stop - start] = dataset_in[rows[start:stop]]
+        dataset_out.write_direct(buffer, np.s_[0:stop - start], np.s_[start:stop])
+
+
+def _get_group_rows(event_group_ids, group_ids, n_files, number_of_events_per_file):
+    """
+    returns the rows of a group (station) data set that belong to the event groups of every part
+
+    Parameters
+    ----------
+    event_group_ids: array of ints
+        the event group ids of the group data set
+    group_ids: array of ints
+        the event group ids of the event groups of the input file (in the order of the file)
+    n_files: int
+        the number of parts
+    number_of_events_per_file: int
+        the number of event groups per part
+
+    Returns
+    -------
+    list of slices (or arrays of row indices if the rows of a part are not contiguous), one per part
+    """
+    order = np.argsort(group_ids)
+    index = np.minimum(np.searchsorted(group_ids, event_group_ids, sorter=order), len(group_ids) - 1)
+    part = order[index] // number_of_events_per_file
+    part[group_ids[order[index]] != event_group_ids] = -1  # event groups that are not in the input file
+    if(np.all(part[1:] >= part[:-1]) and np.all(part >= 0)):
+        edges = np.searchsorted(part, np.arange(n_files + 1))
+        return [slice(edges[iFile], edges[iFile + 1]) for iFile in range(n_files)]
+    return [np.flatnonzero(part == iFile) for iFile in range(n_files)]
+
+
+def _write_part(input_filename, filename, rows, group_rows, attributes, block_size=100000):
+    """
+    writes one part of `split_hdf5_input_file`
+
+    Parameters
+    ----------
+    input_filename: string
+        the input filename
+    filename: string
+        the filename of the part
+    rows: tuple of two ints
+        the range of rows of the per-shower data sets (the data sets in the root of the file)
+    group_rows: dict
+        the rows (slice or array of indices) of the data sets of every group (station), per number of rows
+        of the data sets (see `split_hdf5_input_file`)
+    attributes: dict
+        the attributes of the part
+    block_size: int
+        the maximum number of rows that are held in memory per data set
+    """
+    with h5py.File(input_filename, 'r') as fin, h5py.File(filename, 'w') as fout:
+        for key, value in iteritems(attributes):
+            fout.attrs[key] = value
+        for key in fin:
+            if isinstance(fin[key], h5py._hl.group.Group):
+                logger.info("writing group {}".format(key))
+                g = fout.create_group(key)
+                for key2 in fin[key]:
+                    logger.info("writing data set {}".format(key2))
+                    dataset = fin[key][key2]
+                    rows_g = group_rows[key][dataset.shape[0]] if key in group_rows else slice(0, 0)
+                    n_rows = len(range(dataset.shape[0])[rows_g]) if isinstance(rows_g, slice) else len(rows_g)
+                    dataset_out = g.create_dataset(key2, (n_rows,) + dataset.shape[1:], dtype=dataset.dtype,
+                                                   **_get_dataset_options(dataset))
+                    _copy_rows(dataset, dataset_out, rows_g, block_size)
+                # save group attributes
+                for key2 in fin[key].attrs:
+                    g.attrs[key2] = fin[key].attrs[key2]
+            else:
+                dataset = fin[key]
+                dataset_out = fout.create_dataset(key, (rows[1] - rows[0],) + dataset.shape[1:], dtype=dataset.dtype,
+                                                  **_get_dataset_options(dataset))
+                _copy_rows(dataset, dataset_out, slice(rows[0], rows[1]), block_size)
+    return filename
+
+
+def _write_part_star(kwargs):
+    return _write_part(**kwargs)
+
+
+def split_hdf5_input_file(input_filename, output_filename, number_of_events_per_file, n_cores=1, block_size=100000):
     """
     splits up an existing hdf5 file into multiple subfiles
 
+    The file is split at the boundaries of the event groups, i.e. every part contains `number_of_events_per_file`
+    complete event groups (the last part contains less). The number of events of every part is
+    calculated as in `NuRadioMC.EvtGen.generator.write_events_to_hdf5`. Only the event group ids and
+    shower ids are read into memory, the data sets are copied in blocks of `block_size` rows.
+    Data sets of groups (e.g. stations) are split according to their event group ids. The data sets
+    of a group have either one row per entry of its 'event_group_ids' or one row per entry of
+    its 'shower_id' (the showers of the triggered event groups, which refer to the 'shower_ids' of the file).
+
     Parameters
     ----------
     input_filename: string
         the input filename
     output_filename: string
         the desired output filename (if multiple files are generated, a 'part000x' is appended to the filename
-    n_events_per_file: int (optional, default None)
-        the number of events per file
+    number_of_events_per_file: int
+        the number of events (event groups) per file
+    n_cores: int (default 1)
+        number of parts that are written in parallel processes
+    block_size: int (default 100000)
+        the maximum number of rows of a data set that are held in memory
     """
-    fin = h5py.File(input_filename, 'r')
-    attributes = {}
-    data = {}
-    groups = {}
-    n_groups = {}
-    n_data = {}
-    group_attrs = {}
-
-    for key in fin:
-        if isinstance(fin[key], h5py._hl.group.Group):
-            groups[key] = {}
-            if(key not in n_groups):
-                n_groups[key] = {}
-            for key2 in fin[key]:
-                groups[key][key2] = fin[key][key2][...]
-                if(key2 not in n_groups[key]):
-                    n_groups[key][key2] = 0
-                n_groups[key][key2] += len(groups[key][key2])
-            if(key not in group_attrs):
-                group_attrs[key] = {}
-                for key2 in fin[key].attrs:
-                    group_attrs[key][key2] = fin[key].attrs[key2]
-            else:
-                for key2 in fin[key].attrs:
-                    if(not np.all(group_attrs[key][key2] == fin[key].attrs[key2])):
-                        logger.warning(f"attribute {key2} of group {key} of file {input_filename} are different ({group_attrs[key][key2]} vs. {fin[key].attrs[key2]}. Using attribute value of first file, but you have been warned!")
+    with h5py.File(input_filename, 'r') as fin:
+        attributes = dict(fin.attrs)
+        if('event_group_ids' in fin):
+            group_ids = fin['event_group_ids'][...]
+        elif('event_ids' in fin):  # old files without event groups
+            group_ids = fin['event_ids'][...]
         else:
-            data[key] = fin[key][...]
-            if(key not in n_data):
-                n_data[key] = 0
-            n_data[key] += len(data[key])
-
-    for key, value in iteritems(fin.attrs):
-        attributes[key] = value
-#     logger.info(f"setting number of events from {attributes['n_events']} to the actual number of events in this file {len(data_sets['event_ids'])}")
-    fin.close()
-
-    n_events = len(data['event_ids'])
-    logger.info("saving {} events in total".format(n_events))
+            logger.error(f"file {input_filename} contains neither event group ids nor event ids")
+            raise ValueError(f"file {input_filename} contains neither event group ids nor event ids")
+
+        # the first row of every event group, calculated only once
+        starts = np.flatnonzero(group_ids[1:] != group_ids[:-1]) + 1
+        if(len(group_ids)):
+            starts = np.append(0, starts)
+        if(len(starts) != len(np.unique(group_ids))):
+            logger.error(f"the event groups of file {input_filename} are not contiguous")
+            raise ValueError(f"the event groups of file {input_filename} are not contiguous")
+        n_groups = len(starts)
+        n_files = max(1, math.ceil(n_groups / number_of_events_per_file))
+        # the rows of the data sets of the groups (stations) per part, for the data sets per event and per shower
+        group_rows = [{} for iFile in range(n_files)]
+        shower_ids = None
+        for key in fin:
+            if(isinstance(fin[key], h5py._hl.group.Group) and 'event_group_ids' in fin[key] and n_groups > 0):
+                event_group_ids = {fin[key]['event_group_ids'].shape[0]: fin[key]['event_group_ids'][...]}
+                if('shower_id' in fin[key] and 'shower_ids' in fin):
+                    if(shower_ids is None):
+                        shower_ids = fin['shower_ids'][...]
+                        shower_order = np.argsort(shower_ids)
+                    shower_index = np.searchsorted(shower_ids, fin[key]['shower_id'][...], sorter=shower_order)
+                    # if both numbers of rows agree, every triggered event has one shower and the rows are the same
+                    event_group_ids.setdefault(fin[key]['shower_id'].shape[0], group_ids[shower_order[shower_index]])
+                for key2 in fin[key]:
+                    if(fin[key][key2].shape[0] not in event_group_ids):
+                        logger.error(f"data set {key}/{key2} has neither one row per event nor one row per shower")
+                        raise ValueError(f"data set {key}/{key2} has neither one row per event nor one row per shower")
+                for n_rows, event_group_ids_rows in event_group_ids.items():
+                    for iFile, rows in enumerate(_get_group_rows(event_group_ids_rows, group_ids[starts], n_files, number_of_events_per_file)):
+                        group_rows[iFile].setdefault(key, {})[n_rows] = rows
+
+    starts = np.append(starts, len(group_ids))
+    logger.info("saving {} events in total".format(n_groups))
     total_number_of_events = attributes['n_events']
+    start_event_id = attributes.get('start_event_id', 0)
 
-    n_files = math.ceil(n_events / number_of_events_per_file)
+    parts = []
+    evt_id_last_previous = 0  # save the last event id of the previous file
     for iFile in range(n_files):
         filename2 = output_filename + ".part{:04}".format(iFile)
-        logger.debug(f"saving file {iFile} with {number_of_events_per_file} events to {filename2}")
-        fout = h5py.File(filename2, 'w')
-        for key, value in attributes.items():
-            fout.attrs[key] = value
-        fout.attrs['total_number_of_events'] = total_number_of_events / n_files
-        fout.attrs['n_events'] = number_of_events_per_file
+        group_index = (iFile * number_of_events_per_file, min((iFile + 1) * number_of_events_per_file, n_groups))
+        rows = (starts[group_index[0]], starts[group_index[1]])
+        evt_id_last = group_ids[rows[1] - 1] if rows[1] > rows[0] else evt_id_last_previous
 
-        for key, value in data.items():
-            if value.dtype.kind == 'U':
-                fout[key] = [np.char.encode(c, 'utf8') for c in value[iFile * number_of_events_per_file:(iFile + 1) * number_of_events_per_file]]
-            else:
-                fout[key] = value[iFile * number_of_events_per_file:(iFile + 1) * number_of_events_per_file]
-
-        i1, i2 = iFile * number_of_events_per_file, (iFile + 1) * number_of_events_per_file
-        for key in groups:
-            logger.info("writing group {}".format(key))
-            g = fout.create_group(key)
-            for key2 in groups[key]:
-                logger.info("writing data set {}".format(key2))
-
-                shape = list(groups[key][key2][i1:i2].shape)
-#                 shape[0] = n_groups[key][key2]
-
-                tmp = groups[key][key2][i1:i2]
+        # determine the number of events in this file (which is NOT the same as the entries in the file),
+        # see `write_events_to_hdf5`
+        if(iFile == 0 and n_files == 1):
+            n_events_this_file = total_number_of_events
+        elif(iFile == n_files - 1):
+            n_events_this_file = total_number_of_events - (evt_id_last_previous + 1) + start_event_id
+        elif(iFile == 0):
+            n_events_this_file = evt_id_last - start_event_id + 1
+        else:
+            n_events_this_file = evt_id_last - evt_id_last_previous
+        evt_id_last_previous = evt_id_last
 
-                g.create_dataset(key2, shape, dtype=groups[key][key2].dtype,
-                                 compression='gzip')[...] = tmp
-            # save group attributes
-            for key2 in group_attrs[key]:
-                fout[key].attrs[key2] = group_attrs[key][key2]
+        logger.debug(f"saving file {iFile} with {group_index[1] - group_index[0]} event groups ({rows[1] - rows[0]} entries) to {filename2}")
+        attributes_part = dict(attributes)
+        attributes_part['total_number_of_events'] = total_number_of_events
+        attributes_part['n_events'] = n_events_this_file
+        parts.append({'input_filename': input_filename, 'filename': filename2, 'rows': rows,
+                      'group_rows': group_rows[iFile], 'attributes': attributes_part, 'block_size': block_size})
 
-        fout.close()
+    if(n_cores == 1 or len(parts) < 2):
+        for kwargs in parts:
+            _write_part(**kwargs)
+    else:
+        from multiprocessing import Pool
+        with Pool(n_cores) as pool:
+            pool.map(_write_part_star, parts)
 
 
 if __name__ == "__main__":
@@ -120,6 +252,7 @@ if __name__ == "__main__":
     parser.add_argument('outputfolder', type=str, help='output folder')
     parser.add_argument('n_events', type=int, help='number of events per file')
     parser.add_argument('--loglevel', metavar='level', help='loglevel set to either DEBUG, INFO, or WARNING')
+    parser.add_argument('--cores', default=1, type=int, help='number of files that are written in parallel')
     args = parser.parse_args()
 
     if args.loglevel is not None:
@@ -130,4 +263,4 @@ if __name__ == "__main__":
         os.makedirs(args.outputfolder)
     input_filename = os.path.basename(args.file)
 
-    split_hdf5_input_file(args.file, os.path.join(args.outputfolder, input_filename), args.n_events)
+    split_hdf5_input_file(args.file, os.path.join(args.outputfolder, input_filename), args.n_events, n_cores=args.cores)